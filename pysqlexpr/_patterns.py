@@ -0,0 +1,35 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import re
+
+# Regular expressions that recognize lexical elements in the SQL text of expressions, shared by the rewrites that
+# inspect such text.
+
+IDENTIFIER = r"[A-Za-z_][\w$]*"
+"An unquoted identifier, as a pattern to embed in other expressions."
+
+STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+"A string literal, in which a quote is escaped by doubling it or with a backslash."
+
+QUOTED_IDENTIFIER = re.compile(r'"(?:[^"]|"")*"')
+"A quoted identifier, in which a double quote is escaped by doubling it."
+
+NAME = re.compile(rf"(?<![\w$.:])(?:({IDENTIFIER})\.)?({IDENTIFIER})")
+"A (possibly qualified) unquoted name that is not part of a path. Captures the qualifier and the name."
+
+EQUALITY = re.compile(r"\s*(?P<lhs>[^=<>!]+?)\s*=\s*(?P<rhs>[^=<>!]+?)\s*")
+"An equality comparison of two operands."
+
+AGGREGATE = re.compile(
+    r"\b(?:COUNT|SUM|AVG|MIN|MAX|ANY_VALUE|MEDIAN|LISTAGG|ARRAY_AGG|OBJECT_AGG|APPROX_\w+|HLL\w*|STDDEV\w*|VAR\w*)"
+    r"\s*\(",
+    re.IGNORECASE,
+)
+"The start of a call to an aggregate function."
+
+WINDOW = re.compile(r"\bOVER\s*\(", re.IGNORECASE)
+"The start of the window specification of a window function."
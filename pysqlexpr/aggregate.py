@@ -0,0 +1,186 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+from typing import ClassVar
+
+from .immutable import Immutable
+
+# Average relative error of HyperLogLog as implemented by Snowflake (`APPROX_COUNT_DISTINCT` and `HLL`).
+HLL_RELATIVE_ERROR = 0.01625
+
+# Typical rank error of the t-Digest algorithm behind `APPROX_PERCENTILE`, which is most accurate near the tails.
+TDIGEST_RELATIVE_ERROR = 0.01
+
+
+class Aggregate(Immutable):
+    "A structured aggregate function call that may appear in the SELECT list of a query."
+
+    __slots__ = ("expr",)
+
+    function: ClassVar[str] = "[agg]"
+
+    expr: str
+
+    def __init__(self, expr: str) -> None:
+        """
+        :param expr: The expression to aggregate over.
+        """
+
+        object.__setattr__(self, "expr", expr)
+
+    def _key(self) -> tuple[object, ...]:
+        return (self.expr,)
+
+    def __eq__(self, op: object) -> bool:
+        return (
+            isinstance(op, Aggregate)
+            and type(self) is type(op)
+            and self._key() == op._key()
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.function, self._key()))
+
+    def approximation(self) -> "tuple[Aggregate, float] | None":
+        "Returns an approximate counterpart of this aggregate with its relative error, or `None` if there is none."
+
+        return None
+
+    def rollup(self, column: str) -> str | None:
+        """
+        Returns an expression that computes this aggregate over coarser groups from a column that holds the result of
+        this aggregate over finer groups, or `None` if partial results cannot be combined.
+        """
+
+        return None
+
+    def __str__(self) -> str:
+        return f"{self.function}({self.expr})"
+
+
+class Count(Aggregate):
+    "Counts rows, non-NULL values or distinct values."
+
+    __slots__ = ("distinct",)
+
+    function: ClassVar[str] = "COUNT"
+
+    distinct: bool
+
+    def __init__(self, expr: str = "*", *, distinct: bool = False) -> None:
+        """
+        :param expr: The expression whose non-NULL values to count, or `*` to count rows.
+        :param distinct: True to count distinct values.
+        """
+
+        if distinct and expr == "*":
+            raise ValueError("cannot count distinct rows with `*`")
+        super().__init__(expr)
+        object.__setattr__(self, "distinct", distinct)
+
+    def _key(self) -> tuple[object, ...]:
+        return (self.expr, self.distinct)
+
+    def approximation(self) -> "tuple[Aggregate, float] | None":
+        if self.distinct:
+            return ApproxCountDistinct(self.expr), HLL_RELATIVE_ERROR
+        else:
+            return None
+
+    def rollup(self, column: str) -> str | None:
+        if self.distinct:
+            return None
+        else:
+            return f"COALESCE(SUM({column}), 0)"
+
+    def __str__(self) -> str:
+        if self.distinct:
+            return f"COUNT(DISTINCT {self.expr})"
+        else:
+            return f"COUNT({self.expr})"
+
+
+class Sum(Aggregate):
+    function: ClassVar[str] = "SUM"
+
+    def rollup(self, column: str) -> str | None:
+        return f"SUM({column})"
+
+
+class Avg(Aggregate):
+    function: ClassVar[str] = "AVG"
+
+
+class Min(Aggregate):
+    function: ClassVar[str] = "MIN"
+
+    def rollup(self, column: str) -> str | None:
+        return f"MIN({column})"
+
+
+class Max(Aggregate):
+    function: ClassVar[str] = "MAX"
+
+    def rollup(self, column: str) -> str | None:
+        return f"MAX({column})"
+
+
+class Percentile(Aggregate):
+    "An exact percentile, interpolated between adjacent values (`PERCENTILE_CONT`)."
+
+    __slots__ = ("fraction",)
+
+    function: ClassVar[str] = "PERCENTILE_CONT"
+
+    fraction: float
+
+    def __init__(self, expr: str, fraction: float) -> None:
+        """
+        :param expr: The expression whose values to rank.
+        :param fraction: The percentile as a fraction between 0 and 1, e.g. 0.5 for the median.
+        """
+
+        if not 0 <= fraction <= 1:
+            raise ValueError("percentile must be between 0 and 1")
+        super().__init__(expr)
+        object.__setattr__(self, "fraction", fraction)
+
+    def _key(self) -> tuple[object, ...]:
+        return (self.expr, self.fraction)
+
+    def approximation(self) -> "tuple[Aggregate, float] | None":
+        return ApproxPercentile(self.expr, self.fraction), TDIGEST_RELATIVE_ERROR
+
+    def __str__(self) -> str:
+        return f"PERCENTILE_CONT({self.fraction}) WITHIN GROUP (ORDER BY {self.expr})"
+
+
+class ApproxCountDistinct(Aggregate):
+    "Estimates the number of distinct values with HyperLogLog."
+
+    function: ClassVar[str] = "APPROX_COUNT_DISTINCT"
+
+
+class ApproxPercentile(Aggregate):
+    "Estimates a percentile with t-Digest."
+
+    __slots__ = ("fraction",)
+
+    function: ClassVar[str] = "APPROX_PERCENTILE"
+
+    fraction: float
+
+    def __init__(self, expr: str, fraction: float) -> None:
+        if not 0 <= fraction <= 1:
+            raise ValueError("percentile must be between 0 and 1")
+        super().__init__(expr)
+        object.__setattr__(self, "fraction", fraction)
+
+    def _key(self) -> tuple[object, ...]:
+        return (self.expr, self.fraction)
+
+    def __str__(self) -> str:
+        return f"APPROX_PERCENTILE({self.expr}, {self.fraction})"
@@ -5,9 +5,9 @@ pysqlexpr: Expressive SQL for Python
 """
 
 import abc
-from typing import ClassVar, Iterable, NoReturn, final
+from typing import Callable, ClassVar, Iterable, Iterator, NoReturn, final
 
-from .indentation import Printable, indent
+from .indentation import Printable, indent, memoized
 from .typing import override
 
 
@@ -22,34 +22,36 @@ class BoolExpr(abc.ABC, Printable):
     @abc.abstractmethod
     def __or__(self, op: "BoolExpr") -> "BoolExpr": ...
 
-    def __bool__(self) -> NoReturn:
-        raise TypeError(
-            "cannot cast to `bool`, use `&` (instead of `and`) or `|` (instead of `or`) to build composite Boolean expressions"
-        )
+    def predicates(self) -> Iterator["BoolExpr"]:
+        "Enumerates the elementary predicates (i.e. operands that are not logical expressions) in the expression."
 
+        yield self
 
-@final
-class ReturnsBool(BoolExpr):
-    "An expression that yields a Boolean result such as IS [NOT] NULL, equality test, or a comparison."
+    def transform(self, fn: Callable[["BoolExpr"], "BoolExpr"]) -> "BoolExpr":
+        """
+        Replaces each elementary predicate in the expression with the result of a function.
 
-    __slots__ = ("expr",)
+        Sub-expressions in which no predicate has changed are shared with the original expression.
+        """
 
-    expr: str
+        return fn(self)
 
-    def __init__(self, expr: str) -> None:
-        self.expr = expr
+    def __bool__(self) -> NoReturn:
+        raise TypeError(
+            "cannot cast to `bool`, use `&` (instead of `and`) or `|` (instead of `or`) to build composite Boolean expressions"
+        )
 
-    def __eq__(self, op: object) -> bool:
-        return isinstance(op, ReturnsBool) and self.expr == op.expr
 
-    def __hash__(self) -> int:
-        return hash(self.expr)
+class Predicate(BoolExpr):
+    "An elementary Boolean expression, which is not composed of other Boolean expressions."
+
+    __slots__ = ()
 
     @override
     def __and__(self, op: BoolExpr) -> "ConjExpr":
         ops: list[BoolExpr] = []
         ops.append(self)
-        if isinstance(op, ReturnsBool):
+        if isinstance(op, Predicate):
             ops.append(op)
             return ConjExpr(ops)
         elif isinstance(op, ConjExpr):
@@ -65,7 +67,7 @@ class ReturnsBool(BoolExpr):
     def __or__(self, op: BoolExpr) -> "DisjExpr":
         ops: list[BoolExpr] = []
         ops.append(self)
-        if isinstance(op, ReturnsBool):
+        if isinstance(op, Predicate):
             ops.append(op)
             return DisjExpr(ops)
         elif isinstance(op, DisjExpr):
@@ -77,6 +79,24 @@ class ReturnsBool(BoolExpr):
         else:
             raise NotImplementedError("expected: conjunction or disjunction")
 
+
+@final
+class ReturnsBool(Predicate):
+    "An expression that yields a Boolean result such as IS [NOT] NULL, equality test, or a comparison."
+
+    __slots__ = ("expr",)
+
+    expr: str
+
+    def __init__(self, expr: str) -> None:
+        object.__setattr__(self, "expr", expr)
+
+    def __eq__(self, op: object) -> bool:
+        return isinstance(op, ReturnsBool) and self.expr == op.expr
+
+    def __hash__(self) -> int:
+        return hash(self.expr)
+
     @override
     def packed(self) -> str:
         return self.expr
@@ -93,11 +113,12 @@ class LogicalExpr(BoolExpr):
 
     name: ClassVar[str] = "logical expression"
     operator: ClassVar[str] = "[op]"
+    precedence: ClassVar[int] = 0
 
     operands: tuple[BoolExpr, ...]
 
     def __init__(self, ops: Iterable[BoolExpr]) -> None:
-        self.operands = tuple(ops)
+        object.__setattr__(self, "operands", tuple(ops))
 
     def __eq__(self, op: object) -> bool:
         return (
@@ -112,6 +133,27 @@ class LogicalExpr(BoolExpr):
     def __len__(self) -> int:
         return len(self.operands)
 
+    @override
+    def predicates(self) -> Iterator[BoolExpr]:
+        for op in self.operands:
+            yield from op.predicates()
+
+    @override
+    def transform(self, fn: Callable[[BoolExpr], BoolExpr]) -> BoolExpr:
+        ops: list[BoolExpr] = []
+        changed = False
+        for op in self.operands:
+            result = op.transform(fn)
+            if result is not op:
+                changed = True
+            if isinstance(result, LogicalExpr) and result.operator == self.operator:
+                ops.extend(result.operands)
+            else:
+                ops.append(result)
+        if not changed:
+            return self
+        return type(self)(ops)
+
     def unwrap(self) -> BoolExpr:
         if len(self.operands) == 1:
             return self.operands[0]
@@ -124,6 +166,7 @@ class LogicalExpr(BoolExpr):
         if len(self.operands) == 0:
             raise ValueError(f"empty {self.name}")
 
+    @memoized
     def packed(self) -> str:
         "Produces a compact single-line representation of the logical expression."
 
@@ -132,6 +175,33 @@ class LogicalExpr(BoolExpr):
             "(" + f" {self.operator} ".join(op.packed() for op in self.operands) + ")"
         )
 
+    @memoized
+    def wire(self) -> str:
+        "Produces the tightest single-line representation of the logical expression."
+
+        self._check()
+        return f" {self.operator} ".join(
+            (
+                f"({op.wire()})"
+                if isinstance(op, LogicalExpr) and op.precedence < self.precedence
+                else op.wire()
+            )
+            for op in self.operands
+        )
+
+    @memoized
+    def packed_size(self) -> int:
+        "Computes the size of the compact representation of the logical expression."
+
+        self._check()
+        separator = len(self.operator) + 2
+        return (
+            sum(op.packed_size() for op in self.operands)
+            + separator * (len(self.operands) - 1)
+            + 2
+        )
+
+    @memoized
     def spacious(self) -> str:
         "Produces an expanded multi-line representation of the logical expression."
 
@@ -149,12 +219,13 @@ class ConjExpr(LogicalExpr):
 
     name: ClassVar[str] = "conjunction"
     operator: ClassVar[str] = "AND"
+    precedence: ClassVar[int] = 2
 
     @override
     def __and__(self, op: BoolExpr) -> "ConjExpr":
         ops: list[BoolExpr] = []
         ops.extend(self.operands)
-        if isinstance(op, ReturnsBool):
+        if isinstance(op, Predicate):
             ops.append(op)
             return ConjExpr(ops)
         elif isinstance(op, ConjExpr):
@@ -177,6 +248,7 @@ class DisjExpr(LogicalExpr):
 
     name: ClassVar[str] = "disjunction"
     operator: ClassVar[str] = "OR"
+    precedence: ClassVar[int] = 1
 
     @override
     def __and__(self, op: BoolExpr) -> "ConjExpr":
@@ -186,7 +258,7 @@ class DisjExpr(LogicalExpr):
     def __or__(self, op: BoolExpr) -> "DisjExpr":
         ops: list[BoolExpr] = []
         ops.extend(self.operands)
-        if isinstance(op, ReturnsBool):
+        if isinstance(op, Predicate):
             ops.append(op)
             return DisjExpr(ops)
         elif isinstance(op, DisjExpr):
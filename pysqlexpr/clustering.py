@@ -0,0 +1,83 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+from collections import Counter
+from typing import Iterable
+
+from ._patterns import NAME, QUOTED_IDENTIFIER, STRING_LITERAL
+from .boolean import ReturnsBool
+from .query import Query
+from .table import ArrayType, ObjectType, Table, VariantType
+
+
+def _qualifiers(query: Query, table: Table) -> set[str]:
+    "Returns the (upper-case) names by which columns of the table may be qualified in the query."
+
+    name = table.name.raw.upper()
+    qualifiers: set[str] = set()
+    for source in query.source.sources():
+        if isinstance(source.expr, str) and source.expr.split(".")[-1].upper() == name:
+            qualifiers.add(name)
+            if source.alias is not None:
+                qualifiers.add(source.alias.upper())
+    return qualifiers
+
+
+def predicate_columns(query: Query, table: Table) -> set[str]:
+    """
+    Returns the names of the columns of the table that occur in predicates of the WHERE clause of the query.
+
+    A column reference qualified with a name other than the table name or its alias in the query is ignored.
+    """
+
+    qualifiers = _qualifiers(query, table)
+    if query.where is None or not qualifiers:
+        return set()
+    columns: set[str] = set()
+    for predicate in query.where.predicates():
+        if not isinstance(predicate, ReturnsBool):
+            continue
+        text = STRING_LITERAL.sub("''", predicate.expr)
+        text = QUOTED_IDENTIFIER.sub('""', text)
+        for m in NAME.finditer(text):
+            qualifier = m.group(1)
+            if qualifier is not None and qualifier.upper() not in qualifiers:
+                continue
+            column = table.get_column(m.group(2))
+            if column is not None:
+                columns.add(column.name.raw)
+    return columns
+
+
+def suggest_cluster_keys(
+    table: Table, queries: Iterable[Query], *, max_keys: int = 3
+) -> list[str]:
+    """
+    Suggests clustering keys for a table from the columns most frequently filtered on in a workload.
+
+    Only queries that read the table are considered. Each query counts once for each column of the table that occurs
+    in a predicate of its WHERE clause. Semi-structured columns are skipped because they cannot be clustering keys
+    without an expression. Ties are broken by the order of columns in the table.
+
+    :param table: The table to cluster.
+    :param queries: A representative sample of queries in the workload.
+    :param max_keys: Maximum number of clustering keys to suggest.
+    """
+
+    counter: Counter[str] = Counter()
+    for query in queries:
+        counter.update(predicate_columns(query, table))
+
+    order = {column.name.raw: index for index, column in enumerate(table.columns)}
+    candidates = [
+        name
+        for name in counter
+        if not isinstance(
+            table.columns[order[name]].data_type, (VariantType, ArrayType, ObjectType)
+        )
+    ]
+    candidates.sort(key=lambda name: (-counter[name], order[name]))
+    return candidates[:max_keys]
@@ -0,0 +1,343 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import re
+from typing import Any, Callable, Iterable, Literal, Sequence
+
+from ._patterns import AGGREGATE, STRING_LITERAL, WINDOW
+from .aggregate import Aggregate
+from .boolean import BoolExpr, ReturnsBool
+from .indentation import utf8_len
+from .query import Column, FromExpr, Join, Query, SourceExpr, UnionAll
+from .size import MAX_STATEMENT_SIZE, StatementTooLargeError
+
+# Many queries that differ only in the literals they compare columns against (e.g. `customer_id = 42`) share a
+# template. Queries with the same template can be answered in a single round trip, and their rows told apart by a
+# discriminator column, which holds the index of the original query.
+
+CoalesceMode = Literal["union", "values"]
+
+_FILTER_LITERAL = re.compile(
+    r"(?P<op>(?:<>|!=|<=|>=|=|<|>)|\b(?:NOT\s+)?I?LIKE\b)\s*"
+    rf"(?P<literal>(?:(?:DATE|TIME|TIMESTAMP(?:_[LNT]Z)?)\s+)?{STRING_LITERAL.pattern}|-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?(?![\w$.]))"
+    rf"|{STRING_LITERAL.pattern}",
+    re.IGNORECASE,
+)
+_SEPARATOR_SIZE = len(" UNION ALL ")
+
+
+def _parameterize(
+    expr: BoolExpr, replace: Callable[[int, str], str]
+) -> tuple[BoolExpr, list[str]]:
+    """
+    Replaces the literals a predicate compares against with the result of a function.
+
+    :param expr: The expression whose elementary predicates to scan.
+    :param replace: A function that receives the index and the text of a literal, and returns its replacement.
+    :returns: The transformed expression, and the text of the literals in order of occurrence.
+    """
+
+    literals: list[str] = []
+
+    def substitute(m: re.Match[str]) -> str:
+        literal = m.group("literal")
+        if literal is None:
+            return m.group(0)
+        text = replace(len(literals), literal)
+        literals.append(literal)
+        return m.group(0)[: m.start("literal") - m.start()] + text
+
+    def transform(predicate: BoolExpr) -> BoolExpr:
+        if not isinstance(predicate, ReturnsBool):
+            return predicate
+        text = _FILTER_LITERAL.sub(substitute, predicate.expr)
+        if text == predicate.expr:
+            return predicate
+        return ReturnsBool(text)
+
+    return expr.transform(transform), literals
+
+
+def _template(query: Query) -> tuple[Query, list[str]]:
+    "Splits a query into a template, in which filter literals are replaced with placeholders, and the literals."
+
+    if query.where is None:
+        return query, []
+    where, literals = _parameterize(query.where, lambda index, literal: "?")
+    return query.with_where(where), literals
+
+
+def _is_coalescable(query: Query) -> bool:
+    "True if the rows of the query can be returned along with those of other queries without changing them."
+
+    return query.order_by is None and query.limit is None and query.offset is None
+
+
+def _is_joinable(query: Query) -> bool:
+    "True if the query can be evaluated for several sets of parameters at once by joining against a list of values."
+
+    if query.qualify is not None:
+        return False
+    for column in query.columns.columns:
+        if isinstance(column.expr, Aggregate):
+            aggregate = True
+        else:
+            if column.expr.strip() == "*":
+                return False
+            if WINDOW.search(column.expr) is not None:
+                # a window would span the rows of all sets of parameters
+                return False
+            aggregate = AGGREGATE.search(column.expr) is not None
+        if aggregate and query.group_by is None:
+            # an aggregate query without grouping returns a row even for an empty input
+            return False
+    return True
+
+
+class Batch:
+    "A single query that answers several of the original queries, whose rows are told apart by a discriminator column."
+
+    __slots__ = ("query", "requests", "discriminator")
+
+    query: Query | UnionAll
+    requests: tuple[int, ...]
+    discriminator: str
+
+    def __init__(
+        self, query: Query | UnionAll, requests: Iterable[int], discriminator: str
+    ) -> None:
+        """
+        :param query: The combined query, whose last column is the discriminator.
+        :param requests: The indices of the original queries the combined query answers.
+        :param discriminator: The name of the column that holds the index of the original query.
+        """
+
+        self.query = query
+        self.requests = tuple(requests)
+        self.discriminator = discriminator
+
+    def demultiplex(
+        self, rows: Iterable[Sequence[Any]]
+    ) -> dict[int, list[tuple[Any, ...]]]:
+        """
+        Splits the rows returned by the combined query among the original queries.
+
+        :param rows: Rows returned by the combined query, each ending with the discriminator column.
+        :returns: A mapping from the index of each original query to its rows, without the discriminator column.
+        """
+
+        results: dict[int, list[tuple[Any, ...]]] = {
+            index: [] for index in self.requests
+        }
+        for row in rows:
+            index = int(row[-1])
+            try:
+                results[index].append(tuple(row[:-1]))
+            except KeyError:
+                raise ValueError(
+                    f"row belongs to query #{index}, which is not part of the batch"
+                ) from None
+        return results
+
+
+def _discriminated(query: Query, index: int, discriminator: str) -> Query:
+    return query.with_columns(
+        query.columns.columns + (Column(str(index), name=discriminator),)
+    )
+
+
+def _union_batches(
+    queries: Sequence[Query],
+    requests: list[int],
+    discriminator: str,
+    limit: int,
+) -> list[Batch]:
+    batches: list[Batch] = []
+    branches: list[Query] = []
+    indices: list[int] = []
+    size = 0
+
+    def flush() -> None:
+        query = branches[0] if len(branches) == 1 else UnionAll(branches)
+        batches.append(Batch(query, indices, discriminator))
+
+    for index in requests:
+        branch = _discriminated(queries[index], index, discriminator)
+        branch_size = branch.packed_size()
+        if branch_size > limit:
+            raise StatementTooLargeError(branch_size, limit)
+        if branches and size + _SEPARATOR_SIZE + branch_size > limit:
+            flush()
+            branches = []
+            indices = []
+            size = 0
+        if branches:
+            size += _SEPARATOR_SIZE
+        branches.append(branch)
+        indices.append(index)
+        size += branch_size
+    if branches:
+        flush()
+    return batches
+
+
+def _values_query(
+    template: Query,
+    rows: list[str],
+    width: int,
+    discriminator: str,
+    alias: str,
+) -> Query:
+    """
+    Joins a query with a list of parameter values, one row for each original query.
+
+    :param template: Any of the original queries that share the template, whose filter literals are replaced with
+        references to the list of values.
+    """
+
+    columns = [Column("$1", name=discriminator)]
+    columns.extend(Column(f"${k + 2}", name=f"_p{k}") for k in range(width))
+    parameters = Query(FromExpr("VALUES " + ", ".join(rows)), columns)
+
+    source: SourceExpr = template.source
+    if isinstance(source, Query):
+        source = FromExpr(source)
+    query = template.with_source(
+        Join(source, FromExpr(parameters, name=alias), ReturnsBool("TRUE"))
+    )
+    if template.where is not None:
+        where, _ = _parameterize(
+            template.where, lambda index, literal: f"{alias}._p{index}"
+        )
+        query = query.with_where(where)
+    query = query.with_columns(
+        template.columns.columns
+        + (Column(f"{alias}.{discriminator}", name=discriminator),)
+    )
+    if template.group_by is not None:
+        query = query.with_group_by(template.group_by + (f"{alias}.{discriminator}",))
+    return query
+
+
+def _values_batches(
+    template: Query,
+    parameters: list[tuple[int, list[str]]],
+    discriminator: str,
+    alias: str,
+    limit: int,
+) -> list[Batch]:
+    width = len(parameters[0][1])
+    rows = [
+        "(" + ", ".join([str(index)] + literals) + ")" for index, literals in parameters
+    ]
+
+    # size of the combined query without the list of values
+    base = _values_query(
+        template, rows[:1], width, discriminator, alias
+    ).packed_size() - utf8_len(rows[0])
+
+    batches: list[Batch] = []
+    chunk: list[str] = []
+    indices: list[int] = []
+    size = base
+    for (index, _), row in zip(parameters, rows):
+        row_size = utf8_len(row)
+        if base + row_size > limit:
+            raise StatementTooLargeError(base + row_size, limit)
+        if chunk and size + 2 + row_size > limit:
+            query = _values_query(template, chunk, width, discriminator, alias)
+            batches.append(Batch(query, indices, discriminator))
+            chunk = []
+            indices = []
+            size = base
+        if chunk:
+            size += 2
+        chunk.append(row)
+        indices.append(index)
+        size += row_size
+    if chunk:
+        query = _values_query(template, chunk, width, discriminator, alias)
+        batches.append(Batch(query, indices, discriminator))
+    return batches
+
+
+def coalesce(
+    queries: Sequence[Query],
+    *,
+    mode: CoalesceMode = "union",
+    discriminator: str = "_request",
+    alias: str = "_p",
+    limit: int = MAX_STATEMENT_SIZE,
+) -> list[Batch]:
+    """
+    Merges queries that share a template into as few queries as possible, to save round trips to the database.
+
+    Two queries share a template if they are structurally equal once the literals that their WHERE clause compares
+    against (with `=`, `<>`, `<`, `>`, `LIKE`, etc.) are replaced with placeholders, e.g. `customer_id = 42` and
+    `customer_id = 43`. Each group of queries with the same template is combined in one of two ways:
+
+    * `union`: the original queries are concatenated with `UNION ALL`, each extended with a discriminator column
+      that holds the index of the original query.
+    * `values`: the template is joined with a list of values, each row of which holds the index of an original query
+      and the literals of that query, and the literals in the WHERE clause are replaced with references to the list.
+      The statement is much shorter, and the table is scanned once. Groups that are not eligible (e.g. with a QUALIFY
+      clause, or with aggregates but no GROUP BY) are combined with `UNION ALL` instead.
+
+    Queries with an ORDER BY, LIMIT or OFFSET clause are not combined with other queries. Batches are split such
+    that each combined query fits within the size limit.
+
+    :param queries: The queries to combine.
+    :param mode: The way queries with the same template are combined.
+    :param discriminator: The name of the column appended to each combined query to identify the original query.
+    :param alias: The name by which the list of values is referenced in `values` mode.
+    :param limit: The maximum number of bytes permitted for each combined query.
+    :returns: Batches in order of the first query they answer. Use `demultiplex` to map their results back.
+    """
+
+    groups: dict[Query, list[tuple[int, list[str]]]] = {}
+    singles: list[int] = []
+    for index, query in enumerate(queries):
+        if not _is_coalescable(query):
+            singles.append(index)
+            continue
+        template, literals = _template(query)
+        groups.setdefault(template, []).append((index, literals))
+
+    ordered: list[tuple[int, list[Batch]]] = []
+    for index in singles:
+        ordered.append((index, _union_batches(queries, [index], discriminator, limit)))
+    for template, parameters in groups.items():
+        first = parameters[0][0]
+        if mode == "values" and _is_joinable(template):
+            batches = _values_batches(
+                queries[first], parameters, discriminator, alias, limit
+            )
+        else:
+            requests = [index for index, _ in parameters]
+            batches = _union_batches(queries, requests, discriminator, limit)
+        ordered.append((first, batches))
+
+    ordered.sort(key=lambda item: item[0])
+    return [batch for _, batches in ordered for batch in batches]
+
+
+def demultiplex(
+    batches: Sequence[Batch], results: Iterable[Iterable[Sequence[Any]]]
+) -> list[list[tuple[Any, ...]]]:
+    """
+    Splits the rows returned by combined queries among the original queries.
+
+    :param batches: Batches returned by `coalesce`.
+    :param results: Rows returned by the query of each batch, in the same order as the batches.
+    :returns: The rows of each original query (without the discriminator column), in the order the queries were given.
+    """
+
+    merged: dict[int, list[tuple[Any, ...]]] = {}
+    count = 0
+    for batch, rows in zip(batches, results, strict=True):
+        merged.update(batch.demultiplex(rows))
+        count += len(batch.requests)
+    return [merged[index] for index in range(count)]
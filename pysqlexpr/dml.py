@@ -0,0 +1,247 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import abc
+import datetime
+import decimal
+import math
+from typing import Any, Iterable, Iterator, Mapping, Sequence
+
+from .identifier import Identifier
+from .indentation import utf8_len
+from .query import Query
+from .size import MAX_STATEMENT_SIZE, StatementTooLargeError, chunk_values
+from .table import Table, sql_quoted_string
+
+Row = Sequence[Any]
+
+
+def sql_literal(value: Any) -> str:
+    """
+    Renders a Python value as a SQL literal.
+
+    :param value: `None`, a boolean, a number, a string, a byte string, or a date, time or timestamp.
+    """
+
+    if value is None:
+        return "NULL"
+    elif isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    elif isinstance(value, int):
+        return str(value)
+    elif isinstance(value, float):
+        if math.isfinite(value):
+            return repr(value)
+        else:
+            return f"'{value}'::FLOAT"
+    elif isinstance(value, decimal.Decimal):
+        if value.is_finite():
+            return str(value)
+        else:
+            return f"'{value}'::FLOAT"
+    elif isinstance(value, str):
+        return sql_quoted_string(value)
+    elif isinstance(value, (bytes, bytearray)):
+        return f"X'{value.hex().upper()}'"
+    elif isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            return f"TIMESTAMP_TZ '{value.isoformat(sep=' ')}'"
+        else:
+            return f"TIMESTAMP '{value.isoformat(sep=' ')}'"
+    elif isinstance(value, datetime.date):
+        return f"DATE '{value.isoformat()}'"
+    elif isinstance(value, datetime.time):
+        return f"TIME '{value.isoformat()}'"
+    else:
+        raise TypeError(
+            f"cannot convert object of type `{type(value).__name__}` to SQL literal"
+        )
+
+
+class _KeySetStatement(abc.ABC):
+    "A statement that modifies the rows of a table whose key is in a key set, given as rows of values or a query."
+
+    __slots__ = ("table", "keys", "source", "alias")
+
+    table: Table
+    keys: tuple[Identifier, ...]
+    source: Iterable[Row] | Query
+    alias: str
+
+    def __init__(
+        self,
+        table: Table,
+        keys: Iterable[str],
+        source: Iterable[Row] | Query,
+        *,
+        alias: str = "k",
+    ) -> None:
+        self.table = table
+        self.keys = self._columns(keys)
+        if not self.keys:
+            raise ValueError("expected: at least one key column")
+        self.source = source
+        self.alias = alias
+
+    def _columns(self, names: Iterable[str]) -> tuple[Identifier, ...]:
+        identifiers: list[Identifier] = []
+        for name in names:
+            column = self.table.get_column(name)
+            if column is None:
+                raise ValueError(
+                    f"column `{name}` is not a column of table: {self.table.name}"
+                )
+            identifiers.append(column.name)
+        return tuple(identifiers)
+
+    @property
+    def names(self) -> tuple[Identifier, ...]:
+        "The names of the columns of the key set."
+
+        return self.keys
+
+    def _condition(self) -> str:
+        return " AND ".join(
+            f"{self.table.name}.{key} = {self.alias}.{key}" for key in self.keys
+        )
+
+    def _rows(self, rows: Iterable[Row]) -> Iterator[str]:
+        width = len(self.names)
+        for row in rows:
+            if len(row) != width:
+                raise ValueError(f"expected: {width} values in row; got: {len(row)}")
+            yield "(" + ", ".join(sql_literal(value) for value in row) + ")"
+
+    @abc.abstractmethod
+    def _head(self, source: str) -> str:
+        "Emits the part of the statement that precedes the rows (or query) of the key set."
+        ...
+
+    def _tail(self) -> str:
+        names = ", ".join(str(name) for name in self.names)
+        return f" AS {self.alias} ({names}) WHERE {self._condition()};"
+
+    def statements(self, limit: int = MAX_STATEMENT_SIZE) -> Iterator[str]:
+        """
+        Emits statements that each fit within the size limit.
+
+        If the key set is a query, a single statement is emitted. Otherwise, rows are rendered as a `VALUES` list,
+        and split across as many statements as necessary. Rows are consumed lazily, as statements are requested.
+
+        :param limit: The maximum number of bytes permitted for each statement.
+        :raises StatementTooLargeError: Raised when a single row (or the query) cannot fit into a statement.
+        """
+
+        if isinstance(self.source, Query):
+            head = self._head("(")
+            tail = ")" + self._tail()
+            size = utf8_len(head) + self.source.packed_size() + utf8_len(tail)
+            if size > limit:
+                raise StatementTooLargeError(size, limit)
+            yield f"{head}{self.source.packed()}{tail}"
+        else:
+            yield from chunk_values(
+                self._head("(VALUES"),
+                self._rows(self.source),
+                limit,
+                ")" + self._tail(),
+            )
+
+
+class Delete(_KeySetStatement):
+    """
+    Deletes the rows of a table whose key is in a key set, joining the table with the key set.
+
+    For example, `Delete(table, ["id"], [(1,), (2,)])` emits
+    `DELETE FROM t USING (VALUES (1), (2)) AS k (id) WHERE t.id = k.id;`. Key values that are NULL match no rows.
+    """
+
+    __slots__ = ()
+
+    def __init__(
+        self,
+        table: Table,
+        keys: Iterable[str],
+        source: Iterable[Row] | Query,
+        *,
+        alias: str = "k",
+    ) -> None:
+        """
+        :param table: The table to delete from.
+        :param keys: Names of the columns that identify the rows to delete, typically the primary key.
+        :param source: Tuples of key values, or a query whose SELECT list yields the key columns in order.
+        :param alias: The name by which the key set is referenced in the statement.
+        """
+
+        super().__init__(table, keys, source, alias=alias)
+
+    def _head(self, source: str) -> str:
+        return f"DELETE FROM {self.table.name} USING {source}"
+
+
+class Update(_KeySetStatement):
+    """
+    Updates the rows of a table whose key is in a key set, joining the table with the key set.
+
+    New values may come from the key set (`columns`), or from SQL expressions over the table and the key set
+    (`assignments`). For example, `Update(table, ["id"], [(1, 10)], columns=["amount"])` emits
+    `UPDATE t SET amount = k.amount FROM (VALUES (1, 10)) AS k (id, amount) WHERE t.id = k.id;`.
+
+    Each key should occur in the key set at most once; otherwise, which of the matching rows supplies the new values
+    is not determined.
+    """
+
+    __slots__ = ("columns", "assignments")
+
+    columns: tuple[Identifier, ...]
+    assignments: dict[Identifier, str]
+
+    def __init__(
+        self,
+        table: Table,
+        keys: Iterable[str],
+        source: Iterable[Row] | Query,
+        *,
+        columns: Iterable[str] = (),
+        assignments: Mapping[str, str] | None = None,
+        alias: str = "k",
+    ) -> None:
+        """
+        :param table: The table to update.
+        :param keys: Names of the columns that identify the rows to update, typically the primary key.
+        :param source: Tuples of key values followed by new values for `columns`, or a query whose SELECT list
+            yields the key columns and then `columns` in order.
+        :param columns: Names of the columns whose new values are supplied by the key set.
+        :param assignments: A mapping from column name to a SQL expression that computes the new value.
+        :param alias: The name by which the key set is referenced in the statement.
+        """
+
+        super().__init__(table, keys, source, alias=alias)
+        self.columns = self._columns(columns)
+        assignments = assignments or {}
+        self.assignments = dict(
+            zip(self._columns(assignments.keys()), assignments.values())
+        )
+
+        targets = list(self.columns) + list(self.assignments.keys())
+        if not targets:
+            raise ValueError("expected: at least one column to update")
+        for target in targets:
+            if target in self.keys:
+                raise ValueError(f"cannot update key column: {target}")
+        if len(set(targets)) != len(targets):
+            raise ValueError("a column is assigned more than once")
+
+    @property
+    def names(self) -> tuple[Identifier, ...]:
+        return self.keys + self.columns
+
+    def _head(self, source: str) -> str:
+        assignments = [f"{column} = {self.alias}.{column}" for column in self.columns]
+        assignments.extend(
+            f"{column} = {expr}" for column, expr in self.assignments.items()
+        )
+        return f"UPDATE {self.table.name} SET {', '.join(assignments)} FROM {source}"
@@ -0,0 +1,389 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import re
+from typing import Callable, Iterable, Iterator, Mapping
+
+from ._patterns import EQUALITY, IDENTIFIER, NAME, QUOTED_IDENTIFIER, STRING_LITERAL
+from .boolean import BoolExpr, ConjExpr, Predicate, ReturnsBool
+from .query import (
+    Column,
+    Exists,
+    FromExpr,
+    InSubquery,
+    Join,
+    JoinExpr,
+    LateralJoin,
+    LeftJoin,
+    Query,
+    RightJoin,
+    SourceExpr,
+)
+from .table import Table
+
+# A left join preserves every row of its left side. When the right side matches at most one row for each row on the
+# left (i.e. the join condition equates a unique key of the right side) and no column of the right side is used
+# outside the join condition, the join neither adds nor removes rows, and the query yields the same result without it.
+
+_SET_AGGREGATE = re.compile(
+    r"(?:(?:MIN|MAX|ANY_VALUE|BOOLAND_AGG|BOOLOR_AGG|BITAND_AGG|BITOR_AGG|ARRAY_UNIQUE_AGG|APPROX_COUNT_DISTINCT)"
+    r"\s*\(|(?:COUNT|SUM|AVG|LISTAGG|ARRAY_AGG)\s*\(\s*DISTINCT\s)[^()]*\)",
+    re.IGNORECASE,
+)
+
+
+def _strip(text: str) -> str:
+    "Removes string literals from SQL text, which may contain anything that looks like a reference."
+
+    return STRING_LITERAL.sub("''", text)
+
+
+def _references(text: str, alias: str) -> bool:
+    "True if the SQL text contains a reference qualified with the alias, e.g. `alias.column` or `alias.*`."
+
+    pattern = rf'(?<![\w$.])(?:{re.escape(alias)}|"{re.escape(alias)}")\s*\.'
+    return re.search(pattern, _strip(text), re.IGNORECASE) is not None
+
+
+def _unqualified(text: str, table: Table) -> bool:
+    "True if the SQL text contains an unqualified name that matches a column of the table."
+
+    text = QUOTED_IDENTIFIER.sub('""', _strip(text))
+    for m in NAME.finditer(text):
+        if m.group(1) is None and table.get_column(m.group(2)) is not None:
+            return True
+    return False
+
+
+def _key_columns(condition: BoolExpr, alias: str) -> set[str]:
+    """
+    Returns the names of columns of the right side that the join condition equates with an expression over the
+    left side, e.g. `o.customer_id = c.id` yields `id` for the alias `c`.
+    """
+
+    if isinstance(condition, ConjExpr):
+        operands: Iterable[BoolExpr] = condition.operands
+    else:
+        operands = [condition]
+
+    qualified = re.compile(
+        rf'(?:{re.escape(alias)}|"{re.escape(alias)}")\s*\.\s*({IDENTIFIER})',
+        re.IGNORECASE,
+    )
+    columns: set[str] = set()
+    for operand in operands:
+        if not isinstance(operand, ReturnsBool):
+            continue
+        m = EQUALITY.fullmatch(_strip(operand.expr))
+        if m is None:
+            continue
+        for side, other in (("lhs", "rhs"), ("rhs", "lhs")):
+            column = qualified.fullmatch(m.group(side))
+            if column is not None and not _references(m.group(other), alias):
+                columns.add(column.group(1))
+    return columns
+
+
+def _texts(query: Query) -> list[tuple[object, str]]:
+    "Collects the SQL text of each part of the query, paired with the node the text belongs to."
+
+    texts: list[tuple[object, str]] = [
+        (query, str(c.expr)) for c in query.columns.columns
+    ]
+    if query.where is not None:
+        texts.append((query, query.where.packed()))
+    if query.group_by is not None:
+        texts.extend((query, g) for g in query.group_by)
+    if query.qualify is not None:
+        texts.append((query, query.qualify.packed()))
+    if query.order_by is not None:
+        texts.extend((query, o) for o in query.order_by)
+
+    def walk(source: SourceExpr) -> None:
+        if isinstance(source, JoinExpr):
+            walk(source.left)
+            walk(source.right)
+            if source.condition is not None:
+                texts.append((source, source.condition.packed()))
+        elif isinstance(source, FromExpr):
+            if isinstance(source.expr, str):
+                texts.append((source, source.expr))
+            else:
+                texts.append((source, source.expr.packed()))
+        else:
+            texts.append((source, source.packed()))
+
+    walk(query.source)
+    return texts
+
+
+def _candidates(source: SourceExpr) -> Iterable[LeftJoin]:
+    "Enumerates left joins whose right side is a table (rather than a join or a sub-query)."
+
+    if isinstance(source, JoinExpr):
+        yield from _candidates(source.left)
+        yield from _candidates(source.right)
+        if (
+            isinstance(source, LeftJoin)
+            and isinstance(source.right, FromExpr)
+            and isinstance(source.right.expr, str)
+        ):
+            yield source
+
+
+def _replace(source: SourceExpr, join: JoinExpr) -> SourceExpr:
+    "Replaces a join with its left side, sharing all sub-trees that do not contain the join."
+
+    if source is join:
+        return join.left
+    if isinstance(source, JoinExpr):
+        left = _replace(source.left, join)
+        right = _replace(source.right, join)
+        if left is not source.left or right is not source.right:
+            return source._derive(left, right)
+    return source
+
+
+def _table(source: FromExpr, tables: dict[str, Table]) -> Table | None:
+    "Looks up the table that a FROM expression names."
+
+    if isinstance(source.expr, str):
+        return tables.get(source.expr.split(".")[-1].upper())
+    else:
+        return None
+
+
+def _is_unused(
+    join: JoinExpr, texts: list[tuple[object, str]], table: Table, alias: str
+) -> bool:
+    "True if no part of the query other than the join condition may reference a column of the right side of the join."
+
+    for owner, text in texts:
+        if owner is join or owner is join.right:
+            continue
+        if _references(text, alias):
+            return False
+        if not isinstance(owner, FromExpr) and _unqualified(text, table):
+            return False
+        if isinstance(owner, Query) and "*" in _strip(text):
+            return False
+    return True
+
+
+def _is_removable(
+    join: LeftJoin, texts: list[tuple[object, str]], tables: dict[str, Table]
+) -> bool:
+    right = join.right
+    assert isinstance(right, FromExpr)
+    table = _table(right, tables)
+    alias = right.alias
+    if table is None or alias is None or join.condition is None:
+        return False
+
+    return _is_unused(join, texts, table, alias) and table.is_unique(
+        _key_columns(join.condition, alias)
+    )
+
+
+def _rewrite_source(
+    source: SourceExpr, rewrite: Callable[[Query], Query]
+) -> SourceExpr:
+    "Applies a rewrite to sub-queries nested in the source."
+
+    if isinstance(source, Query):
+        return rewrite(source)
+    elif isinstance(source, FromExpr):
+        if isinstance(source.expr, Query):
+            expr = rewrite(source.expr)
+            if expr is not source.expr:
+                return FromExpr(
+                    expr,
+                    name=source.name,
+                    sample=source.sample,
+                    statistics=source.statistics,
+                )
+        return source
+    elif isinstance(source, JoinExpr):
+        left = _rewrite_source(source.left, rewrite)
+        right = _rewrite_source(source.right, rewrite)
+        if left is not source.left or right is not source.right:
+            return source._derive(left, right)
+        return source
+    else:
+        return source
+
+
+def _eliminate(query: Query, tables: dict[str, Table]) -> Query:
+    source = _rewrite_source(query.source, lambda q: _eliminate(q, tables))
+    if source is not query.source:
+        query = query.with_source(source)
+
+    while True:
+        texts = _texts(query)
+        for join in _candidates(query.source):
+            if _is_removable(join, texts, tables):
+                query = query.with_source(_replace(query.source, join))
+                break
+        else:
+            return query
+
+
+def _index(tables: Iterable[Table] | Mapping[str, Table]) -> dict[str, Table]:
+    if isinstance(tables, Mapping):
+        return {name.upper(): table for name, table in tables.items()}
+    else:
+        return {table.name.raw.upper(): table for table in tables}
+
+
+def eliminate_joins(
+    query: Query, tables: Iterable[Table] | Mapping[str, Table]
+) -> Query:
+    """
+    Removes left joins that cannot affect the result of the query.
+
+    A left join is removed when all of the following hold:
+
+    * its right side is a table with a declared primary key, unique key or unique column,
+    * its join condition is a conjunction of predicates that equates each column of such a key with an expression over
+      the left side, e.g. `o.customer_id = c.id`,
+    * the alias of the right side is not referenced in the SELECT list, WHERE, GROUP BY or QUALIFY clause, or any
+      other join condition or FROM expression,
+    * no unqualified name in those clauses matches a column of the right side, and the SELECT list contains no `*`.
+
+    Joins are removed repeatedly until no more joins can be removed, which drops chains of unused dimensions.
+    Sub-queries in the FROM clause are optimized independently. Parts of the query not affected are shared with the
+    original query.
+
+    :param query: The query to optimize.
+    :param tables: Tables with uniqueness metadata, or a mapping from table name to table. Tables are matched by
+        (unqualified) name without regard to case.
+    :returns: The optimized query, or the original query if no join can be removed.
+    """
+
+    return _eliminate(query, _index(tables))
+
+
+def _filtering_joins(source: SourceExpr) -> Iterator[Join]:
+    """
+    Enumerates inner joins whose right side is a table, and whose result is not null-extended by an enclosing outer
+    join (i.e. rows that the inner join drops are also dropped from the result of the FROM clause).
+    """
+
+    if isinstance(source, (LeftJoin, LateralJoin)):
+        yield from _filtering_joins(source.left)
+    elif isinstance(source, RightJoin):
+        yield from _filtering_joins(source.right)
+    elif isinstance(source, Join):
+        yield from _filtering_joins(source.left)
+        yield from _filtering_joins(source.right)
+        if isinstance(source.right, FromExpr) and isinstance(source.right.expr, str):
+            yield source
+
+
+def _is_duplicate_insensitive(query: Query) -> bool:
+    "True if the result of the query does not change when rows of its FROM clause are repeated."
+
+    if query.group_by is None:
+        return False
+    keys = {re.sub(r"\s+", "", key).upper() for key in query.group_by}
+    for column in query.columns.columns:
+        expr = str(column.expr).strip()
+        if re.sub(r"\s+", "", expr).upper() in keys:
+            continue
+        if _SET_AGGREGATE.fullmatch(expr) is None:
+            return False
+    return True
+
+
+def _semi_join(join: Join, alias: str) -> Predicate:
+    "Builds the predicate that keeps the rows of the left side of the join that have a match on the right side."
+
+    assert join.condition is not None
+    right = join.right
+    condition = join.condition
+    if isinstance(condition, ReturnsBool) and not STRING_LITERAL.search(condition.expr):
+        m = EQUALITY.fullmatch(condition.expr)
+        qualified = re.compile(
+            rf'(?:{re.escape(alias)}|"{re.escape(alias)}")\s*\.\s*{IDENTIFIER}',
+            re.IGNORECASE,
+        )
+        if m is not None:
+            for side, other in (("lhs", "rhs"), ("rhs", "lhs")):
+                column = m.group(side)
+                if qualified.fullmatch(column) and not _references(
+                    m.group(other), alias
+                ):
+                    return InSubquery(m.group(other), Query(right, [Column(column)]))
+    return Exists(Query(right, [Column("1")], where=condition))
+
+
+def _is_semi_join(
+    join: Join,
+    query: Query,
+    texts: list[tuple[object, str]],
+    tables: dict[str, Table],
+) -> bool:
+    right = join.right
+    assert isinstance(right, FromExpr)
+    table = _table(right, tables)
+    alias = right.alias
+    if table is None or alias is None or join.condition is None:
+        return False
+
+    if not _is_unused(join, texts, table, alias):
+        return False
+    return _is_duplicate_insensitive(query) or table.is_unique(
+        _key_columns(join.condition, alias)
+    )
+
+
+def _convert(query: Query, tables: dict[str, Table]) -> Query:
+    source = _rewrite_source(query.source, lambda q: _convert(q, tables))
+    if source is not query.source:
+        query = query.with_source(source)
+
+    while True:
+        texts = _texts(query)
+        for join in _filtering_joins(query.source):
+            if _is_semi_join(join, query, texts, tables):
+                assert isinstance(join.right, FromExpr) and join.right.alias
+                predicate = _semi_join(join, join.right.alias)
+                where = (
+                    query.where & predicate if query.where is not None else predicate
+                )
+                query = query._derive(source=_replace(query.source, join), where=where)
+                break
+        else:
+            return query
+
+
+def convert_semi_joins(
+    query: Query, tables: Iterable[Table] | Mapping[str, Table]
+) -> Query:
+    """
+    Replaces inner joins that only filter the rows of the query with semi-join predicates in the WHERE clause.
+
+    An inner join to a table whose columns are used nowhere but in the join condition only serves to keep the rows
+    that have a match. Unless the table has a unique key on the join columns, the join also repeats each row as many
+    times as it has matches, which a GROUP BY clause then collapses again. A semi-join tests for a match without the
+    fan-out. A join with a single equality condition `x = t.col` becomes `x IN (SELECT t.col FROM t)`, and any other
+    join becomes a correlated `EXISTS (SELECT 1 FROM t WHERE ...)`.
+
+    An inner join is converted when all of the following hold:
+
+    * its right side is a known table, and the join is not on the null-extended side of an outer join,
+    * the alias of the right side is not referenced anywhere in the query but in the join condition, and no
+      unqualified name matches a column of the right side (see `eliminate_joins`),
+    * either the join condition equates a unique key of the table, or the query has a GROUP BY clause, and each
+      column of the SELECT list is a grouping key or an aggregate that ignores duplicates (e.g. `MIN`, `MAX` or
+      `COUNT(DISTINCT ...)`).
+
+    :param query: The query to optimize.
+    :param tables: Tables the query reads, or a mapping from table name to table.
+    :returns: The optimized query, or the original query if no join can be converted.
+    """
+
+    return _convert(query, _index(tables))
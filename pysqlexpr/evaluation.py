@@ -0,0 +1,859 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import abc
+import datetime
+import decimal
+import operator
+import re
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Mapping,
+    Sequence,
+    TypeVar,
+)
+
+from ._patterns import IDENTIFIER, QUOTED_IDENTIFIER, STRING_LITERAL
+from .boolean import BoolExpr, ConjExpr, DisjExpr, ReturnsBool
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# A predicate is evaluated with SQL three-valued logic: comparing NULL with any value yields NULL (represented as
+# `None`), a conjunction is false if any operand is false and a disjunction is true if any operand is true. A row
+# passes a filter only if the predicate is true, as in a WHERE clause.
+
+Row = Sequence[Any] | Mapping[str, Any]
+R = TypeVar("R", bound=Row)
+Truth = bool | None
+RowPredicate = Callable[[Row], Truth]
+MaskPredicate = Callable[[Mapping[str, "np.ndarray"]], "np.ndarray"]
+
+_TOKEN = re.compile(
+    rf"""\s*(?:
+    (?P<string>{STRING_LITERAL.pattern})
+    |(?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+    |(?P<quoted>{QUOTED_IDENTIFIER.pattern})
+    |(?P<name>{IDENTIFIER})
+    |(?P<symbol><>|!=|<=|>=|=|<|>|\(|\)|,|\.|-|\+)
+    )""",
+    re.VERBOSE,
+)
+
+_ESCAPES = {
+    "0": "\0",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+_COMPARISONS: dict[str, Callable[[Any, Any], Any]] = {
+    "=": operator.eq,
+    "<>": operator.ne,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+_TRUE = frozenset(["true", "t", "yes", "y", "on", "1"])
+_FALSE = frozenset(["false", "f", "no", "n", "off", "0"])
+
+
+def _unescape(text: str) -> str:
+    "Decodes the contents of a SQL string literal (without the enclosing quotes)."
+
+    return re.sub(
+        r"''|\\(.)",
+        lambda m: "'" if m.group(1) is None else _ESCAPES.get(m.group(1), m.group(1)),
+        text,
+        flags=re.DOTALL,
+    )
+
+
+def _like(pattern: str, ignore_case: bool) -> re.Pattern[str]:
+    "Translates a LIKE pattern into a regular expression."
+
+    expr = "".join(
+        ".*" if c == "%" else "." if c == "_" else re.escape(c) for c in pattern
+    )
+    return re.compile(expr, re.DOTALL | (re.IGNORECASE if ignore_case else 0))
+
+
+class _Columns:
+    "Resolves column references to accessors on rows."
+
+    __slots__ = ("exact", "folded")
+
+    exact: dict[str, int] | None
+    folded: dict[str, int] | None
+
+    def __init__(self, columns: Sequence[str] | None) -> None:
+        if columns is not None:
+            self.exact = {name: index for index, name in enumerate(columns)}
+            self.folded = {name.upper(): index for index, name in enumerate(columns)}
+        else:
+            self.exact = None
+            self.folded = None
+
+    def getter(self, ref: "_ColumnRef") -> Callable[[Any], Any]:
+        if self.exact is None or self.folded is None:
+            return operator.itemgetter(ref.name)
+
+        for name in (ref.path, ref.name):
+            index = self.exact.get(name)
+            if index is not None:
+                return operator.itemgetter(index)
+        if not ref.quoted:
+            index = self.folded.get(ref.name.upper())
+            if index is not None:
+                return operator.itemgetter(index)
+        raise ValueError(f"column `{ref.path}` is not among the columns of the rows")
+
+
+class _Node(abc.ABC):
+    "An expression that can be compiled into a function over rows, or over columnar arrays."
+
+    __slots__ = ()
+
+    @abc.abstractmethod
+    def row(self, columns: _Columns) -> Callable[[Any], Any]:
+        "Compiles the expression into a function over a single row."
+        ...
+
+    @abc.abstractmethod
+    def mask(self, np: Any) -> Callable[[Mapping[str, Any], int], tuple[Any, Any]]:
+        """
+        Compiles the expression into a function over columnar arrays.
+
+        For an operand, the function returns the values and a NULL indicator. For a predicate, the function returns
+        whether the predicate is true and whether it is false (it is NULL if neither).
+        """
+        ...
+
+
+class _Literal(_Node):
+    __slots__ = ("value",)
+
+    value: Any
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def row(self, columns: _Columns) -> Callable[[Any], Any]:
+        value = self.value
+        return lambda row: value
+
+    def mask(self, np: Any) -> Callable[[Mapping[str, Any], int], tuple[Any, Any]]:
+        value = self.value
+        is_null = value is None
+        return lambda arrays, size: (value, is_null)
+
+
+class _ColumnRef(_Node):
+    __slots__ = ("path", "name", "quoted")
+
+    path: str
+    name: str
+    quoted: bool
+
+    def __init__(self, components: list[tuple[str, bool]]) -> None:
+        self.path = ".".join(text for text, _ in components)
+        self.name, self.quoted = components[-1]
+
+    def row(self, columns: _Columns) -> Callable[[Any], Any]:
+        return columns.getter(self)
+
+    def mask(self, np: Any) -> Callable[[Mapping[str, Any], int], tuple[Any, Any]]:
+        name = self.name
+
+        def evaluate(arrays: Mapping[str, Any], size: int) -> tuple[Any, Any]:
+            values = arrays[name]
+            if isinstance(values, np.ma.MaskedArray):
+                return values.data, np.ma.getmaskarray(values)
+            values = np.asarray(values)
+            kind = values.dtype.kind
+            if kind in "fc":
+                return values, np.isnan(values)
+            elif kind in "mM":
+                return values, np.isnat(values)
+            elif kind == "O":
+                return values, np.frompyfunc(lambda v: v is None, 1, 1)(values).astype(
+                    bool
+                )
+            else:
+                return values, np.zeros(size, dtype=bool)
+
+        return evaluate
+
+
+def _convert(text: str, like: Any) -> Any:
+    "Converts a string to the type of a value it is compared with, as Snowflake converts strings implicitly."
+
+    try:
+        if isinstance(like, bool):
+            word = text.strip().lower()
+            if word in _TRUE:
+                return True
+            elif word in _FALSE:
+                return False
+            raise ValueError(text)
+        elif isinstance(like, (int, float, decimal.Decimal)):
+            return decimal.Decimal(text.strip())
+        elif isinstance(like, datetime.datetime):
+            return datetime.datetime.fromisoformat(text.strip())
+        elif isinstance(like, datetime.date):
+            return datetime.date.fromisoformat(text.strip())
+        elif isinstance(like, datetime.time):
+            return datetime.time.fromisoformat(text.strip())
+    except (ValueError, decimal.InvalidOperation):
+        raise ValueError(
+            f"cannot convert '{text}' to {type(like).__name__} for comparison"
+        ) from None
+    return text
+
+
+def _coerce(lhs: Any, rhs: Any) -> tuple[Any, Any]:
+    "Converts one of two values of different types to the type of the other."
+
+    if isinstance(lhs, str):
+        if not isinstance(rhs, str):
+            lhs = _convert(lhs, rhs)
+    elif isinstance(rhs, str):
+        rhs = _convert(rhs, lhs)
+    elif isinstance(lhs, datetime.date) and isinstance(rhs, datetime.date):
+        # a date compares with a timestamp as midnight of the day
+        if not isinstance(lhs, datetime.datetime):
+            lhs = datetime.datetime.combine(lhs, datetime.time())
+        if not isinstance(rhs, datetime.datetime):
+            rhs = datetime.datetime.combine(rhs, datetime.time())
+    return lhs, rhs
+
+
+def _compare(fn: Callable[[Any, Any], Any], lhs: Any, rhs: Any) -> bool:
+    "Compares two values that are not NULL, converting one of them if their types differ."
+
+    if type(lhs) is not type(rhs):
+        lhs, rhs = _coerce(lhs, rhs)
+    try:
+        return bool(fn(lhs, rhs))
+    except TypeError:
+        raise ValueError(
+            f"cannot compare {type(lhs).__name__} with {type(rhs).__name__}"
+        ) from None
+
+
+def _truth(value: Any) -> bool:
+    "Converts a value that is not NULL to a Boolean, as Snowflake converts strings and numbers implicitly."
+
+    if isinstance(value, str):
+        word = value.strip().lower()
+        if word in _TRUE:
+            return True
+        elif word in _FALSE:
+            return False
+        raise ValueError(f"cannot convert '{value}' to bool")
+    return bool(value)
+
+
+def _scalar(np: Any, value: Any, other: Any) -> Any:
+    "Adapts a Python scalar to the data type of an array it is compared with."
+
+    if not np.ndim(other):
+        return value
+    kind = np.asarray(other).dtype.kind
+    if isinstance(value, str):
+        if kind == "M":
+            try:
+                return np.datetime64(value.strip())
+            except ValueError:
+                raise ValueError(
+                    f"cannot convert '{value}' to datetime64 for comparison"
+                ) from None
+        elif kind == "b":
+            return _convert(value, True)
+        elif kind in "iuf":
+            return float(_convert(value, 0))
+    elif isinstance(value, datetime.date) and kind == "M":
+        return np.datetime64(value)
+    elif isinstance(value, decimal.Decimal) and kind in "iuf":
+        return float(value)
+    return value
+
+
+def _apply(
+    np: Any,
+    fn: Callable[..., Any],
+    operands: list[tuple[Any, Any]],
+    size: int,
+) -> tuple[Any, Any]:
+    "Applies a comparison to the rows in which no operand is NULL, and returns whether it is true and false."
+
+    nulls = np.zeros(size, dtype=bool)
+    for _, is_null in operands:
+        nulls = nulls | is_null
+    known = ~nulls
+    result = np.zeros(size, dtype=bool)
+    if known.any():
+        args = []
+        for index, (values, _) in enumerate(operands):
+            if np.ndim(values):
+                args.append(values[known])
+            else:
+                others = [v for i, (v, _) in enumerate(operands) if i != index]
+                args.append(_scalar(np, values, others[0] if others else None))
+        result[known] = fn(*args)
+    return result & known, ~result & known
+
+
+class _Compare(_Node):
+    __slots__ = ("op", "left", "right")
+
+    op: str
+    left: _Node
+    right: _Node
+
+    def __init__(self, op: str, left: _Node, right: _Node) -> None:
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def row(self, columns: _Columns) -> Callable[[Any], Any]:
+        fn = _COMPARISONS[self.op]
+        left = self.left.row(columns)
+        right = self.right.row(columns)
+
+        def evaluate(row: Any) -> Truth:
+            lhs = left(row)
+            if lhs is None:
+                return None
+            rhs = right(row)
+            if rhs is None:
+                return None
+            return _compare(fn, lhs, rhs)
+
+        return evaluate
+
+    def mask(self, np: Any) -> Callable[[Mapping[str, Any], int], tuple[Any, Any]]:
+        fn = _COMPARISONS[self.op]
+        left = self.left.mask(np)
+        right = self.right.mask(np)
+        elementwise = np.frompyfunc(lambda lhs, rhs: _compare(fn, lhs, rhs), 2, 1)
+
+        def compare(lhs: Any, rhs: Any) -> Any:
+            # values of Python objects (e.g. strings) are compared one by one, and converted as for a single row
+            if np.asarray(lhs).dtype.kind != "O" and np.asarray(rhs).dtype.kind != "O":
+                try:
+                    return fn(lhs, rhs)
+                except TypeError:
+                    pass
+            return elementwise(lhs, rhs).astype(bool)
+
+        return lambda arrays, size: _apply(
+            np, compare, [left(arrays, size), right(arrays, size)], size
+        )
+
+
+class _Between(_Node):
+    __slots__ = ("operand", "low", "high")
+
+    operand: _Node
+    low: _Node
+    high: _Node
+
+    def __init__(self, operand: _Node, low: _Node, high: _Node) -> None:
+        self.operand = operand
+        self.low = low
+        self.high = high
+
+    def _as_conj(self) -> "_Logical":
+        return _Logical(
+            False,
+            [
+                _Compare(">=", self.operand, self.low),
+                _Compare("<=", self.operand, self.high),
+            ],
+        )
+
+    def row(self, columns: _Columns) -> Callable[[Any], Any]:
+        return self._as_conj().row(columns)
+
+    def mask(self, np: Any) -> Callable[[Mapping[str, Any], int], tuple[Any, Any]]:
+        return self._as_conj().mask(np)
+
+
+class _In(_Node):
+    __slots__ = ("operand", "values")
+
+    operand: _Node
+    values: list[Any]
+
+    def __init__(self, operand: _Node, values: list[Any]) -> None:
+        self.operand = operand
+        self.values = values
+
+    def row(self, columns: _Columns) -> Callable[[Any], Any]:
+        operand = self.operand.row(columns)
+        candidates = [v for v in self.values if v is not None]
+        has_null = len(candidates) < len(self.values)
+
+        def evaluate(row: Any) -> Truth:
+            value = operand(row)
+            if value is None:
+                return None
+            if value in candidates:
+                return True
+            # values of another type are converted as in a comparison with `=`
+            if any(
+                _compare(operator.eq, value, v)
+                for v in candidates
+                if type(v) is not type(value)
+            ):
+                return True
+            return None if has_null else False
+
+        return evaluate
+
+    def mask(self, np: Any) -> Callable[[Mapping[str, Any], int], tuple[Any, Any]]:
+        operand = self.operand.mask(np)
+        candidates = [v for v in self.values if v is not None]
+        has_null = len(candidates) < len(self.values)
+        equal = np.frompyfunc(
+            lambda value: any(_compare(operator.eq, value, v) for v in candidates), 1, 1
+        )
+
+        def contains(values: Any) -> Any:
+            # values of Python objects, or strings in a list of other values, are compared one by one, and converted
+            # as for a single row
+            values = np.asarray(values)
+            kind = values.dtype.kind
+            if kind == "O" or (
+                kind in "US" and any(not isinstance(v, str) for v in candidates)
+            ):
+                return np.asarray(equal(values), dtype=bool)
+            converted = [_scalar(np, v, values) for v in candidates]
+            return np.isin(values, converted)
+
+        def evaluate(arrays: Mapping[str, Any], size: int) -> tuple[Any, Any]:
+            true, false = _apply(np, contains, [operand(arrays, size)], size)
+            if has_null:
+                false = np.zeros(size, dtype=bool)
+            return true, false
+
+        return evaluate
+
+
+class _Like(_Node):
+    __slots__ = ("operand", "pattern")
+
+    operand: _Node
+    pattern: re.Pattern[str]
+
+    def __init__(self, operand: _Node, pattern: re.Pattern[str]) -> None:
+        self.operand = operand
+        self.pattern = pattern
+
+    def row(self, columns: _Columns) -> Callable[[Any], Any]:
+        operand = self.operand.row(columns)
+        match = self.pattern.fullmatch
+
+        def evaluate(row: Any) -> Truth:
+            value = operand(row)
+            if value is None:
+                return None
+            return match(value) is not None
+
+        return evaluate
+
+    def mask(self, np: Any) -> Callable[[Mapping[str, Any], int], tuple[Any, Any]]:
+        operand = self.operand.mask(np)
+        match = np.frompyfunc(lambda v: self.pattern.fullmatch(v) is not None, 1, 1)
+        return lambda arrays, size: _apply(
+            np, lambda v: match(v).astype(bool), [operand(arrays, size)], size
+        )
+
+
+class _IsNull(_Node):
+    __slots__ = ("operand",)
+
+    operand: _Node
+
+    def __init__(self, operand: _Node) -> None:
+        self.operand = operand
+
+    def row(self, columns: _Columns) -> Callable[[Any], Any]:
+        operand = self.operand.row(columns)
+        return lambda row: operand(row) is None
+
+    def mask(self, np: Any) -> Callable[[Mapping[str, Any], int], tuple[Any, Any]]:
+        operand = self.operand.mask(np)
+
+        def evaluate(arrays: Mapping[str, Any], size: int) -> tuple[Any, Any]:
+            _, is_null = operand(arrays, size)
+            nulls = np.broadcast_to(is_null, (size,))
+            return nulls, ~nulls
+
+        return evaluate
+
+
+class _Truth(_Node):
+    "A Boolean operand used as a predicate."
+
+    __slots__ = ("operand",)
+
+    operand: _Node
+
+    def __init__(self, operand: _Node) -> None:
+        self.operand = operand
+
+    def row(self, columns: _Columns) -> Callable[[Any], Any]:
+        operand = self.operand.row(columns)
+        return lambda row: None if (value := operand(row)) is None else _truth(value)
+
+    def mask(self, np: Any) -> Callable[[Mapping[str, Any], int], tuple[Any, Any]]:
+        operand = self.operand.mask(np)
+        elementwise = np.frompyfunc(_truth, 1, 1)
+
+        def truth(values: Any) -> Any:
+            # strings are converted one by one, as for a single row
+            if np.asarray(values).dtype.kind in "OUS":
+                return np.asarray(elementwise(values), dtype=bool)
+            return np.asarray(values, dtype=bool)
+
+        return lambda arrays, size: _apply(np, truth, [operand(arrays, size)], size)
+
+
+class _Not(_Node):
+    __slots__ = ("operand",)
+
+    operand: _Node
+
+    def __init__(self, operand: _Node) -> None:
+        self.operand = operand
+
+    def row(self, columns: _Columns) -> Callable[[Any], Any]:
+        operand = self.operand.row(columns)
+        return lambda row: None if (value := operand(row)) is None else not value
+
+    def mask(self, np: Any) -> Callable[[Mapping[str, Any], int], tuple[Any, Any]]:
+        operand = self.operand.mask(np)
+
+        def evaluate(arrays: Mapping[str, Any], size: int) -> tuple[Any, Any]:
+            true, false = operand(arrays, size)
+            return false, true
+
+        return evaluate
+
+
+class _Logical(_Node):
+    "A conjunction or disjunction of predicates."
+
+    __slots__ = ("disjunction", "operands")
+
+    disjunction: bool
+    operands: list[_Node]
+
+    def __init__(self, disjunction: bool, operands: list[_Node]) -> None:
+        self.disjunction = disjunction
+        self.operands = operands
+
+    def row(self, columns: _Columns) -> Callable[[Any], Any]:
+        operands = [op.row(columns) for op in self.operands]
+
+        # a conjunction stops at the first false operand, a disjunction at the first true operand
+        decisive = self.disjunction
+
+        def evaluate(row: Any) -> Truth:
+            result: Truth = not decisive
+            for op in operands:
+                value = op(row)
+                if value is None:
+                    result = None
+                elif value is decisive:
+                    return decisive
+            return result
+
+        return evaluate
+
+    def mask(self, np: Any) -> Callable[[Mapping[str, Any], int], tuple[Any, Any]]:
+        operands = [op.mask(np) for op in self.operands]
+        disjunction = self.disjunction
+
+        def evaluate(arrays: Mapping[str, Any], size: int) -> tuple[Any, Any]:
+            true, false = operands[0](arrays, size)
+            for op in operands[1:]:
+                op_true, op_false = op(arrays, size)
+                if disjunction:
+                    true, false = true | op_true, false & op_false
+                else:
+                    true, false = true & op_true, false | op_false
+            return true, false
+
+        return evaluate
+
+
+class _Parser:
+    "Parses the SQL text of an elementary predicate into an expression that can be evaluated locally."
+
+    __slots__ = ("text", "tokens", "position")
+
+    text: str
+    tokens: list[tuple[str, str]]
+    position: int
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            m = _TOKEN.match(text, position)
+            if m is None or m.lastgroup is None:
+                raise self.error()
+            self.tokens.append((m.lastgroup, m.group(m.lastgroup)))
+            position = m.end()
+        self.position = 0
+
+    def error(self) -> ValueError:
+        return ValueError(f"cannot evaluate predicate locally: {self.text}")
+
+    def peek(self, offset: int = 0) -> tuple[str, str] | None:
+        position = self.position + offset
+        return self.tokens[position] if position < len(self.tokens) else None
+
+    def keyword(self, *words: str, offset: int = 0) -> bool:
+        token = self.peek(offset)
+        return token is not None and token[0] == "name" and token[1].upper() in words
+
+    def symbol(self, *symbols: str) -> bool:
+        token = self.peek()
+        return token is not None and token[0] == "symbol" and token[1] in symbols
+
+    def next(self) -> tuple[str, str]:
+        token = self.peek()
+        if token is None:
+            raise self.error()
+        self.position += 1
+        return token
+
+    def expect(self, kind: str, *values: str) -> str:
+        token_kind, text = self.next()
+        if token_kind != kind or (values and text.upper() not in values):
+            raise self.error()
+        return text
+
+    def parse(self) -> _Node:
+        node = self.predicate()
+        if self.peek() is not None:
+            raise self.error()
+        return node
+
+    def predicate(self) -> _Node:
+        node: _Node
+        if self.keyword("NOT"):
+            self.next()
+            return _Not(self.predicate())
+        if self.symbol("("):
+            self.next()
+            node = self.predicate()
+            self.expect("symbol", ")")
+            return node
+
+        operand = self.operand()
+        negated = False
+        if self.keyword("IS"):
+            self.next()
+            if self.keyword("NOT"):
+                self.next()
+                negated = True
+            self.expect("name", "NULL")
+            node = _IsNull(operand)
+            return _Not(node) if negated else node
+
+        if self.keyword("NOT") and self.keyword(
+            "IN", "BETWEEN", "LIKE", "ILIKE", offset=1
+        ):
+            self.next()
+            negated = True
+
+        if self.keyword("IN"):
+            self.next()
+            self.expect("symbol", "(")
+            values = [self.literal()]
+            while self.symbol(","):
+                self.next()
+                values.append(self.literal())
+            self.expect("symbol", ")")
+            node = _In(operand, values)
+        elif self.keyword("BETWEEN"):
+            self.next()
+            low = self.operand()
+            self.expect("name", "AND")
+            high = self.operand()
+            node = _Between(operand, low, high)
+        elif self.keyword("LIKE", "ILIKE"):
+            ignore_case = self.next()[1].upper() == "ILIKE"
+            pattern = self.literal()
+            if not isinstance(pattern, str):
+                raise self.error()
+            node = _Like(operand, _like(pattern, ignore_case))
+        elif self.symbol(*_COMPARISONS):
+            op = self.next()[1]
+            node = _Compare(op, operand, self.operand())
+        elif negated:
+            raise self.error()
+        else:
+            return _Truth(operand)
+
+        return _Not(node) if negated else node
+
+    def operand(self) -> _Node:
+        token = self.peek()
+        if token is not None and token[0] in ("name", "quoted"):
+            word = token[1].upper() if token[0] == "name" else None
+            if word not in ("TRUE", "FALSE", "NULL", "DATE", "TIME") and not (
+                word is not None and word.startswith("TIMESTAMP")
+            ):
+                return self.column()
+        return _Literal(self.literal())
+
+    def column(self) -> _ColumnRef:
+        components = [self.identifier()]
+        while self.symbol("."):
+            self.next()
+            components.append(self.identifier())
+        return _ColumnRef(components)
+
+    def identifier(self) -> tuple[str, bool]:
+        kind, text = self.next()
+        if kind == "name":
+            return text, False
+        elif kind == "quoted":
+            return text[1:-1].replace('""', '"'), True
+        else:
+            raise self.error()
+
+    def literal(self) -> Any:
+        sign = ""
+        if self.symbol("-", "+"):
+            sign = self.next()[1]
+        kind, text = self.next()
+        if kind == "number":
+            text = sign + text
+            if re.fullmatch(r"[+-]?\d+", text):
+                return int(text)
+            elif "e" in text or "E" in text:
+                return float(text)
+            else:
+                return decimal.Decimal(text)
+        elif sign:
+            raise self.error()
+        elif kind == "string":
+            return _unescape(text[1:-1])
+        elif kind == "name":
+            word = text.upper()
+            if word == "TRUE":
+                return True
+            elif word == "FALSE":
+                return False
+            elif word == "NULL":
+                return None
+            value = _unescape(self.expect("string")[1:-1])
+            try:
+                if word == "DATE":
+                    return datetime.date.fromisoformat(value)
+                elif word == "TIME":
+                    return datetime.time.fromisoformat(value)
+                elif word.startswith("TIMESTAMP"):
+                    return datetime.datetime.fromisoformat(value)
+            except ValueError:
+                raise self.error() from None
+        raise self.error()
+
+
+def _compile(expr: BoolExpr) -> _Node:
+    if isinstance(expr, ConjExpr):
+        return _Logical(False, [_compile(op) for op in expr.operands])
+    elif isinstance(expr, DisjExpr):
+        return _Logical(True, [_compile(op) for op in expr.operands])
+    elif isinstance(expr, ReturnsBool):
+        return _Parser(expr.expr).parse()
+    else:
+        raise ValueError(f"cannot evaluate predicate locally: {expr}")
+
+
+def compile_predicate(
+    expr: BoolExpr, columns: Sequence[str] | None = None
+) -> RowPredicate:
+    """
+    Compiles a Boolean expression into a function that evaluates it over a single row, in Python.
+
+    Elementary predicates may compare a column with a literal or another column (`=`, `<>`, `!=`, `<`, `<=`, `>`,
+    `>=`), or test a column with `IS [NOT] NULL`, `[NOT] IN (...)`, `[NOT] BETWEEN ... AND ...` or `[NOT] [I]LIKE`,
+    optionally negated with `NOT`. Literals may be numbers, strings, `TRUE`, `FALSE`, `NULL`, and typed `DATE`,
+    `TIME` and `TIMESTAMP` literals, which compare with `datetime` objects. `None` values in a row represent NULL.
+    When a string is compared with a number, a Boolean or a date and time value, the string is converted to the
+    type of the other value, as in Snowflake.
+
+    :param expr: The expression to compile.
+    :param columns: Names of the values in each row if rows are tuples, or `None` if rows are mappings keyed by
+        column name. A qualified column reference (e.g. `o.id`) is looked up by its name (e.g. `id`).
+    :returns: A function that returns `True`, `False` or `None` (for NULL) for a row. The function raises
+        `ValueError` when a string cannot be converted for a comparison, or values of incompatible types are compared.
+    :raises ValueError: Raised when the expression uses SQL that cannot be evaluated locally.
+    """
+
+    return _compile(expr).row(_Columns(columns))
+
+
+def filter_rows(
+    expr: BoolExpr, rows: Iterable[R], columns: Sequence[str] | None = None
+) -> Iterator[R]:
+    """
+    Yields the rows for which a Boolean expression is true, as a WHERE clause would.
+
+    :param expr: The filter condition.
+    :param rows: Rows as tuples or mappings.
+    :param columns: Names of the values in each row if rows are tuples, or `None` if rows are mappings.
+    """
+
+    predicate = compile_predicate(expr, columns)
+    for row in rows:
+        if predicate(row):
+            yield row
+
+
+def compile_mask(expr: BoolExpr) -> MaskPredicate:
+    """
+    Compiles a Boolean expression into a vectorized function that evaluates it over columnar NumPy arrays.
+
+    The same predicates are supported as in `compile_predicate`. NULL values are represented by the mask of a masked
+    array, `None` in an object array, `NaN` in a floating-point array, or `NaT` in a date and time array.
+
+    :param expr: The expression to compile.
+    :returns: A function that takes a mapping from column name to an array of values (all of the same length), and
+        returns a Boolean mask that is true where the expression is true (and false where it is false or NULL).
+    :raises ValueError: Raised when the expression uses SQL that cannot be evaluated locally.
+    """
+
+    import numpy as np
+
+    evaluate = _compile(expr).mask(np)
+
+    def mask(arrays: Mapping[str, "np.ndarray"]) -> "np.ndarray":
+        size = len(next(iter(arrays.values()))) if arrays else 1
+        true, _ = evaluate(arrays, size)
+        return np.broadcast_to(true, (size,)).copy()
+
+    return mask
@@ -0,0 +1,356 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import contextlib
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, Literal, Protocol, Sequence
+
+from .indentation import Printable, utf8_len
+from .table import Table
+
+
+class Cursor(Protocol):
+    "A DB-API 2.0 cursor."
+
+    @property
+    def description(self) -> Any: ...
+
+    @property
+    def rowcount(self) -> int: ...
+
+    def execute(self, operation: str, parameters: Any = ..., /) -> object: ...
+
+    def executemany(self, operation: str, seq_of_parameters: Any, /) -> object: ...
+
+    def fetchall(self) -> list[Any]: ...
+
+    def close(self) -> object: ...
+
+
+class Connection(Protocol):
+    "A DB-API 2.0 connection."
+
+    def cursor(self) -> Cursor: ...
+
+    def commit(self) -> object: ...
+
+    def rollback(self) -> object: ...
+
+    def close(self) -> object: ...
+
+
+ParamStyle = Literal["qmark", "numeric", "format"]
+
+
+class ConnectionPool:
+    """
+    A bounded pool of DB-API 2.0 connections.
+
+    Connections are created on demand with the factory function, up to the maximum size of the pool, and are re-used
+    once released. A caller that requests a connection while all connections are in use waits until one is released.
+    """
+
+    __slots__ = ("factory", "max_size", "idle", "slots", "lock", "closed")
+
+    factory: Callable[[], Connection]
+    max_size: int
+    idle: "queue.LifoQueue[Connection]"
+    slots: threading.BoundedSemaphore
+    lock: threading.Lock
+    closed: bool
+
+    def __init__(self, factory: Callable[[], Connection], *, max_size: int = 8) -> None:
+        if max_size < 1:
+            raise ValueError("pool size must be positive")
+        self.factory = factory
+        self.max_size = max_size
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(max_size)
+        self.lock = threading.Lock()
+        self.closed = False
+
+    @contextlib.contextmanager
+    def connection(self, *, timeout: float | None = None) -> Iterator[Connection]:
+        """
+        Borrows a connection from the pool.
+
+        The transaction is committed when the block exits normally, and rolled back when it raises an exception. If
+        the commit or the rollback fails, the connection is closed instead of being returned to the pool.
+
+        :param timeout: Seconds to wait for a connection to become available, or `None` to wait indefinitely.
+        :raises TimeoutError: Raised when no connection becomes available within the timeout.
+        """
+
+        if self.closed:
+            raise RuntimeError("connection pool is closed")
+        if not self.slots.acquire(timeout=timeout):
+            raise TimeoutError("no connection available in pool")
+        try:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                conn = self.factory()
+            reusable = False
+            try:
+                try:
+                    yield conn
+                except BaseException:
+                    conn.rollback()
+                    reusable = True
+                    raise
+                conn.commit()
+                reusable = True
+            finally:
+                if reusable:
+                    self._release(conn)
+                else:
+                    self._discard(conn)
+        finally:
+            self.slots.release()
+
+    def _release(self, conn: Connection) -> None:
+        with self.lock:
+            if self.closed:
+                conn.close()
+            else:
+                self.idle.put(conn)
+
+    def _discard(self, conn: Connection) -> None:
+        "Closes a connection whose state is unknown, e.g. after a failed commit."
+
+        with contextlib.suppress(Exception):
+            conn.close()
+
+    def close(self) -> None:
+        "Closes all idle connections, and rejects further requests for connections."
+
+        with self.lock:
+            self.closed = True
+            while True:
+                try:
+                    conn = self.idle.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+class StatementMetrics:
+    "Measurements collected while executing a single statement."
+
+    __slots__ = ("statement", "rows", "elapsed")
+
+    statement: str
+    rows: int
+    elapsed: float
+
+    def __init__(self, statement: str, rows: int, elapsed: float) -> None:
+        self.statement = statement
+        self.rows = rows
+        self.elapsed = elapsed
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class Metrics:
+    "Measurements aggregated across all statements executed through a database."
+
+    __slots__ = ("statements", "rows", "elapsed", "lock")
+
+    statements: int
+    rows: int
+    elapsed: float
+    lock: threading.Lock
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.rows = 0
+        self.elapsed = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, metrics: StatementMetrics) -> None:
+        with self.lock:
+            self.statements += 1
+            self.rows += metrics.rows
+            self.elapsed += metrics.elapsed
+
+    @property
+    def mean_latency(self) -> float:
+        "Average time in seconds spent executing a statement."
+
+        return self.elapsed / self.statements if self.statements > 0 else 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def _placeholders(count: int, paramstyle: ParamStyle) -> str:
+    if paramstyle == "qmark":
+        return ", ".join("?" for _ in range(count))
+    elif paramstyle == "numeric":
+        return ", ".join(f":{i + 1}" for i in range(count))
+    elif paramstyle == "format":
+        return ", ".join("%s" for _ in range(count))
+    else:
+        raise ValueError(f"unsupported parameter style: {paramstyle}")
+
+
+def _row_size(row: Sequence[Any]) -> int:
+    "Estimates the number of bytes a row occupies when sent to the database."
+
+    return sum(
+        (
+            len(value)
+            if isinstance(value, (bytes, bytearray))
+            else utf8_len(value) if isinstance(value, str) else 8
+        )
+        for value in row
+    )
+
+
+class Database:
+    """
+    Executes statements over connections borrowed from a pool.
+
+    Statements are sent in wire format, i.e. the tightest single-line representation.
+    """
+
+    __slots__ = ("pool", "paramstyle", "metrics", "listener")
+
+    pool: ConnectionPool
+    paramstyle: ParamStyle
+    metrics: Metrics
+    listener: Callable[[StatementMetrics], None] | None
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        *,
+        paramstyle: ParamStyle = "qmark",
+        listener: Callable[[StatementMetrics], None] | None = None,
+    ) -> None:
+        """
+        :param pool: A pool of connections to the database.
+        :param paramstyle: The placeholder syntax the DB-API driver expects (see PEP 249).
+        :param listener: A function invoked with the measurements for each statement executed.
+        """
+
+        self.pool = pool
+        self.paramstyle = paramstyle
+        self.metrics = Metrics()
+        self.listener = listener
+
+    def _record(self, statement: str, rows: int, elapsed: float) -> None:
+        metrics = StatementMetrics(statement, rows, elapsed)
+        self.metrics.add(metrics)
+        if self.listener is not None:
+            self.listener(metrics)
+
+    def execute(self, statement: Printable | str, params: Any = None) -> list[Any]:
+        """
+        Executes a statement, and fetches the rows it returns.
+
+        :param statement: A query or other expression tree, or SQL text.
+        :param params: Parameters to bind to placeholders in the statement.
+        :returns: The rows of the result set, or an empty list if the statement returns no result set.
+        """
+
+        if isinstance(statement, Printable):
+            sql = statement.wire()
+        else:
+            sql = statement
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                start = time.perf_counter()
+                if params is not None:
+                    cursor.execute(sql, params)
+                else:
+                    cursor.execute(sql)
+                if cursor.description is not None:
+                    rows = cursor.fetchall()
+                    count = len(rows)
+                else:
+                    rows = []
+                    count = max(cursor.rowcount, 0)
+                elapsed = time.perf_counter() - start
+            finally:
+                cursor.close()
+
+        self._record(sql, count, elapsed)
+        return rows
+
+    def executemany(
+        self,
+        table: Table,
+        rows: Iterable[Sequence[Any]],
+        *,
+        batch_rows: int = 10000,
+        batch_bytes: int = 16 * 1024 * 1024,
+    ) -> int:
+        """
+        Inserts rows into a table in batches.
+
+        Each batch is sent with a single call to `executemany`, and committed separately.
+
+        :param table: The table to insert into. Values in each row are in the order of the table columns.
+        :param rows: An iterable of rows, which is consumed lazily.
+        :param batch_rows: Maximum number of rows in a batch.
+        :param batch_bytes: Maximum (estimated) number of bytes of data in a batch. A row larger than this is sent in
+            a batch of its own.
+        :returns: The number of rows inserted.
+        """
+
+        columns = ", ".join(str(c.name) for c in table.columns)
+        values = _placeholders(len(table.columns), self.paramstyle)
+        sql = f"INSERT INTO {table.name} ({columns}) VALUES ({values})"
+
+        total = 0
+        batch: list[Sequence[Any]] = []
+        size = 0
+        for row in rows:
+            if len(row) != len(table.columns):
+                raise ValueError(
+                    f"expected: {len(table.columns)} values in row; got: {len(row)}"
+                )
+            row_size = _row_size(row)
+            if batch and size + row_size > batch_bytes:
+                total += self._insert(sql, batch)
+                batch = []
+                size = 0
+            batch.append(row)
+            size += row_size
+            if len(batch) >= batch_rows:
+                total += self._insert(sql, batch)
+                batch = []
+                size = 0
+        if batch:
+            total += self._insert(sql, batch)
+        return total
+
+    def _insert(self, sql: str, batch: list[Sequence[Any]]) -> int:
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                start = time.perf_counter()
+                cursor.executemany(sql, batch)
+                elapsed = time.perf_counter() - start
+            finally:
+                cursor.close()
+
+        self._record(sql, len(batch), elapsed)
+        return len(batch)
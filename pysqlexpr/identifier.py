@@ -6,9 +6,11 @@ pysqlexpr: Expressive SQL for Python
 
 from typing import ClassVar, final
 
+from .immutable import Immutable
+
 
 @final
-class Identifier:
+class Identifier(Immutable):
     """
     An identifier in a Snowflake SQL expression.
 
@@ -22,13 +24,13 @@ class Identifier:
 
     __slots__ = ("identifier", "path")
 
-    keywords: ClassVar[list[str]]
+    keywords: ClassVar[frozenset[str]]
     identifier: str
     path: str | None
 
     def __init__(self, identifier: str, *, path: str | None = None):
-        self.identifier = identifier
-        self.path = path
+        object.__setattr__(self, "identifier", identifier)
+        object.__setattr__(self, "path", path)
 
     def __eq__(self, op: object) -> bool:
         return (
@@ -63,12 +65,12 @@ class Identifier:
 
 
 # fmt: off
-Identifier.keywords = [
+Identifier.keywords = frozenset([
     "ALL", "ALTER", "AND", "ANY", "AS", "BETWEEN", "BY", "CASE", "CAST", "CHECK", "COLUMN", "CONNECT", "CONSTRAINT",
     "CREATE", "CROSS", "CURRENT", "DELETE", "DISTINCT", "DROP", "ELSE", "EXISTS", "FALSE", "FOLLOWING", "FOR", "FROM",
     "FULL", "GRANT", "GROUP", "HAVING", "ILIKE", "IN", "INCREMENT", "INNER", "INSERT", "INTERSECT", "INTO", "IS",
     "JOIN", "LATERAL", "LEFT", "LIKE", "LOCALTIME", "LOCALTIMESTAMP", "MINUS", "NATURAL", "NOT", "NULL", "OF", "ON",
     "OR", "ORDER", "QUALIFY", "REGEXP", "REVOKE", "RIGHT", "RLIKE", "ROW", "ROWS", "SAMPLE", "SELECT", "SET", "SOME",
     "START", "TABLE", "TABLESAMPLE", "THEN", "TO", "TRIGGER", "TRUE", "UNION", "UNIQUE", "UPDATE", "USING", "VALUES",
-    "WHEN", "WHENEVER", "WHERE", "WITH"]
+    "WHEN", "WHENEVER", "WHERE", "WITH"])
 # fmt: on
@@ -0,0 +1,37 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+from typing import Any
+
+
+class Immutable:
+    """
+    Base class of objects whose attributes cannot be changed after construction.
+
+    Assigning or deleting an attribute raises an error. Constructors (and methods that build a new object with
+    `object.__new__`) initialize slots with `object.__setattr__`, the same way frozen data classes do. Because objects
+    never change once they are constructed, they may be shared across threads without locking, including on
+    free-threaded builds of Python.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(
+            f"cannot assign to attribute '{name}' of immutable {type(self).__name__}"
+        )
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(
+            f"cannot delete attribute '{name}' of immutable {type(self).__name__}"
+        )
+
+    def __setstate__(self, state: tuple[None, dict[str, Any]]) -> None:
+        "Restores the slots of an object when it is unpickled or copied."
+
+        _, slots = state
+        for name, value in slots.items():
+            object.__setattr__(self, name, value)
@@ -5,7 +5,11 @@ pysqlexpr: Expressive SQL for Python
 """
 
 import abc
+import functools
 import textwrap
+from typing import Callable, Literal, TypeVar
+
+from .immutable import Immutable
 
 _MAX_LEN = 120
 _PREFIX = "    "
@@ -17,8 +21,44 @@ def indent(text: str) -> str:
     return textwrap.indent(text, _PREFIX)
 
 
-class Printable:
-    __slots__ = ()
+P = TypeVar("P", bound="Printable")
+R = TypeVar("R")
+
+
+def utf8_len(text: str) -> int:
+    "Returns the number of bytes in the UTF-8 encoding of the text."
+
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def memoized(fn: Callable[[P], R]) -> Callable[[P], R]:
+    """
+    Caches the result of a rendering method in the slot `_<name>` of the object.
+
+    Nodes are immutable once constructed. Deriving a new node (e.g. with `Query.with_where`) shares the unchanged
+    sub-trees, whose cached output is re-used when the new node is rendered.
+
+    The cache needs no lock. If several threads render the same node at the same time, each may compute the result,
+    but they all compute an equal immutable value, and storing it is a single atomic write to a slot (with or without
+    the global interpreter lock), so a reader sees either no value or a complete one.
+    """
+
+    attr = f"_{fn.__name__}"
+
+    @functools.wraps(fn)
+    def _memoized(self: P) -> R:
+        try:
+            return getattr(self, attr)
+        except AttributeError:
+            value = fn(self)
+            object.__setattr__(self, attr, value)
+            return value
+
+    return _memoized
+
+
+class Printable(Immutable):
+    __slots__ = ("_packed", "_spacious", "_wire", "_packed_size")
 
     @abc.abstractmethod
     def packed(self) -> str:
@@ -30,6 +70,24 @@ class Printable:
         "Produces an expanded multi-line representation of the object."
         ...
 
+    def wire(self) -> str:
+        """
+        Produces the tightest single-line representation of the object, without redundant whitespace or parentheses.
+
+        This representation is meant for transmitting a statement to the database rather than for human consumption.
+        """
+
+        return self.packed()
+
+    def packed_size(self) -> int:
+        """
+        Computes the size of the compact single-line representation in UTF-8 bytes.
+
+        Composite nodes derive their size from the (cached) size of their parts without building the output text.
+        """
+
+        return utf8_len(self.packed())
+
     def display(self) -> tuple[bool, str]:
         """
         Chooses an optimal representation of the object.
@@ -46,3 +104,28 @@ class Printable:
     def __str__(self) -> str:
         _, text = self.display()
         return text
+
+
+Style = Literal["display", "packed", "spacious", "wire"]
+
+
+def render(node: Printable, *, style: Style = "display") -> str:
+    """
+    Produces a string representation of an object in the given style.
+
+    :param node: The object to render.
+    :param style: `display` to choose between `packed` and `spacious` based on output length (same as `str()`),
+        `packed` for a compact single-line representation, `spacious` for an expanded multi-line representation,
+        or `wire` for the tightest single-line representation.
+    """
+
+    if style == "display":
+        return str(node)
+    elif style == "packed":
+        return node.packed()
+    elif style == "spacious":
+        return node.spacious()
+    elif style == "wire":
+        return node.wire()
+    else:
+        raise ValueError(f"unrecognized rendering style: {style}")
@@ -0,0 +1,451 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import itertools
+import re
+from typing import Iterable, Mapping
+
+from ._patterns import EQUALITY, IDENTIFIER, STRING_LITERAL
+from .boolean import BoolExpr, ConjExpr, ReturnsBool
+from .query import FromExpr, Join, JoinExpr, Query, SourceExpr
+from .table import Statistics, Table
+
+# Inner joins are commutative and associative, so a tree of inner joins may be evaluated in any order as long as each
+# predicate of a join condition is applied once all the sources it references have been joined. Outer and lateral
+# joins are not; they are treated as opaque sources, and only the inner joins within their operands are re-arranged.
+#
+# The cost of an order is the sum of the estimated number of rows of each intermediate result (C_out). The estimated
+# number of rows of a set of sources is the product of their row counts and the selectivity of each predicate that
+# references only sources in the set.
+
+_QUALIFIER = re.compile(rf"(?<![\w$.])({IDENTIFIER})\s*\.")
+_COLUMN = re.compile(rf"\s*({IDENTIFIER})\s*\.\s*({IDENTIFIER})\s*")
+
+DEFAULT_SELECTIVITY = 1 / 3
+"Selectivity of a predicate whose selectivity cannot be derived from statistics (e.g. a range or opaque predicate)."
+
+
+class JoinCost:
+    "The estimated cost of evaluating a tree of inner joins in a given order."
+
+    __slots__ = ("order", "rows", "cost")
+
+    order: list[str]
+    rows: list[float]
+    cost: float
+
+    def __init__(self, order: list[str], rows: list[float], cost: float) -> None:
+        """
+        :param order: The sources in the order they are joined, in compact SQL representation.
+        :param rows: The estimated number of rows after each source is joined.
+        :param cost: The sum of the estimated number of rows of each intermediate (and the final) join result.
+        """
+
+        self.order = order
+        self.rows = rows
+        self.cost = cost
+
+
+class JoinOrderResult:
+    "The outcome of re-arranging the inner joins of a query."
+
+    __slots__ = ("query", "before", "after")
+
+    query: Query
+    before: list[JoinCost]
+    after: list[JoinCost]
+
+    def __init__(
+        self, query: Query, before: list[JoinCost], after: list[JoinCost]
+    ) -> None:
+        """
+        :param query: The query with inner joins re-arranged.
+        :param before: The estimated cost of each tree of inner joins in the original query.
+        :param after: The estimated cost of each tree of inner joins in the optimized query, in the same order.
+        """
+
+        self.query = query
+        self.before = before
+        self.after = after
+
+    @property
+    def cost_before(self) -> float:
+        return sum(c.cost for c in self.before)
+
+    @property
+    def cost_after(self) -> float:
+        return sum(c.cost for c in self.after)
+
+
+class _Relation:
+    "A source that takes part in a tree of inner joins."
+
+    __slots__ = ("source", "aliases", "rows", "statistics")
+
+    source: SourceExpr
+    aliases: frozenset[str]
+    rows: float | None
+    statistics: Statistics | None
+
+    def __init__(self, source: SourceExpr, tables: dict[str, Table]) -> None:
+        self.source = source
+        self.aliases = frozenset(
+            s.alias.upper() for s in source.sources() if s.alias is not None
+        )
+        self.statistics = None
+        if isinstance(source, FromExpr):
+            if source.statistics is not None:
+                self.statistics = source.statistics
+            elif isinstance(source.expr, str):
+                table = tables.get(source.expr.split(".")[-1].upper())
+                if table is not None:
+                    self.statistics = table.statistics
+        self.rows = (
+            float(self.statistics.row_count) if self.statistics is not None else None
+        )
+
+    def distinct_values(self, column: str) -> float:
+        "Estimates the number of distinct values in a column, assuming a unique column if there are no statistics."
+
+        assert self.rows is not None
+        if self.statistics is not None:
+            count = self.statistics.get_distinct_values(column)
+            if count is not None:
+                return float(min(count, self.rows))
+        return self.rows
+
+
+class _Predicate:
+    "A conjunct of a join condition, with the set of relations it references."
+
+    __slots__ = ("expr", "relations", "selectivity")
+
+    expr: BoolExpr
+    relations: int
+    selectivity: float
+
+    def __init__(self, expr: BoolExpr, relations: int, selectivity: float) -> None:
+        self.expr = expr
+        self.relations = relations
+        self.selectivity = selectivity
+
+
+class _Graph:
+    "A tree of inner joins flattened into a set of relations and a set of predicates."
+
+    __slots__ = ("relations", "predicates", "all")
+
+    relations: list[_Relation]
+    predicates: list[_Predicate]
+    all: int
+
+    def __init__(self, relations: list[_Relation], conditions: list[BoolExpr]) -> None:
+        self.relations = relations
+        self.all = (1 << len(relations)) - 1
+        self.predicates = [self._predicate(expr) for expr in conditions]
+
+    def _find(self, alias: str) -> int | None:
+        for index, relation in enumerate(self.relations):
+            if alias.upper() in relation.aliases:
+                return index
+        return None
+
+    def _predicate(self, expr: BoolExpr) -> _Predicate:
+        text = STRING_LITERAL.sub("''", expr.packed())
+        relations = 0
+        for m in _QUALIFIER.finditer(text):
+            index = self._find(m.group(1))
+            if index is not None:
+                relations |= 1 << index
+        if relations == 0:
+            # references cannot be attributed to sources, apply once all sources are joined
+            return _Predicate(expr, self.all, 1.0)
+        return _Predicate(expr, relations, self._selectivity(expr))
+
+    def _distinct_values(self, column: str) -> float | None:
+        "Estimates the number of distinct values of a qualified column, or returns `None` if not a column reference."
+
+        m = _COLUMN.fullmatch(column)
+        if m is None:
+            return None
+        index = self._find(m.group(1))
+        if index is None:
+            return None
+        return self.relations[index].distinct_values(m.group(2))
+
+    def _selectivity(self, expr: BoolExpr) -> float:
+        if not isinstance(expr, ReturnsBool):
+            return DEFAULT_SELECTIVITY
+        m = EQUALITY.fullmatch(STRING_LITERAL.sub("''", expr.expr))
+        if m is None:
+            return DEFAULT_SELECTIVITY
+        lhs = self._distinct_values(m.group("lhs"))
+        rhs = self._distinct_values(m.group("rhs"))
+        if lhs is not None and rhs is not None:
+            return 1 / max(lhs, rhs, 1.0)  # equi-join
+        elif lhs is not None:
+            return 1 / max(lhs, 1.0)  # comparison with a constant
+        elif rhs is not None:
+            return 1 / max(rhs, 1.0)
+        else:
+            return DEFAULT_SELECTIVITY
+
+    def rows(self, subset: int) -> float:
+        "Estimates the number of rows in the join of a subset of relations."
+
+        rows = 1.0
+        for index, relation in enumerate(self.relations):
+            if subset & (1 << index):
+                assert relation.rows is not None
+                rows *= relation.rows
+        for predicate in self.predicates:
+            if predicate.relations & subset == predicate.relations:
+                rows *= predicate.selectivity
+        return rows
+
+    def is_connected(self, subset: int, index: int) -> bool:
+        "True if a predicate links the relation to any relation in the subset."
+
+        bit = 1 << index
+        return any(
+            p.relations & bit and p.relations & subset and p.relations != self.all
+            for p in self.predicates
+        )
+
+    def cost(self, order: list[int]) -> JoinCost:
+        subset = 0
+        rows: list[float] = []
+        for index in order:
+            subset |= 1 << index
+            rows.append(self.rows(subset))
+        return JoinCost(
+            [self.relations[i].source.packed() for i in order], rows, sum(rows[1:])
+        )
+
+    def exhaustive(self) -> list[int]:
+        "Finds the left-deep order of least cost with dynamic programming over subsets of relations."
+
+        count = len(self.relations)
+        best: dict[int, tuple[float, list[int]]] = {
+            1 << i: (0.0, [i]) for i in range(count)
+        }
+        for size in range(2, count + 1):
+            for combination in itertools.combinations(range(count), size):
+                subset = sum(1 << i for i in combination)
+                rows = self.rows(subset)
+                connected = [
+                    i for i in combination if self.is_connected(subset & ~(1 << i), i)
+                ]
+                candidates: Iterable[int] = connected or combination
+                choice: tuple[float, list[int]] | None = None
+                for i in candidates:
+                    prefix = best.get(subset & ~(1 << i))
+                    if prefix is None:
+                        continue
+                    cost = prefix[0] + rows
+                    if choice is None or cost < choice[0]:
+                        choice = (cost, prefix[1] + [i])
+                if choice is not None:
+                    best[subset] = choice
+        return best[self.all][1]
+
+    def greedy(self) -> list[int]:
+        "Finds a left-deep order by joining the relation that yields the smallest intermediate result next."
+
+        remaining = list(range(len(self.relations)))
+        first = min(remaining, key=lambda i: self.rows(1 << i))
+        order = [first]
+        remaining.remove(first)
+        subset = 1 << first
+        while remaining:
+            connected = [i for i in remaining if self.is_connected(subset, i)]
+            candidates = connected or remaining
+            chosen = min(candidates, key=lambda i: self.rows(subset | (1 << i)))
+            order.append(chosen)
+            remaining.remove(chosen)
+            subset |= 1 << chosen
+        return order
+
+    def build(self, order: list[int]) -> SourceExpr:
+        "Builds a left-deep tree of inner joins, attaching each predicate to the first join where it can be evaluated."
+
+        source = self.relations[order[0]].source
+        subset = 1 << order[0]
+        placed: set[int] = set()
+        for index in order[1:]:
+            subset |= 1 << index
+            conjuncts: list[BoolExpr] = []
+            for k, predicate in enumerate(self.predicates):
+                if (
+                    k not in placed
+                    and predicate.relations & subset == predicate.relations
+                ):
+                    conjuncts.append(predicate.expr)
+                    placed.add(k)
+            if not conjuncts:
+                condition: BoolExpr = ReturnsBool("TRUE")
+            elif len(conjuncts) == 1:
+                condition = conjuncts[0]
+            else:
+                condition = ConjExpr(conjuncts)
+            source = Join(source, self.relations[index].source, condition)
+        return source
+
+
+def _conjuncts(condition: BoolExpr) -> list[BoolExpr]:
+    if isinstance(condition, ConjExpr):
+        return list(condition.operands)
+    else:
+        return [condition]
+
+
+class _Optimizer:
+    __slots__ = ("tables", "exhaustive_limit", "before", "after")
+
+    tables: dict[str, Table]
+    exhaustive_limit: int
+    before: list[JoinCost]
+    after: list[JoinCost]
+
+    def __init__(self, tables: dict[str, Table], exhaustive_limit: int) -> None:
+        self.tables = tables
+        self.exhaustive_limit = exhaustive_limit
+        self.before = []
+        self.after = []
+
+    def flatten(
+        self,
+        source: SourceExpr,
+        relations: list[_Relation],
+        conditions: list[BoolExpr],
+        joins: list[int],
+    ) -> None:
+        "Collects the relations and predicates of a tree of inner joins, and the relations each join combines."
+
+        if isinstance(source, Join) and source.condition is not None:
+            start = len(relations)
+            self.flatten(source.left, relations, conditions, joins)
+            self.flatten(source.right, relations, conditions, joins)
+            conditions.extend(_conjuncts(source.condition))
+            joins.append(sum(1 << i for i in range(start, len(relations))))
+        else:
+            relations.append(_Relation(self.optimize(source), self.tables))
+
+    def optimize(self, source: SourceExpr) -> SourceExpr:
+        if isinstance(source, Join):
+            return self.reorder(source)
+        elif isinstance(source, JoinExpr):
+            left = self.optimize(source.left)
+            right = self.optimize(source.right)
+            if left is not source.left or right is not source.right:
+                return source._derive(left, right)
+        elif isinstance(source, FromExpr) and isinstance(source.expr, JoinExpr):
+            expr = self.optimize(source.expr)
+            if expr is not source.expr:
+                return FromExpr(
+                    expr,
+                    name=source.name,
+                    sample=source.sample,
+                    statistics=source.statistics,
+                )
+        return source
+
+    def reorder(self, source: Join) -> SourceExpr:
+        relations: list[_Relation] = []
+        conditions: list[BoolExpr] = []
+        joins: list[int] = []
+        self.flatten(source, relations, conditions, joins)
+
+        original = list(range(len(relations)))
+        if len(relations) < 3 or any(r.rows is None for r in relations):
+            changed = any(r.source is not s for r, s in zip(relations, _leaves(source)))
+            return self._rebuild(source, relations) if changed else source
+
+        graph = _Graph(relations, conditions)
+        before = JoinCost(
+            [r.source.packed() for r in relations],
+            [graph.rows(1 << original[0])] + [graph.rows(j) for j in joins],
+            sum(graph.rows(j) for j in joins),
+        )
+        if len(relations) <= self.exhaustive_limit:
+            order = graph.exhaustive()
+        else:
+            order = graph.greedy()
+        after = graph.cost(order)
+        if after.cost >= before.cost:
+            order = original
+            after = before
+
+        self.before.append(before)
+        self.after.append(after)
+        if order == original and all(
+            r.source is s for r, s in zip(relations, _leaves(source))
+        ):
+            return source
+        return graph.build(order)
+
+    def _rebuild(self, source: SourceExpr, relations: list[_Relation]) -> SourceExpr:
+        "Replaces the leaves of a tree of inner joins with optimized sources, keeping its shape."
+
+        leaves = iter(relations)
+
+        def rebuild(node: SourceExpr) -> SourceExpr:
+            if isinstance(node, Join) and node.condition is not None:
+                return node._derive(rebuild(node.left), rebuild(node.right))
+            return next(leaves).source
+
+        return rebuild(source)
+
+
+def _leaves(source: SourceExpr) -> list[SourceExpr]:
+    if isinstance(source, Join) and source.condition is not None:
+        return _leaves(source.left) + _leaves(source.right)
+    else:
+        return [source]
+
+
+def reorder_joins(
+    query: Query,
+    tables: Iterable[Table] | Mapping[str, Table] = (),
+    *,
+    exhaustive_limit: int = 10,
+) -> JoinOrderResult:
+    """
+    Re-arranges trees of inner joins in the FROM clause such that the smallest intermediate results come first.
+
+    Each maximal tree of inner joins (`Join`) is flattened into a set of sources and the conjuncts of their join
+    conditions, and re-built as a left-deep tree in the order of least estimated cost. Each conjunct is attached to the
+    first join where all the sources it references are available. Left, right and lateral joins keep their position
+    and operands; only inner joins nested within their operands are re-arranged.
+
+    Row counts come from the statistics attached to a FROM expression, or else from the statistics of the table it
+    names. A tree is left as is if the row count of any of its sources is not known. The selectivity of an equi-join
+    `a.x = b.y` is `1 / max(ndv(a.x), ndv(b.y))`, where the number of distinct values defaults to the row count of the
+    source (i.e. a key). Other predicates have a fixed selectivity of `DEFAULT_SELECTIVITY`.
+
+    Queries that select `*` are left as is, as the order of columns in the result depends on the order of joins.
+    Sub-queries in the FROM clause are not optimized.
+
+    :param query: The query to optimize.
+    :param tables: Tables with statistics, or a mapping from table name to table.
+    :param exhaustive_limit: The maximum number of sources in a tree for which an exhaustive search (dynamic
+        programming) is performed. Larger trees are ordered with a greedy heuristic.
+    :returns: The optimized query, with the estimated cost of each tree of inner joins before and after.
+    """
+
+    if isinstance(tables, Mapping):
+        index = {name.upper(): table for name, table in tables.items()}
+    else:
+        index = {table.name.raw.upper(): table for table in tables}
+
+    if any(re.match(r"\s*\*", str(c.expr)) for c in query.columns.columns):
+        return JoinOrderResult(query, [], [])
+
+    optimizer = _Optimizer(index, exhaustive_limit)
+    source = optimizer.optimize(query.source)
+    if source is not query.source:
+        query = query.with_source(source)
+    return JoinOrderResult(query, optimizer.before, optimizer.after)
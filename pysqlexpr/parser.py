@@ -0,0 +1,691 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import re
+from typing import Callable, Iterator
+
+from ._patterns import IDENTIFIER, QUOTED_IDENTIFIER, STRING_LITERAL
+from .boolean import BoolExpr, ConjExpr, DisjExpr, ReturnsBool
+from .identifier import Identifier
+from .query import (
+    Column,
+    Exists,
+    FromExpr,
+    InSubquery,
+    Join,
+    JoinExpr,
+    LateralJoin,
+    LeftJoin,
+    NotExists,
+    Query,
+    RightJoin,
+    Sample,
+    SampleMethod,
+    SourceExpr,
+)
+
+# The parser recognizes the clauses of a query (SELECT, FROM, joins, WHERE, GROUP BY, QUALIFY, ORDER BY, LIMIT) and
+# the Boolean structure of conditions (AND, OR, parentheses, EXISTS and IN sub-queries). Scalar expressions (e.g.
+# columns in the SELECT list, or the operands of a comparison) are not parsed further; they are kept as SQL text with
+# comments removed and whitespace normalized, which is how the expression tree stores them.
+
+_TOKEN = re.compile(
+    rf"""
+    (?P<space>\s+|(?:--|//)[^\n]*|/\*.*?\*/)
+    |(?P<name>{IDENTIFIER})
+    |(?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+    |(?P<string>{STRING_LITERAL.pattern}|\$\$.*?\$\$)
+    |(?P<quoted>{QUOTED_IDENTIFIER.pattern})
+    |(?P<variable>\$\w+|@[\w./~%-]+|\?)
+    |(?P<symbol>::|<>|!=|<=|>=|=>|\|\||->>|->|[-+*/%=<>(),.;:\[\]{{}}~^&|!])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_OPEN = {"(": ")", "[": "]", "{": "}"}
+
+# keywords that end an expression at the same level of nesting
+_CLAUSES = frozenset(
+    [
+        "FROM",
+        "WHERE",
+        "GROUP",
+        "HAVING",
+        "QUALIFY",
+        "ORDER",
+        "LIMIT",
+        "OFFSET",
+        "FETCH",
+        "UNION",
+        "INTERSECT",
+        "MINUS",
+        "EXCEPT",
+        "ON",
+        "USING",
+        "INNER",
+        "LEFT",
+        "RIGHT",
+        "FULL",
+        "CROSS",
+        "NATURAL",
+        "JOIN",
+        "SAMPLE",
+        "TABLESAMPLE",
+    ]
+)
+
+# keywords that are also the names of functions, and end an expression only if not followed by a parenthesis
+_FUNCTIONS = frozenset(["LEFT", "RIGHT"])
+
+_SAMPLE_METHODS: dict[str, SampleMethod] = {
+    "BERNOULLI": "BERNOULLI",
+    "ROW": "BERNOULLI",
+    "SYSTEM": "SYSTEM",
+    "BLOCK": "SYSTEM",
+}
+
+
+class ParseError(ValueError):
+    "Raised when SQL text is malformed, or uses syntax that the expression tree cannot represent."
+
+    position: int
+
+    def __init__(self, message: str, text: str, position: int) -> None:
+        line = text.count("\n", 0, position) + 1
+        column = position - (text.rfind("\n", 0, position) + 1) + 1
+        super().__init__(f"{message} at line {line}, column {column}")
+        self.position = position
+
+
+class _Token:
+    __slots__ = ("kind", "text", "word", "start", "space")
+
+    kind: str
+    text: str
+    word: str
+    start: int
+    space: bool
+
+    def __init__(self, kind: str, text: str, start: int, space: bool) -> None:
+        """
+        :param kind: The kind of token, e.g. `name` or `symbol`.
+        :param text: The text of the token.
+        :param start: The position of the token in the source text.
+        :param space: True if the token is preceded by whitespace (or a comment).
+        """
+
+        self.kind = kind
+        self.text = text
+        self.word = text.upper() if kind == "name" else ""
+        self.start = start
+        self.space = space
+
+
+class _Parser:
+    __slots__ = ("text", "tokens", "match", "pos")
+
+    text: str
+    tokens: list[_Token]
+    match: list[int]
+    pos: int
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.tokens = []
+        self.match = []
+        self.pos = 0
+
+        stack: list[int] = []
+        space = False
+        position = 0
+        for m in _TOKEN.finditer(text):
+            if m.start() != position:
+                raise ParseError("unrecognized character", text, position)
+            position = m.end()
+            kind = m.lastgroup
+            assert kind is not None
+            if kind == "space":
+                space = True
+                continue
+            token = _Token(kind, m.group(), m.start(), space)
+            space = False
+            index = len(self.tokens)
+            self.tokens.append(token)
+            self.match.append(-1)
+            if kind == "symbol":
+                if token.text in _OPEN:
+                    stack.append(index)
+                elif token.text in (")", "]", "}"):
+                    if not stack or _OPEN[self.tokens[stack[-1]].text] != token.text:
+                        raise ParseError("unbalanced parenthesis", text, token.start)
+                    opening = stack.pop()
+                    self.match[opening] = index
+                    self.match[index] = opening
+        if position != len(text):
+            raise ParseError("unrecognized character", text, position)
+        if stack:
+            raise ParseError(
+                "unbalanced parenthesis", text, self.tokens[stack[-1]].start
+            )
+
+    # helpers
+
+    def error(self, message: str, index: int | None = None) -> ParseError:
+        index = self.pos if index is None else index
+        position = (
+            self.tokens[index].start if index < len(self.tokens) else len(self.text)
+        )
+        return ParseError(message, self.text, position)
+
+    def peek(self, offset: int = 0) -> _Token | None:
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def at(self, *words: str, offset: int = 0) -> bool:
+        token = self.peek(offset)
+        return token is not None and token.word in words
+
+    def at_symbol(self, *symbols: str, offset: int = 0) -> bool:
+        token = self.peek(offset)
+        return token is not None and token.kind == "symbol" and token.text in symbols
+
+    def accept(self, *words: str) -> bool:
+        if self.at(*words):
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, *words: str) -> _Token:
+        if not self.at(*words):
+            raise self.error(f"expected: {' or '.join(words)}")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def expect_symbol(self, symbol: str) -> int:
+        if not self.at_symbol(symbol):
+            raise self.error(f"expected: {symbol}")
+        self.pos += 1
+        return self.pos - 1
+
+    def source_text(self, start: int, end: int) -> str:
+        "Reconstructs the text of a range of tokens, with whitespace normalized."
+
+        if start >= end:
+            raise self.error("expected: expression", start)
+        parts = [self.tokens[start].text]
+        for index in range(start + 1, end):
+            token = self.tokens[index]
+            if token.space:
+                parts.append(" ")
+            parts.append(token.text)
+        return "".join(parts)
+
+    def is_clause(self, index: int) -> bool:
+        "True if the token at the index starts a clause (rather than a function call with the same name)."
+
+        token = self.tokens[index]
+        if token.word not in _CLAUSES:
+            return False
+        if token.word not in _FUNCTIONS:
+            return True
+        following = index + 1
+        return not (following < len(self.tokens) and self.tokens[following].text == "(")
+
+    def scan(self, stop: Callable[[int, bool], bool]) -> int:
+        """
+        Finds the end of an expression, skipping over parenthesized groups and CASE expressions.
+
+        :param stop: A function that receives the index of a token at the level of nesting the scan started at, and
+            whether a BETWEEN predicate awaits its AND, and returns true if the expression ends before the token.
+        :returns: The index of the first token after the expression.
+        """
+
+        index = self.pos
+        cases = 0
+        between = False
+        while index < len(self.tokens):
+            token = self.tokens[index]
+            if token.kind == "symbol":
+                if token.text in _OPEN:
+                    index = self.match[index] + 1
+                    continue
+                elif token.text in (")", "]", "}", ";"):
+                    break
+            if cases == 0 and stop(index, between):
+                break
+            if token.word == "CASE":
+                cases += 1
+            elif token.word == "END" and cases > 0:
+                cases -= 1
+            elif token.word == "BETWEEN" and cases == 0:
+                between = True
+            elif token.word == "AND" and cases == 0:
+                between = False
+            index += 1
+        return index
+
+    # queries
+
+    def query(self) -> Query:
+        start = self.pos
+        self.expect("SELECT")
+        if self.at("DISTINCT", "TOP"):
+            raise self.error(f"unsupported: SELECT {self.tokens[self.pos].word}")
+        self.accept("ALL")
+
+        columns = [self.column()]
+        while self.at_symbol(","):
+            self.pos += 1
+            columns.append(self.column())
+
+        if not self.accept("FROM"):
+            raise self.error("expected: FROM")
+        source = self.source()
+
+        where = None
+        if self.accept("WHERE"):
+            where = self.condition()
+        group_by = None
+        if self.accept("GROUP"):
+            self.expect("BY")
+            group_by = self.items()
+        if self.at("HAVING"):
+            raise self.error("unsupported: HAVING")
+        qualify = None
+        if self.accept("QUALIFY"):
+            qualify = self.condition()
+        order_by = None
+        if self.accept("ORDER"):
+            self.expect("BY")
+            order_by = self.items()
+        limit, offset = self.limit()
+
+        if self.at("UNION", "INTERSECT", "MINUS", "EXCEPT"):
+            raise self.error(f"unsupported: {self.tokens[self.pos].word}", start)
+
+        return Query(
+            source,
+            columns,
+            where=where,
+            group_by=group_by,
+            qualify=qualify,
+            order_by=order_by,
+            limit=limit,
+            offset=offset,
+        )
+
+    def column(self) -> Column:
+        start = self.pos
+        end = self.scan(
+            lambda index, between: self.tokens[index].text == ","
+            or self.tokens[index].word == "FROM"
+        )
+        self.pos = end
+        if (
+            end - start >= 3
+            and self.tokens[end - 2].word == "AS"
+            and self.tokens[end - 1].kind in ("name", "quoted")
+        ):
+            return Column(
+                self.source_text(start, end - 2), name=self.tokens[end - 1].text
+            )
+        return Column(self.source_text(start, end))
+
+    def items(self) -> list[str]:
+        "Parses a comma-separated list of expressions, e.g. in a GROUP BY or ORDER BY clause."
+
+        items: list[str] = []
+        while True:
+            start = self.pos
+            end = self.scan(
+                lambda index, between: self.tokens[index].text == ","
+                or self.is_clause(index)
+            )
+            items.append(self.source_text(start, end))
+            self.pos = end
+            if not self.at_symbol(","):
+                return items
+            self.pos += 1
+
+    def integer(self) -> int | None:
+        token = self.peek()
+        if token is not None and token.word == "NULL":
+            self.pos += 1
+            return None
+        if token is None or token.kind != "number" or not token.text.isdigit():
+            raise self.error("expected: non-negative integer")
+        self.pos += 1
+        return int(token.text)
+
+    def limit(self) -> tuple[int | None, int | None]:
+        limit = None
+        offset = None
+        if self.accept("LIMIT"):
+            limit = self.integer()
+            if self.accept("OFFSET"):
+                offset = self.integer()
+        elif self.accept("OFFSET"):
+            offset = self.integer()
+            self.accept("ROW", "ROWS")
+            if self.at("FETCH"):
+                limit = self.fetch()
+        elif self.at("FETCH"):
+            limit = self.fetch()
+        return limit, offset
+
+    def fetch(self) -> int | None:
+        self.expect("FETCH")
+        self.expect("FIRST", "NEXT")
+        limit = self.integer()
+        self.expect("ROW", "ROWS")
+        self.expect("ONLY")
+        return limit
+
+    # sources
+
+    def source(self) -> SourceExpr:
+        left = self.primary()
+        while True:
+            if self.at("INNER", "JOIN", "LEFT", "RIGHT"):
+                kind = self.tokens[self.pos].word
+                self.pos += 1
+                if kind in ("LEFT", "RIGHT"):
+                    self.accept("OUTER")
+                if kind != "JOIN":
+                    self.expect("JOIN")
+                if kind in ("INNER", "JOIN") and self.accept("LATERAL"):
+                    left = self.lateral(left)
+                    continue
+                right = self.source()
+                if self.at("USING"):
+                    raise self.error("unsupported: USING")
+                self.expect("ON")
+                condition = self.condition()
+                if kind == "LEFT":
+                    left = LeftJoin(left, right, condition)
+                elif kind == "RIGHT":
+                    left = RightJoin(left, right, condition)
+                else:
+                    left = Join(left, right, condition)
+            elif self.at_symbol(",") and self.at("LATERAL", offset=1):
+                # `t, LATERAL f` is equivalent to `t INNER JOIN LATERAL f`
+                self.pos += 2
+                left = self.lateral(left)
+            elif self.at("FULL", "CROSS", "NATURAL") or self.at_symbol(","):
+                raise self.error(f"unsupported: {self.tokens[self.pos].text} join")
+            else:
+                return left
+
+    def lateral(self, left: SourceExpr) -> LateralJoin:
+        "Parses the table function of a lateral join, following the keyword `LATERAL`."
+
+        right = self.primary()
+        if not isinstance(left, FromExpr) and not isinstance(left, JoinExpr):
+            raise self.error("unsupported: lateral join")
+        if not isinstance(right, FromExpr):
+            raise self.error("expected: table function")
+        return LateralJoin(_as_from(left), right)
+
+    def primary(self) -> SourceExpr:
+        source: str | SourceExpr
+        if self.at_symbol("("):
+            opening = self.pos
+            closing = self.match[opening]
+            self.pos += 1
+            if self.at("SELECT"):
+                source = self.query()
+            else:
+                join = self.source()
+                self.pos = self.expect_symbol(")") + 1
+                if self.pos != closing + 1:
+                    raise self.error("expected: )")
+                return join
+            if self.pos != closing:
+                raise self.error("expected: )")
+            self.pos = closing + 1
+        else:
+            start = self.pos
+            token = self.peek()
+            if token is None:
+                raise self.error("expected: table")
+            if token.kind == "variable":
+                self.pos += 1
+            else:
+                self.identifier_path()
+                if self.at_symbol("("):
+                    self.pos = self.match[self.pos] + 1
+            source = self.source_text(start, self.pos)
+
+        name = None
+        if self.accept("AS"):
+            name = self.alias()
+        else:
+            token = self.peek()
+            if (
+                token is not None
+                and token.kind in ("name", "quoted")
+                and token.word not in _CLAUSES
+                and token.word != "LATERAL"
+            ):
+                name = self.alias()
+        sample = self.sample()
+        return FromExpr(source, name=name, sample=sample)
+
+    def identifier_path(self) -> None:
+        while True:
+            token = self.peek()
+            if token is None or token.kind not in ("name", "quoted"):
+                raise self.error("expected: identifier")
+            self.pos += 1
+            if not self.at_symbol("."):
+                return
+            self.pos += 1
+
+    def alias(self) -> str:
+        token = self.peek()
+        if token is None or token.kind not in ("name", "quoted"):
+            raise self.error("expected: alias")
+        self.pos += 1
+        return token.text
+
+    def sample(self) -> Sample | None:
+        if not self.accept("SAMPLE", "TABLESAMPLE"):
+            return None
+        method: SampleMethod = "BERNOULLI"
+        if self.at(*_SAMPLE_METHODS):
+            method = _SAMPLE_METHODS[self.tokens[self.pos].word]
+            self.pos += 1
+        self.expect_symbol("(")
+        token = self.peek()
+        if token is None or token.kind != "number":
+            raise self.error("expected: sampling probability or number of rows")
+        self.pos += 1
+        if self.accept("ROWS"):
+            if not token.text.isdigit():
+                raise self.error("expected: number of rows")
+            sample = Sample(rows=int(token.text))
+            self.expect_symbol(")")
+            return sample
+        self.expect_symbol(")")
+        seed = None
+        if self.accept("SEED", "REPEATABLE"):
+            self.expect_symbol("(")
+            seed = self.integer()
+            self.expect_symbol(")")
+        return Sample(float(token.text), method=method, seed=seed)
+
+    # conditions
+
+    def condition(self) -> BoolExpr:
+        operands = [self.conjunction()]
+        while self.accept("OR"):
+            operands.append(self.conjunction())
+        if len(operands) == 1:
+            return operands[0]
+        return DisjExpr(_flatten(DisjExpr, operands))
+
+    def conjunction(self) -> BoolExpr:
+        operands = [self.term()]
+        while self.accept("AND"):
+            operands.append(self.term())
+        if len(operands) == 1:
+            return operands[0]
+        return ConjExpr(_flatten(ConjExpr, operands))
+
+    def ends_term(self, index: int) -> bool:
+        "True if the token at the index follows a complete Boolean term."
+
+        if index >= len(self.tokens):
+            return True
+        token = self.tokens[index]
+        return (
+            token.word in ("AND", "OR")
+            or token.text in (")", ";")
+            or self.is_clause(index)
+        )
+
+    def term(self) -> BoolExpr:
+        # parenthesized condition
+        if self.at_symbol("(") and not self.at("SELECT", offset=1):
+            closing = self.match[self.pos]
+            if self.ends_term(closing + 1):
+                self.pos += 1
+                expr = self.condition()
+                if self.pos != closing:
+                    raise self.error("expected: )")
+                self.pos = closing + 1
+                return expr
+
+        # semi-join and anti-join
+        negated = self.at("NOT") and self.at("EXISTS", offset=1)
+        offset = 1 if negated else 0
+        if (
+            self.at("EXISTS", offset=offset)
+            and self.at_symbol("(", offset=offset + 1)
+            and self.at("SELECT", offset=offset + 2)
+        ):
+            closing = self.match[self.pos + offset + 1]
+            if self.ends_term(closing + 1):
+                self.pos += offset + 2
+                query = self.query()
+                if self.pos != closing:
+                    raise self.error("expected: )")
+                self.pos = closing + 1
+                return NotExists(query) if negated else Exists(query)
+
+        start = self.pos
+        end = self.scan(
+            lambda index, between: (
+                self.tokens[index].word == "AND"
+                and not between
+                or self.tokens[index].word == "OR"
+                or self.is_clause(index)
+            )
+        )
+        if end <= start:
+            raise self.error("expected: condition")
+        self.pos = end
+
+        # membership in the result of a sub-query
+        closing = end - 1
+        if self.tokens[closing].text == ")":
+            opening = self.match[closing]
+            if (
+                opening - 1 > start
+                and self.tokens[opening - 1].word == "IN"
+                and self.tokens[opening + 1].word == "SELECT"
+                and self.tokens[opening - 2].word != "NOT"
+            ):
+                self.pos = opening + 1
+                query = self.query()
+                if self.pos != closing:
+                    raise self.error("expected: )")
+                self.pos = end
+                return InSubquery(self.source_text(start, opening - 1), query)
+
+        return ReturnsBool(self.source_text(start, end))
+
+    def end(self) -> None:
+        if self.at_symbol(";"):
+            self.pos += 1
+        if self.pos != len(self.tokens):
+            raise self.error("unexpected token")
+
+
+def _flatten(
+    kind: type[ConjExpr] | type[DisjExpr], operands: list[BoolExpr]
+) -> Iterator[BoolExpr]:
+    "Merges parenthesized operands of the same logical operator, e.g. `(a AND b) AND c` becomes `a AND b AND c`."
+
+    for operand in operands:
+        if isinstance(operand, kind):
+            yield from operand.operands
+        else:
+            yield operand
+
+
+def _as_from(source: SourceExpr) -> FromExpr:
+    if isinstance(source, FromExpr):
+        return source
+    return FromExpr(source)
+
+
+def parse_query(text: str) -> Query:
+    """
+    Parses the text of a Snowflake SELECT statement into a query expression tree.
+
+    The statement may have an optional terminating semicolon. Scalar expressions are kept as text, with comments
+    removed and whitespace normalized. Constructs the expression tree cannot represent (e.g. `SELECT DISTINCT`,
+    `HAVING`, `UNION`, a `FULL`, `CROSS` or comma join other than with `LATERAL`, or a join with `USING`) raise an error.
+
+    :param text: SQL text.
+    :raises ParseError: Raised when the text cannot be parsed.
+    """
+
+    parser = _Parser(text)
+    query = parser.query()
+    parser.end()
+    return query
+
+
+def parse_condition(text: str) -> BoolExpr:
+    """
+    Parses the text of a Boolean expression (e.g. a WHERE clause without the keyword) into an expression tree.
+
+    :param text: SQL text.
+    :raises ParseError: Raised when the text cannot be parsed.
+    """
+
+    parser = _Parser(text)
+    expr = parser.condition()
+    parser.end()
+    return expr
+
+
+def parse_identifier(text: str) -> Identifier:
+    """
+    Parses an identifier with an optional VARIANT path, e.g. `payload:"customer":"id"`.
+
+    The inverse of converting an `Identifier` to a string, except for identifiers that are reserved keywords, which
+    are rendered with a trailing underscore.
+
+    :param text: SQL text.
+    :raises ParseError: Raised when the text is not an identifier.
+    """
+
+    m = re.fullmatch(
+        r'\s*(?P<identifier>[A-Za-z_][\w$]*|"(?:[^"]|"")*")(?P<path>(?::(?:[A-Za-z_][\w$]*|"(?:[^"]|"")*"))*)\s*',
+        text,
+    )
+    if m is None:
+        raise ParseError("expected: identifier", text, 0)
+    identifier = m.group("identifier")
+    components = [
+        c[1:-1].replace('""', '"') if c.startswith('"') else c
+        for c in re.findall(r'[A-Za-z_][\w$]*|"(?:[^"]|"")*"', m.group("path"))
+    ]
+    return Identifier(identifier, path="/".join(components) if components else None)
@@ -0,0 +1,117 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import AsyncIterable, AsyncIterator, Callable, Generic, Protocol, TypeVar
+
+from .indentation import Printable
+
+S = TypeVar("S")
+R = TypeVar("R")
+R_co = TypeVar("R_co", covariant=True)
+
+
+class AsyncDriver(Protocol[R_co]):
+    "An adapter that submits SQL text to a database asynchronously."
+
+    async def execute(self, statement: str) -> R_co: ...
+
+
+class PipelineResult(Generic[S, R]):
+    "The outcome of submitting the statement generated from a query specification."
+
+    __slots__ = ("spec", "statement", "result", "error")
+
+    spec: S
+    statement: str | None
+    result: R | None
+    error: BaseException | None
+
+    def __init__(
+        self,
+        spec: S,
+        statement: str | None,
+        result: R | None = None,
+        error: BaseException | None = None,
+    ) -> None:
+        self.spec = spec
+        self.statement = statement
+        self.result = result
+        self.error = error
+
+
+def _render(build: Callable[[S], Printable], spec: S) -> str:
+    "Builds an expression tree from a specification, and renders it for submission."
+
+    return build(spec).wire()
+
+
+async def run_pipeline(
+    specs: AsyncIterable[S],
+    build: Callable[[S], Printable],
+    driver: AsyncDriver[R],
+    *,
+    executor: Executor | None = None,
+    concurrency: int = 16,
+) -> AsyncIterator[PipelineResult[S, R]]:
+    """
+    Builds, renders and submits queries concurrently, yielding results as they complete.
+
+    Building and rendering run in an executor so that they do not block the event loop. At most `concurrency`
+    specifications are in flight (being rendered or submitted) at any time; the pipeline stops pulling from `specs`
+    until a slot frees up, which propagates back-pressure to the producer. Results are yielded in order of completion,
+    not in order of specification. Errors raised while building, rendering or submitting are captured in the result
+    rather than aborting the pipeline.
+
+    :param specs: An asynchronous iterable of query specifications.
+    :param build: A function that turns a specification into an expression tree. Must be picklable when `executor` is
+        a process pool.
+    :param driver: An adapter that submits SQL text to the database.
+    :param executor: The executor to build and render queries in, or `None` for the event loop's default executor.
+    :param concurrency: The maximum number of specifications in flight.
+    """
+
+    if concurrency < 1:
+        raise ValueError("concurrency must be positive")
+
+    loop = asyncio.get_running_loop()
+
+    async def process(spec: S) -> PipelineResult[S, R]:
+        try:
+            statement = await loop.run_in_executor(executor, _render, build, spec)
+        except Exception as e:
+            return PipelineResult(spec, None, error=e)
+        try:
+            result = await driver.execute(statement)
+        except Exception as e:
+            return PipelineResult(spec, statement, error=e)
+        return PipelineResult(spec, statement, result)
+
+    pending: set[asyncio.Task[PipelineResult[S, R]]] = set()
+    iterator = aiter(specs)
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    spec = await anext(iterator)
+                except StopAsyncIteration:
+                    exhausted = True
+                else:
+                    pending.add(asyncio.create_task(process(spec)))
+            if not pending:
+                break
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,88 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import re
+
+from ._patterns import IDENTIFIER, QUOTED_IDENTIFIER
+from .query import FromExpr, JoinExpr, Query, Sample, SourceExpr
+
+# a table name, optionally qualified with database and schema, as opposed to a table function or a stage
+_PART = rf"(?:{IDENTIFIER}|{QUOTED_IDENTIFIER.pattern})"
+_TABLE_NAME = re.compile(rf"\s*(?:{_PART}\s*\.\s*){{0,2}}{_PART}\s*")
+
+DEFAULT_PREVIEW_LIMIT = 1000
+
+
+def _sample_source(source: SourceExpr, sample: Sample) -> SourceExpr:
+    "Adds a SAMPLE clause to each base table in a FROM clause, sharing unchanged parts."
+
+    if isinstance(source, FromExpr):
+        if isinstance(source.expr, str):
+            if source.sample is None and _TABLE_NAME.fullmatch(source.expr):
+                return FromExpr(
+                    source.expr,
+                    name=source.name,
+                    sample=sample,
+                    statistics=source.statistics,
+                )
+        else:
+            expr = _sample_source(source.expr, sample)
+            if expr is not source.expr:
+                return FromExpr(
+                    expr,
+                    name=source.name,
+                    sample=source.sample,
+                    statistics=source.statistics,
+                )
+        return source
+    elif isinstance(source, JoinExpr):
+        left = _sample_source(source.left, sample)
+        right = _sample_source(source.right, sample)
+        if left is not source.left or right is not source.right:
+            return source._derive(left, right)
+        return source
+    elif isinstance(source, Query):
+        return _sample_query(source, sample)
+    else:
+        return source
+
+
+def _sample_query(query: Query, sample: Sample) -> Query:
+    source = _sample_source(query.source, sample)
+    if source is not query.source:
+        return query.with_source(source)
+    return query
+
+
+def preview(
+    query: Query, *, limit: int = DEFAULT_PREVIEW_LIMIT, sample: Sample | None = None
+) -> Query:
+    """
+    Rewrites a query to return a small, cheap subset of its result, e.g. for showing a preview to a user.
+
+    The outermost query is capped with a LIMIT clause, keeping a smaller existing limit and any offset. If a sample is
+    given, base tables in the FROM clause (including those in joins and sub-queries in the FROM clause, but not those in
+    sub-query predicates) are restricted with a SAMPLE clause, unless they are already sampled. Block sampling, e.g.
+    `Sample(1, method="SYSTEM")`, lets the engine skip reading most micro-partitions of a large table altogether,
+    whereas a LIMIT clause alone may still require scanning the whole table (e.g. with aggregation or sorting).
+
+    Sampling changes the result of joins and aggregates: a preview shows representative rows, not a subset of the
+    exact result.
+
+    :param query: The query to rewrite.
+    :param limit: The maximum number of rows the preview returns.
+    :param sample: A SAMPLE clause to apply to base tables, or `None` to leave sources intact.
+    :returns: The rewritten query, which shares all unchanged parts of the original query.
+    """
+
+    if limit < 0:
+        raise ValueError("limit must be non-negative")
+
+    if sample is not None:
+        query = _sample_query(query, sample)
+    if query.limit is None or query.limit > limit:
+        query = query.with_limit(limit, offset=query.offset)
+    return query
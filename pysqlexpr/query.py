@@ -4,22 +4,31 @@ pysqlexpr: Expressive SQL for Python
 :see: https://github.com/hunyadi/pysqlexpr
 """
 
-from typing import ClassVar, Iterable
-
-from .boolean import BoolExpr
-from .indentation import Printable, indent
+from types import EllipsisType
+from typing import ClassVar, Iterable, Iterator, Literal, final
+
+from .aggregate import Aggregate
+from .boolean import BoolExpr, Predicate
+from .immutable import Immutable
+from .indentation import Printable, indent, memoized, utf8_len
+from .table import Statistics
 from .typing import override
 
 
-class Column:
+class Column(Immutable):
     __slots__ = ("expr", "name")
 
-    expr: str
+    expr: str | Aggregate
     name: str | None
 
-    def __init__(self, expr: str, *, name: str | None = None) -> None:
-        self.expr = expr
-        self.name = name
+    def __init__(self, expr: str | Aggregate, *, name: str | None = None) -> None:
+        """
+        :param expr: A SQL expression, or a structured aggregate.
+        :param name: An alias for the column in the result.
+        """
+
+        object.__setattr__(self, "expr", expr)
+        object.__setattr__(self, "name", name)
 
     def __eq__(self, op: object) -> bool:
         return isinstance(op, Column) and self.expr == op.expr and self.name == op.name
@@ -31,7 +40,7 @@ class Column:
         if self.name:
             return f"{self.expr} AS {self.name}"
         else:
-            return self.expr
+            return str(self.expr)
 
 
 class ColumnList(Printable):
@@ -40,7 +49,7 @@ class ColumnList(Printable):
     columns: tuple[Column, ...]
 
     def __init__(self, columns: Iterable[Column]) -> None:
-        self.columns = tuple(columns)
+        object.__setattr__(self, "columns", tuple(columns))
 
     def __eq__(self, op: object) -> bool:
         return isinstance(op, ColumnList) and self.columns == op.columns
@@ -49,43 +58,167 @@ class ColumnList(Printable):
         return hash(self.columns)
 
     @override
+    @memoized
     def packed(self) -> str:
         "Produces a compact single-line representation of the column list."
 
         return ", ".join(str(c) for c in self.columns)
 
     @override
+    @memoized
+    def wire(self) -> str:
+        "Produces the tightest single-line representation of the column list."
+
+        return ",".join(str(c) for c in self.columns)
+
+    @override
+    @memoized
+    def packed_size(self) -> int:
+        "Computes the size of the compact representation of the column list."
+
+        separators = 2 * max(len(self.columns) - 1, 0)
+        return sum(utf8_len(str(c)) for c in self.columns) + separators
+
+    @override
+    @memoized
     def spacious(self) -> str:
         "Produces an expanded multi-line representation of the column list."
 
         return ",\n".join(str(c) for c in self.columns)
 
 
+SampleMethod = Literal["BERNOULLI", "SYSTEM"]
+
+
+class Sample(Immutable):
+    "A SAMPLE clause that selects a random subset of the rows of a table."
+
+    __slots__ = ("probability", "rows", "method", "seed")
+
+    probability: float | None
+    rows: int | None
+    method: SampleMethod
+    seed: int | None
+
+    def __init__(
+        self,
+        probability: float | None = None,
+        *,
+        rows: int | None = None,
+        method: SampleMethod = "BERNOULLI",
+        seed: int | None = None,
+    ) -> None:
+        """
+        :param probability: The percentage of rows (or blocks) to include in the sample, between 0 and 100.
+        :param rows: The number of rows to include in the sample, instead of a percentage.
+        :param method: `BERNOULLI` to include each row with the given probability, or `SYSTEM` to include each block of
+            rows (micro-partition), which is much cheaper but less random.
+        :param seed: A seed that makes the sample deterministic.
+        """
+
+        if (probability is None) == (rows is None):
+            raise ValueError("expected: either probability or number of rows")
+        if probability is not None and not 0 <= probability <= 100:
+            raise ValueError("sampling probability must be between 0 and 100")
+        if rows is not None:
+            if rows < 0:
+                raise ValueError("number of rows to sample must be non-negative")
+            if method != "BERNOULLI" or seed is not None:
+                raise ValueError(
+                    "sampling a fixed number of rows supports neither block sampling nor a seed"
+                )
+        object.__setattr__(self, "probability", probability)
+        object.__setattr__(self, "rows", rows)
+        object.__setattr__(self, "method", method)
+        object.__setattr__(self, "seed", seed)
+
+    def __eq__(self, op: object) -> bool:
+        return (
+            isinstance(op, Sample)
+            and self.probability == op.probability
+            and self.rows == op.rows
+            and self.method == op.method
+            and self.seed == op.seed
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.probability, self.rows, self.method, self.seed))
+
+    def __str__(self) -> str:
+        if self.rows is not None:
+            return f"SAMPLE ({self.rows} ROWS)"
+        seed = f" SEED ({self.seed})" if self.seed is not None else ""
+        return f"SAMPLE {self.method} ({self.probability:g}){seed}"
+
+
 class SourceExpr(Printable):
     __slots__ = ()
 
+    def sources(self) -> Iterator["FromExpr"]:
+        "Enumerates the FROM expressions that make up this (possibly joined) source, without entering sub-queries."
+
+        return iter(())
+
 
 class FromExpr(SourceExpr):
     "An expression in the FROM clause."
 
-    __slots__ = ("expr", "name")
+    __slots__ = ("expr", "name", "sample", "statistics")
 
     expr: str | SourceExpr
     name: str | None
+    sample: Sample | None
+    statistics: Statistics | None
 
-    def __init__(self, expr: str | SourceExpr, *, name: str | None = None) -> None:
-        self.expr = expr
-        self.name = name
+    def __init__(
+        self,
+        expr: str | SourceExpr,
+        *,
+        name: str | None = None,
+        sample: Sample | None = None,
+        statistics: Statistics | None = None,
+    ) -> None:
+        """
+        :param expr: A table name, a table function, or a sub-query.
+        :param name: An alias.
+        :param sample: A SAMPLE clause that restricts the source to a random subset of its rows.
+        :param statistics: Size estimates for cost-based query optimization, which override the statistics of the
+            table. Statistics do not affect the SQL text, or whether two expressions compare equal.
+        """
+
+        object.__setattr__(self, "expr", expr)
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "sample", sample)
+        object.__setattr__(self, "statistics", statistics)
 
     def __eq__(self, op: object) -> bool:
         return (
-            isinstance(op, FromExpr) and self.expr == op.expr and self.name == op.name
+            isinstance(op, FromExpr)
+            and self.expr == op.expr
+            and self.name == op.name
+            and self.sample == op.sample
         )
 
     def __hash__(self) -> int:
-        return hash((self.expr, self.name))
+        return hash((self.expr, self.name, self.sample))
+
+    @property
+    def alias(self) -> str | None:
+        "The name by which columns of this source are qualified, i.e. the alias or the table name."
+
+        if self.name is not None:
+            return self.name
+        elif isinstance(self.expr, str):
+            return self.expr
+        else:
+            return None
+
+    @override
+    def sources(self) -> Iterator["FromExpr"]:
+        yield self
 
     @override
+    @memoized
     def packed(self) -> str:
         "Produces a compact single-line representation of the source expression."
 
@@ -96,11 +229,47 @@ class FromExpr(SourceExpr):
         else:
             expr = self.expr
         if self.name is not None:
-            return f"{expr} AS {self.name}"
+            expr = f"{expr} AS {self.name}"
+        if self.sample is not None:
+            expr = f"{expr} {self.sample}"
+        return expr
+
+    @override
+    @memoized
+    def wire(self) -> str:
+        "Produces the tightest single-line representation of the source expression."
+
+        if isinstance(self.expr, Query):
+            expr = "(" + self.expr.wire() + ")"
+        elif isinstance(self.expr, SourceExpr):
+            expr = self.expr.wire()
         else:
-            return expr
+            expr = self.expr
+        if self.name is not None:
+            expr = f"{expr} AS {self.name}"
+        if self.sample is not None:
+            expr = f"{expr} {self.sample}"
+        return expr
 
     @override
+    @memoized
+    def packed_size(self) -> int:
+        "Computes the size of the compact representation of the source expression."
+
+        if isinstance(self.expr, Query):
+            size = self.expr.packed_size() + 2
+        elif isinstance(self.expr, SourceExpr):
+            size = self.expr.packed_size()
+        else:
+            size = utf8_len(self.expr)
+        if self.name is not None:
+            size += utf8_len(self.name) + 4
+        if self.sample is not None:
+            size += len(str(self.sample)) + 1
+        return size
+
+    @override
+    @memoized
     def spacious(self) -> str:
         "Produces an expanded multi-line representation of the source expression."
 
@@ -111,9 +280,10 @@ class FromExpr(SourceExpr):
         else:
             expr = self.expr
         if self.name is not None:
-            return f"{expr} AS {self.name}"
-        else:
-            return str(expr)
+            expr = f"{expr} AS {self.name}"
+        if self.sample is not None:
+            expr = f"{expr} {self.sample}"
+        return str(expr)
 
 
 class JoinExpr(SourceExpr):
@@ -128,9 +298,9 @@ class JoinExpr(SourceExpr):
     condition: BoolExpr | None
 
     def __init__(self, left: SourceExpr, right: SourceExpr, condition: BoolExpr):
-        self.left = left
-        self.right = right
-        self.condition = condition
+        object.__setattr__(self, "left", left)
+        object.__setattr__(self, "right", right)
+        object.__setattr__(self, "condition", condition)
 
     def __eq__(self, op: object) -> bool:
         return (
@@ -145,12 +315,58 @@ class JoinExpr(SourceExpr):
         return hash((self.operator, self.left, self.right, self.condition))
 
     @override
+    def sources(self) -> Iterator[FromExpr]:
+        yield from self.left.sources()
+        yield from self.right.sources()
+
+    def _derive(self, left: SourceExpr, right: SourceExpr) -> "JoinExpr":
+        "Creates a join of the same kind and with the same condition that has its operands replaced."
+
+        join = object.__new__(type(self))
+        object.__setattr__(join, "left", left)
+        object.__setattr__(join, "right", right)
+        object.__setattr__(join, "condition", self.condition)
+        return join
+
+    @override
+    @memoized
     def packed(self) -> str:
         "Produces a compact single-line representation of the join expression."
 
-        return f"{self.left} {self.operator} {self.right} ON {self.condition}"
+        if self.condition is None:
+            raise ValueError("missing join condition")
+        left = self.left.packed()
+        right = self.right.packed()
+        return f"{left} {self.operator} {right} ON {self.condition.packed()}"
+
+    @override
+    @memoized
+    def wire(self) -> str:
+        "Produces the tightest single-line representation of the join expression."
+
+        if self.condition is None:
+            raise ValueError("missing join condition")
+        left = self.left.wire()
+        right = self.right.wire()
+        return f"{left} {self.operator} {right} ON {self.condition.wire()}"
 
     @override
+    @memoized
+    def packed_size(self) -> int:
+        "Computes the size of the compact representation of the join expression."
+
+        if self.condition is None:
+            raise ValueError("missing join condition")
+        return (
+            self.left.packed_size()
+            + len(self.operator)
+            + self.right.packed_size()
+            + self.condition.packed_size()
+            + 6
+        )
+
+    @override
+    @memoized
     def spacious(self) -> str:
         "Produces an expanded multi-line representation of the join expression."
 
@@ -179,17 +395,33 @@ class LateralJoin(JoinExpr):
     "A lateral join."
 
     def __init__(self, left: FromExpr, right: FromExpr):
-        self.left = left
-        self.right = right
-        self.condition = None
+        object.__setattr__(self, "left", left)
+        object.__setattr__(self, "right", right)
+        object.__setattr__(self, "condition", None)
 
     @override
+    @memoized
     def packed(self) -> str:
         "Produces a compact single-line representation of the join expression."
 
-        return f"{self.left} INNER JOIN LATERAL {self.right}"
+        return f"{self.left.packed()} INNER JOIN LATERAL {self.right.packed()}"
 
     @override
+    @memoized
+    def wire(self) -> str:
+        "Produces the tightest single-line representation of the join expression."
+
+        return f"{self.left.wire()} INNER JOIN LATERAL {self.right.wire()}"
+
+    @override
+    @memoized
+    def packed_size(self) -> int:
+        "Computes the size of the compact representation of the join expression."
+
+        return self.left.packed_size() + 20 + self.right.packed_size()
+
+    @override
+    @memoized
     def spacious(self) -> str:
         "Produces an expanded multi-line representation of the join expression."
 
@@ -199,13 +431,25 @@ class LateralJoin(JoinExpr):
 class Query(SourceExpr):
     "A query or sub-query that yields a table result."
 
-    __slots__ = ("source", "columns", "where", "group_by", "qualify")
+    __slots__ = (
+        "source",
+        "columns",
+        "where",
+        "group_by",
+        "qualify",
+        "order_by",
+        "limit",
+        "offset",
+    )
 
     source: SourceExpr
     columns: ColumnList
     where: BoolExpr | None
     group_by: tuple[str, ...] | None
     qualify: BoolExpr | None
+    order_by: tuple[str, ...] | None
+    limit: int | None
+    offset: int | None
 
     def __init__(
         self,
@@ -215,15 +459,40 @@ class Query(SourceExpr):
         where: BoolExpr | None = None,
         group_by: Iterable[str] | None = None,
         qualify: BoolExpr | None = None,
+        order_by: Iterable[str] | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
     ) -> None:
-        self.source = source
-        self.columns = ColumnList(columns)
-        self.where = where
+        """
+        :param source: The FROM clause.
+        :param columns: The SELECT list.
+        :param where: The WHERE clause.
+        :param group_by: Expressions in the GROUP BY clause.
+        :param qualify: The QUALIFY clause, which filters the results of window functions.
+        :param order_by: Expressions in the ORDER BY clause, each optionally followed by `ASC` or `DESC`.
+        :param limit: The maximum number of rows to return.
+        :param offset: The number of rows to skip before returning rows.
+        """
+
+        if limit is not None and limit < 0:
+            raise ValueError("limit must be non-negative")
+        if offset is not None and offset < 0:
+            raise ValueError("offset must be non-negative")
+
+        object.__setattr__(self, "source", source)
+        object.__setattr__(self, "columns", ColumnList(columns))
+        object.__setattr__(self, "where", where)
         if group_by is not None:
-            self.group_by = tuple(group_by)
+            object.__setattr__(self, "group_by", tuple(group_by))
+        else:
+            object.__setattr__(self, "group_by", None)
+        object.__setattr__(self, "qualify", qualify)
+        if order_by is not None:
+            object.__setattr__(self, "order_by", tuple(order_by))
         else:
-            self.group_by = None
-        self.qualify = qualify
+            object.__setattr__(self, "order_by", None)
+        object.__setattr__(self, "limit", limit)
+        object.__setattr__(self, "offset", offset)
 
     def __eq__(self, op: object) -> bool:
         return (
@@ -233,12 +502,126 @@ class Query(SourceExpr):
             and self.where == op.where
             and self.group_by == op.group_by
             and self.qualify == op.qualify
+            and self.order_by == op.order_by
+            and self.limit == op.limit
+            and self.offset == op.offset
         )
 
     def __hash__(self) -> int:
-        return hash((self.source, self.columns, self.where, self.group_by, self.qualify))
+        return hash(
+            (
+                self.source,
+                self.columns,
+                self.where,
+                self.group_by,
+                self.qualify,
+                self.order_by,
+                self.limit,
+                self.offset,
+            )
+        )
+
+    def _derive(
+        self,
+        *,
+        source: SourceExpr | None = None,
+        columns: ColumnList | None = None,
+        where: BoolExpr | None | EllipsisType = ...,
+        group_by: tuple[str, ...] | None | EllipsisType = ...,
+        qualify: BoolExpr | None | EllipsisType = ...,
+        order_by: tuple[str, ...] | None | EllipsisType = ...,
+        limit: int | None | EllipsisType = ...,
+        offset: int | None | EllipsisType = ...,
+    ) -> "Query":
+        "Creates a new query that shares all parts of this query except those passed as arguments."
+
+        query = object.__new__(Query)
+        object.__setattr__(
+            query, "source", source if source is not None else self.source
+        )
+        object.__setattr__(
+            query, "columns", columns if columns is not None else self.columns
+        )
+        object.__setattr__(
+            query, "where", where if not isinstance(where, EllipsisType) else self.where
+        )
+        object.__setattr__(
+            query,
+            "group_by",
+            group_by if not isinstance(group_by, EllipsisType) else self.group_by,
+        )
+        object.__setattr__(
+            query,
+            "qualify",
+            qualify if not isinstance(qualify, EllipsisType) else self.qualify,
+        )
+        object.__setattr__(
+            query,
+            "order_by",
+            order_by if not isinstance(order_by, EllipsisType) else self.order_by,
+        )
+        object.__setattr__(
+            query, "limit", limit if not isinstance(limit, EllipsisType) else self.limit
+        )
+        object.__setattr__(
+            query,
+            "offset",
+            offset if not isinstance(offset, EllipsisType) else self.offset,
+        )
+        return query
+
+    def with_source(self, source: SourceExpr) -> "Query":
+        "Returns a query with the FROM clause replaced, sharing all other parts of this query."
+
+        return self._derive(source=source)
+
+    def with_columns(self, columns: Iterable[Column]) -> "Query":
+        "Returns a query with the SELECT list replaced, sharing all other parts of this query."
+
+        return self._derive(columns=ColumnList(columns))
+
+    def with_where(self, where: BoolExpr | None) -> "Query":
+        "Returns a query with the WHERE clause replaced, sharing all other parts of this query."
+
+        return self._derive(where=where)
+
+    def with_group_by(self, group_by: Iterable[str] | None) -> "Query":
+        "Returns a query with the GROUP BY clause replaced, sharing all other parts of this query."
+
+        return self._derive(group_by=tuple(group_by) if group_by is not None else None)
+
+    def with_qualify(self, qualify: BoolExpr | None) -> "Query":
+        "Returns a query with the QUALIFY clause replaced, sharing all other parts of this query."
+
+        return self._derive(qualify=qualify)
+
+    def with_order_by(self, order_by: Iterable[str] | None) -> "Query":
+        "Returns a query with the ORDER BY clause replaced, sharing all other parts of this query."
+
+        return self._derive(order_by=tuple(order_by) if order_by is not None else None)
+
+    def with_limit(self, limit: int | None, *, offset: int | None = None) -> "Query":
+        "Returns a query with the LIMIT and OFFSET clauses replaced, sharing all other parts of this query."
+
+        if limit is not None and limit < 0:
+            raise ValueError("limit must be non-negative")
+        if offset is not None and offset < 0:
+            raise ValueError("offset must be non-negative")
+        return self._derive(limit=limit, offset=offset)
+
+    def _limit(self) -> str:
+        "The LIMIT and OFFSET clauses, without leading whitespace."
+
+        if self.offset is not None:
+            limit = "NULL" if self.limit is None else str(self.limit)
+            return f"LIMIT {limit} OFFSET {self.offset}"
+        elif self.limit is not None:
+            return f"LIMIT {self.limit}"
+        else:
+            return ""
 
     @override
+    @memoized
     def packed(self) -> str:
         source = self.source.packed()
         if isinstance(self.source, Query):
@@ -255,9 +638,65 @@ class Query(SourceExpr):
             qualify = f" QUALIFY {self.qualify.packed()}"
         else:
             qualify = ""
-        return f"SELECT {self.columns.packed()} FROM {source}{where}{group_by}{qualify}"
+        if self.order_by is not None:
+            order_by = f" ORDER BY {', '.join(self.order_by)}"
+        else:
+            order_by = ""
+        limit = self._limit()
+        if limit:
+            limit = f" {limit}"
+        return f"SELECT {self.columns.packed()} FROM {source}{where}{group_by}{qualify}{order_by}{limit}"
+
+    @override
+    @memoized
+    def wire(self) -> str:
+        source = self.source.wire()
+        if isinstance(self.source, Query):
+            source = f"({source})"
+        if self.where is not None:
+            where = f" WHERE {self.where.wire()}"
+        else:
+            where = ""
+        if self.group_by is not None:
+            group_by = f" GROUP BY {','.join(self.group_by)}"
+        else:
+            group_by = ""
+        if self.qualify is not None:
+            qualify = f" QUALIFY {self.qualify.wire()}"
+        else:
+            qualify = ""
+        if self.order_by is not None:
+            order_by = f" ORDER BY {','.join(self.order_by)}"
+        else:
+            order_by = ""
+        limit = self._limit()
+        if limit:
+            limit = f" {limit}"
+        return f"SELECT {self.columns.wire()} FROM {source}{where}{group_by}{qualify}{order_by}{limit}"
 
     @override
+    @memoized
+    def packed_size(self) -> int:
+        "Computes the size of the compact representation of the query."
+
+        size = 13 + self.columns.packed_size() + self.source.packed_size()
+        if isinstance(self.source, Query):
+            size += 2
+        if self.where is not None:
+            size += 7 + self.where.packed_size()
+        if self.group_by is not None:
+            size += 10 + utf8_len(", ".join(self.group_by))
+        if self.qualify is not None:
+            size += 9 + self.qualify.packed_size()
+        if self.order_by is not None:
+            size += 10 + utf8_len(", ".join(self.order_by))
+        limit = self._limit()
+        if limit:
+            size += 1 + len(limit)
+        return size
+
+    @override
+    @memoized
     def spacious(self) -> str:
         source = self.source.spacious()
         if isinstance(self.source, Query):
@@ -274,4 +713,172 @@ class Query(SourceExpr):
             qualify = f"\nQUALIFY\n{indent(str(self.qualify))}"
         else:
             qualify = ""
-        return f"SELECT\n{indent(self.columns.spacious())}\nFROM\n{indent(source)}{where}{group_by}{qualify}"
+        if self.order_by is not None:
+            order_by = f"\nORDER BY {', '.join(self.order_by)}"
+        else:
+            order_by = ""
+        limit = self._limit()
+        if limit:
+            limit = f"\n{limit}"
+        return f"SELECT\n{indent(self.columns.spacious())}\nFROM\n{indent(source)}{where}{group_by}{qualify}{order_by}{limit}"
+
+
+@final
+class UnionAll(Printable):
+    "Concatenates the results of queries with the same number and type of columns, keeping duplicates."
+
+    __slots__ = ("queries",)
+
+    queries: tuple[Query, ...]
+
+    def __init__(self, queries: Iterable[Query]) -> None:
+        object.__setattr__(self, "queries", tuple(queries))
+        if not self.queries:
+            raise ValueError("expected: at least one query to combine")
+
+    def __eq__(self, op: object) -> bool:
+        return isinstance(op, UnionAll) and self.queries == op.queries
+
+    def __hash__(self) -> int:
+        return hash(("UNION ALL", self.queries))
+
+    @override
+    @memoized
+    def packed(self) -> str:
+        return " UNION ALL ".join(q.packed() for q in self.queries)
+
+    @override
+    @memoized
+    def wire(self) -> str:
+        return " UNION ALL ".join(q.wire() for q in self.queries)
+
+    @override
+    @memoized
+    def packed_size(self) -> int:
+        return sum(q.packed_size() for q in self.queries) + 11 * (len(self.queries) - 1)
+
+    @override
+    @memoized
+    def spacious(self) -> str:
+        return "\nUNION ALL\n".join(q.spacious() for q in self.queries)
+
+
+class SubqueryPredicate(Predicate):
+    "A predicate that tests the result of a sub-query."
+
+    __slots__ = ("query",)
+
+    query: Query
+
+    def __init__(self, query: Query) -> None:
+        object.__setattr__(self, "query", query)
+
+
+@final
+class Exists(SubqueryPredicate):
+    "A semi-join predicate that is true if the (possibly correlated) sub-query returns any rows."
+
+    def __eq__(self, op: object) -> bool:
+        return isinstance(op, Exists) and self.query == op.query
+
+    def __hash__(self) -> int:
+        return hash(("EXISTS", self.query))
+
+    @override
+    @memoized
+    def packed(self) -> str:
+        return f"EXISTS ({self.query.packed()})"
+
+    @override
+    @memoized
+    def wire(self) -> str:
+        return f"EXISTS({self.query.wire()})"
+
+    @override
+    @memoized
+    def packed_size(self) -> int:
+        return 9 + self.query.packed_size()
+
+    @override
+    @memoized
+    def spacious(self) -> str:
+        return f"EXISTS (\n{indent(self.query.spacious())}\n)"
+
+
+@final
+class NotExists(SubqueryPredicate):
+    "An anti-join predicate that is true if the (possibly correlated) sub-query returns no rows."
+
+    def __eq__(self, op: object) -> bool:
+        return isinstance(op, NotExists) and self.query == op.query
+
+    def __hash__(self) -> int:
+        return hash(("NOT EXISTS", self.query))
+
+    @override
+    @memoized
+    def packed(self) -> str:
+        return f"NOT EXISTS ({self.query.packed()})"
+
+    @override
+    @memoized
+    def wire(self) -> str:
+        return f"NOT EXISTS({self.query.wire()})"
+
+    @override
+    @memoized
+    def packed_size(self) -> int:
+        return 13 + self.query.packed_size()
+
+    @override
+    @memoized
+    def spacious(self) -> str:
+        return f"NOT EXISTS (\n{indent(self.query.spacious())}\n)"
+
+
+@final
+class InSubquery(SubqueryPredicate):
+    "A semi-join predicate that is true if the value of an expression is among the values the sub-query returns."
+
+    __slots__ = ("expr",)
+
+    expr: str
+
+    def __init__(self, expr: str, query: Query) -> None:
+        """
+        :param expr: An expression over the outer query, or a parenthesized list of expressions.
+        :param query: A sub-query whose SELECT list matches the expression (or expressions) in number and type.
+        """
+
+        super().__init__(query)
+        object.__setattr__(self, "expr", expr)
+
+    def __eq__(self, op: object) -> bool:
+        return (
+            isinstance(op, InSubquery)
+            and self.expr == op.expr
+            and self.query == op.query
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.expr, self.query))
+
+    @override
+    @memoized
+    def packed(self) -> str:
+        return f"{self.expr} IN ({self.query.packed()})"
+
+    @override
+    @memoized
+    def wire(self) -> str:
+        return f"{self.expr} IN({self.query.wire()})"
+
+    @override
+    @memoized
+    def packed_size(self) -> int:
+        return utf8_len(self.expr) + 6 + self.query.packed_size()
+
+    @override
+    @memoized
+    def spacious(self) -> str:
+        return f"{self.expr} IN (\n{indent(self.query.spacious())}\n)"
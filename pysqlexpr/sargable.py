@@ -0,0 +1,267 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import datetime
+import re
+from typing import Mapping
+
+from ._patterns import IDENTIFIER, STRING_LITERAL
+from .boolean import BoolExpr, ConjExpr, ReturnsBool
+from .table import DataType, DateTimeType, DateType, Table
+
+# A predicate that wraps a column in a function prevents Snowflake from pruning micro-partitions by the min/max
+# metadata of the column. A predicate of the form `f(col) <op> <literal>` where `f` is monotonic (e.g. truncation to
+# date, month or year) is equivalent to a half-open range on the bare column `col`, which is prunable.
+
+_COLUMN = rf"(?P<column>(?:{IDENTIFIER}\.)?{IDENTIFIER})"
+_OP = r"\s*(?P<op>=|>=|<=|>|<)\s*"
+_DATE = r"(?:DATE\s*)?'(?P<date>\d{4}-\d{2}-\d{2})'(?:\s*::\s*DATE)?"
+_YEAR = r"'?(?P<year>\d{4})'?"
+
+_UNITS = {
+    "YEAR": "year",
+    "YYYY": "year",
+    "MONTH": "month",
+    "YYYY-MM": "month",
+    "DAY": "day",
+    "YYYY-MM-DD": "day",
+}
+
+_PATTERNS: list[tuple[re.Pattern[str], str | None]] = [
+    # DATE(col) = '2024-01-01', TO_DATE(col) = ..., col::DATE = ..., CAST(col AS DATE) = ...
+    (
+        re.compile(rf"(?:TO_DATE|DATE)\(\s*{_COLUMN}\s*\){_OP}{_DATE}", re.IGNORECASE),
+        "day",
+    ),
+    (re.compile(rf"{_COLUMN}\s*::\s*DATE{_OP}{_DATE}", re.IGNORECASE), "day"),
+    (
+        re.compile(rf"CAST\(\s*{_COLUMN}\s+AS\s+DATE\s*\){_OP}{_DATE}", re.IGNORECASE),
+        "day",
+    ),
+    # YEAR(col) = 2024, EXTRACT(YEAR FROM col) = 2024
+    (re.compile(rf"YEAR\(\s*{_COLUMN}\s*\){_OP}{_YEAR}", re.IGNORECASE), "year"),
+    (
+        re.compile(
+            rf"EXTRACT\(\s*YEAR\s+FROM\s+{_COLUMN}\s*\){_OP}{_YEAR}", re.IGNORECASE
+        ),
+        "year",
+    ),
+    # TO_CHAR(col, 'YYYY-MM') = '2024-01'
+    (
+        re.compile(
+            rf"TO_(?:CHAR|VARCHAR)\(\s*{_COLUMN}\s*,\s*'(?P<unit>YYYY|YYYY-MM|YYYY-MM-DD)'\s*\){_OP}"
+            r"'(?P<text>\d{4}(?:-\d{2}(?:-\d{2})?)?)'",
+            re.IGNORECASE,
+        ),
+        None,
+    ),
+    # DATE_TRUNC('month', col) = '2024-01-01'
+    (
+        re.compile(
+            rf"DATE_TRUNC\(\s*'(?P<unit>YEAR|MONTH|DAY)'\s*,\s*{_COLUMN}\s*\){_OP}{_DATE}",
+            re.IGNORECASE,
+        ),
+        None,
+    ),
+]
+
+_FUNCTION_CALL = re.compile(rf"{IDENTIFIER}\s*\((?P<args>[^()]*)\)")
+_CAST = re.compile(rf"{_COLUMN}\s*::")
+
+
+def _next(start: datetime.date, unit: str) -> datetime.date:
+    "Returns the start of the period that follows the period starting at the given date."
+
+    if unit == "year":
+        return start.replace(year=start.year + 1)
+    elif unit == "month":
+        if start.month == 12:
+            return start.replace(year=start.year + 1, month=1)
+        else:
+            return start.replace(month=start.month + 1)
+    else:
+        return start + datetime.timedelta(days=1)
+
+
+def _is_aligned(start: datetime.date, unit: str) -> bool:
+    if unit == "year":
+        return start.month == 1 and start.day == 1
+    elif unit == "month":
+        return start.day == 1
+    else:
+        return True
+
+
+def _literal(data_type: DataType, value: datetime.date) -> str:
+    if isinstance(data_type, DateTimeType):
+        return f"TIMESTAMP '{value.isoformat()} 00:00:00'"
+    else:
+        return f"DATE '{value.isoformat()}'"
+
+
+class SargableResult:
+    "The outcome of rewriting function-wrapped column predicates into range predicates."
+
+    __slots__ = ("expr", "rewritten", "unsargable")
+
+    expr: BoolExpr
+    rewritten: list[ReturnsBool]
+    unsargable: list[ReturnsBool]
+
+    def __init__(
+        self,
+        expr: BoolExpr,
+        rewritten: list[ReturnsBool],
+        unsargable: list[ReturnsBool],
+    ) -> None:
+        """
+        :param expr: The rewritten expression.
+        :param rewritten: Original predicates that have been replaced with range predicates.
+        :param unsargable: Predicates that wrap a date or timestamp column in a function but could not be rewritten.
+        """
+
+        self.expr = expr
+        self.rewritten = rewritten
+        self.unsargable = unsargable
+
+
+class _Rewriter:
+    __slots__ = ("columns", "rewritten", "unsargable")
+
+    columns: dict[str, DataType]
+    rewritten: list[ReturnsBool]
+    unsargable: list[ReturnsBool]
+
+    def __init__(self, columns: dict[str, DataType]) -> None:
+        self.columns = columns
+        self.rewritten = []
+        self.unsargable = []
+
+    def lookup(self, column: str) -> DataType | None:
+        "Returns the data type of a (possibly qualified) column if it is a date or timestamp column."
+
+        data_type = self.columns.get(column.split(".")[-1].upper())
+        if isinstance(data_type, (DateType, DateTimeType)):
+            return data_type
+        else:
+            return None
+
+    def wraps_column(self, text: str) -> bool:
+        "True if a date or timestamp column is passed to a function or cast in the predicate text."
+
+        text = STRING_LITERAL.sub("''", text)
+        for m in _FUNCTION_CALL.finditer(text):
+            for token in re.findall(
+                rf"(?:{IDENTIFIER}\.)?{IDENTIFIER}", m.group("args")
+            ):
+                if self.lookup(token) is not None:
+                    return True
+        for m in _CAST.finditer(text):
+            if self.lookup(m.group("column")) is not None:
+                return True
+        return False
+
+    def __call__(self, predicate: BoolExpr) -> BoolExpr:
+        if not isinstance(predicate, ReturnsBool):
+            return predicate
+
+        text = predicate.expr.strip()
+        for pattern, fixed_unit in _PATTERNS:
+            m = pattern.fullmatch(text)
+            if m is None:
+                continue
+            column = m.group("column")
+            data_type = self.lookup(column)
+            if data_type is None:
+                continue
+            result = self.rewrite(column, data_type, m, fixed_unit)
+            if result is not None:
+                self.rewritten.append(predicate)
+                return result
+
+        if self.wraps_column(text):
+            self.unsargable.append(predicate)
+        return predicate
+
+    def rewrite(
+        self,
+        column: str,
+        data_type: DataType,
+        m: re.Match[str],
+        fixed_unit: str | None,
+    ) -> BoolExpr | None:
+        unit = fixed_unit or _UNITS[m.group("unit").upper()]
+        groups = m.groupdict()
+        try:
+            if groups.get("date") is not None:
+                start = datetime.date.fromisoformat(groups["date"])
+            elif groups.get("year") is not None:
+                start = datetime.date(int(groups["year"]), 1, 1)
+            else:
+                text: str = groups["text"]
+                if len(text) != {"year": 4, "month": 7, "day": 10}[unit]:
+                    return None
+                parts = [int(p) for p in text.split("-")] + [1, 1]
+                start = datetime.date(parts[0], parts[1], parts[2])
+        except ValueError:
+            return None
+        if not _is_aligned(start, unit):
+            return None
+
+        op = m.group("op")
+        if op == ">=":
+            return ReturnsBool(f"{column} >= {_literal(data_type, start)}")
+        elif op == "<":
+            return ReturnsBool(f"{column} < {_literal(data_type, start)}")
+
+        try:
+            end = _next(start, unit)
+        except (ValueError, OverflowError):
+            # the period is the last one that Python dates represent, e.g. year 9999
+            return None
+        lower = ReturnsBool(f"{column} >= {_literal(data_type, start)}")
+        upper = ReturnsBool(f"{column} < {_literal(data_type, end)}")
+        if op == "=":
+            return ConjExpr([lower, upper])
+        elif op == ">":
+            return ReturnsBool(f"{column} >= {_literal(data_type, end)}")
+        elif op == "<=":
+            return upper
+        else:
+            return None
+
+
+def make_sargable(
+    expr: BoolExpr, columns: Table | Mapping[str, DataType]
+) -> SargableResult:
+    """
+    Rewrites predicates that wrap a date or timestamp column in a function into range predicates on the bare column.
+
+    Recognized forms (where `<op>` is one of `=`, `<`, `<=`, `>`, `>=`):
+
+    * `DATE(col) <op> '2024-01-01'`, also with `TO_DATE(col)`, `col::DATE` or `CAST(col AS DATE)`
+    * `YEAR(col) <op> 2024` and `EXTRACT(YEAR FROM col) <op> 2024`
+    * `TO_CHAR(col, 'YYYY-MM') <op> '2024-01'`, also with format `YYYY` or `YYYY-MM-DD`
+    * `DATE_TRUNC('month', col) <op> '2024-01-01'`, also with unit `year` or `day`
+
+    For example, `DATE(event_ts) = '2024-01-01'` becomes
+    `event_ts >= TIMESTAMP '2024-01-01 00:00:00' AND event_ts < TIMESTAMP '2024-01-02 00:00:00'`.
+
+    :param expr: The Boolean expression to rewrite.
+    :param columns: The table whose columns the predicates reference, or a mapping from column name to data type.
+        Column names are matched without regard to case or qualification.
+    """
+
+    if isinstance(columns, Table):
+        types = {
+            column.name.raw.upper(): column.data_type for column in columns.columns
+        }
+    else:
+        types = {name.upper(): data_type for name, data_type in columns.items()}
+
+    rewriter = _Rewriter(types)
+    result = expr.transform(rewriter)
+    return SargableResult(result, rewriter.rewritten, rewriter.unsargable)
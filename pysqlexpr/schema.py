@@ -0,0 +1,269 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import functools
+import hashlib
+import json
+from concurrent.futures import Executor
+from typing import Iterable, Iterator, Mapping, TextIO
+
+from .identifier import Identifier
+from .table import Column, Table, sql_quoted_string
+
+# The manifest records a fingerprint for each table, which is a JSON array of the parts of the table definition that
+# change independently: a hash of the structure (columns, data types, defaults, constraints and whether the table is
+# transient), a hash of the comments, the clustering key, the data retention time and the names of the columns with
+# search optimization. Only a change in structure re-creates the table, which drops its data. Other changes are made
+# with `ALTER TABLE`. Physical design options are recorded as they are (rather than as a hash) such that the previous
+# definition of the table can be compared with the current one, and only the difference is applied.
+
+
+def _hash(value: object) -> str:
+    return hashlib.sha256(repr(value).encode("utf-8")).hexdigest()[:16]
+
+
+def _fingerprint(table: Table) -> str:
+    "Computes the fingerprint of a table definition."
+
+    structure = (
+        table.name.raw.upper(),
+        table.transient,
+        tuple(
+            (c.name.raw.upper(), str(c.data_type), c.nullable, c.unique, c.default)
+            for c in table.columns
+        ),
+        (
+            tuple(name.upper() for name in table.primary_key)
+            if table.primary_key is not None
+            else None
+        ),
+        tuple(tuple(name.upper() for name in key) for key in table.unique_keys),
+    )
+    comments = (
+        table.description or None,
+        tuple(c.description for c in table.columns),
+    )
+    parts = [
+        _hash(structure),
+        _hash(comments),
+        table.cluster_by,
+        table.data_retention_time_in_days,
+        [c.name.raw.upper() for c in table.search_optimization_columns],
+    ]
+    return json.dumps(parts, separators=(",", ":"))
+
+
+def _render_table(table: Table, *, replace: bool) -> tuple[str, str]:
+    "Emits the statement that creates a table, and the fingerprint of the table."
+
+    return "\n".join(table.create_stmts(replace=replace)), _fingerprint(table)
+
+
+def _alter_stmts(table: Table, known: str, fingerprint: str) -> list[str] | None:
+    """
+    Emits statements that change a table to match its current definition, except for its structure.
+
+    :param table: The current definition of the table.
+    :param known: The fingerprint of the previous definition of the table, as recorded in the manifest.
+    :param fingerprint: The fingerprint of the current definition of the table.
+    :returns: Statements to apply, or `None` if the structure of the table has changed (or the fingerprint of its
+        previous definition is in an earlier format) such that the table has to be re-created.
+    """
+
+    try:
+        previous = json.loads(known)
+    except ValueError:
+        return None
+    if not isinstance(previous, list) or len(previous) != 5:
+        return None
+    structure, comments, cluster_by, retention, search = previous
+    current = json.loads(fingerprint)
+    if structure != current[0]:
+        return None
+
+    # the previous definition of the table differs from the current one only in its comments and physical design
+    # options, the former of which are emitted in full
+    source = Table(
+        table.name.raw,
+        (
+            Column(
+                c.name.raw,
+                c.data_type,
+                nullable=c.nullable,
+                default=c.default,
+                search_optimization=c.name.raw.upper() in search,
+                unique=c.unique,
+            )
+            for c in table.columns
+        ),
+        transient=table.transient,
+        cluster_by=cluster_by,
+        data_retention_time_in_days=retention,
+    )
+    statements: list[str] = []
+    if comments != current[1]:
+        statements.extend(table.comment_stmts())
+    statements.extend(table.alter_stmts(source))
+    return statements
+
+
+class Schema:
+    "A collection of tables in a Snowflake schema, indexed by name."
+
+    __slots__ = ("name", "tables", "description", "index")
+
+    name: Identifier
+    tables: tuple[Table, ...]
+    description: str | None
+    index: dict[str, Table]
+
+    def __init__(
+        self, name: str, tables: Iterable[Table], *, description: str | None = None
+    ) -> None:
+        self.name = Identifier(name)
+        self.tables = tuple(tables)
+        self.description = description
+        self.index = {}
+        for table in self.tables:
+            # unquoted identifiers are case-insensitive
+            key = table.name.raw.upper()
+            if key in self.index:
+                raise ValueError(f"duplicate table: {table.name.raw}")
+            self.index[key] = table
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def __iter__(self) -> Iterator[Table]:
+        return iter(self.tables)
+
+    def __contains__(self, name: str) -> bool:
+        return name.upper() in self.index
+
+    def __getitem__(self, name: str) -> Table:
+        return self.index[name.upper()]
+
+    def as_stmt(self) -> str:
+        "Emits a SQL statement for creating the schema."
+
+        comment = (
+            f" COMMENT = {sql_quoted_string(self.description)}"
+            if self.description
+            else ""
+        )
+        return f"CREATE SCHEMA IF NOT EXISTS {self.name}{comment};"
+
+    def _render(
+        self, *, replace: bool, executor: Executor | None
+    ) -> Iterator[tuple[Table, str, str]]:
+        "Emits the statement and the fingerprint of each table, in order of declaration."
+
+        render = functools.partial(_render_table, replace=replace)
+        if executor is not None:
+            results = executor.map(render, self.tables, chunksize=64)
+        else:
+            results = map(render, self.tables)
+        for table, (statement, fingerprint) in zip(self.tables, results):
+            yield table, statement, fingerprint
+
+    def manifest(self, *, executor: Executor | None = None) -> dict[str, str]:
+        """
+        Computes the fingerprint of each table in the schema.
+
+        The result maps table names to fingerprints, and may be persisted (e.g. as JSON) to emit incremental scripts
+        later on.
+        """
+
+        if executor is not None:
+            fingerprints = executor.map(_fingerprint, self.tables, chunksize=64)
+        else:
+            fingerprints = map(_fingerprint, self.tables)
+        return {
+            table.name.raw: fingerprint
+            for table, fingerprint in zip(self.tables, fingerprints)
+        }
+
+    def statements(
+        self,
+        *,
+        replace: bool = False,
+        manifest: Mapping[str, str] | None = None,
+        executor: Executor | None = None,
+        updated: dict[str, str] | None = None,
+    ) -> Iterator[str]:
+        """
+        Emits SQL statements for creating the schema and its tables.
+
+        In incremental mode, only tables that differ from the fingerprint stored in the manifest are emitted. A new
+        table, or a table whose columns, data types or constraints have changed, is emitted with `CREATE OR REPLACE`.
+        Changes to comments, the clustering key, the data retention time or search optimization are made with
+        `ALTER TABLE`, which keeps the data in the table. Tables in the manifest that are no longer in the schema are
+        dropped. Table names are matched without regard to case.
+
+        :param replace: True for `CREATE OR REPLACE`. False for `CREATE`.
+        :param manifest: Fingerprints of tables in a previous version of the schema, for incremental mode.
+        :param executor: An executor used to render tables in parallel, preserving order of declaration.
+        :param updated: A dictionary populated with the fingerprint of each table in the schema.
+        """
+
+        yield self.as_stmt()
+        yield f"USE SCHEMA {self.name};"
+
+        previous = (
+            {name.upper(): fingerprint for name, fingerprint in manifest.items()}
+            if manifest is not None
+            else {}
+        )
+        for table, statement, fingerprint in self._render(
+            replace=replace or manifest is not None, executor=executor
+        ):
+            if updated is not None:
+                updated[table.name.raw] = fingerprint
+            if manifest is None:
+                yield statement
+                continue
+
+            known = previous.get(table.name.raw.upper())
+            if known == fingerprint:
+                continue
+            statements = (
+                _alter_stmts(table, known, fingerprint) if known is not None else None
+            )
+            if statements is not None:
+                yield from statements
+            else:
+                yield statement
+
+        if manifest is not None:
+            for name in manifest:
+                if name.upper() not in self.index:
+                    yield f"DROP TABLE IF EXISTS {Identifier(name)};"
+
+    def write(
+        self,
+        fp: TextIO,
+        *,
+        replace: bool = False,
+        manifest: Mapping[str, str] | None = None,
+        executor: Executor | None = None,
+    ) -> dict[str, str]:
+        """
+        Writes a SQL script for creating the schema and its tables to a file, one statement at a time.
+
+        :param fp: A file-like object opened in text mode.
+        :param replace: True for `CREATE OR REPLACE`. False for `CREATE`.
+        :param manifest: Fingerprints of tables in a previous version of the schema, for incremental mode.
+        :param executor: An executor used to render tables in parallel, preserving order of declaration.
+        :returns: The manifest for the current version of the schema.
+        """
+
+        updated: dict[str, str] = {}
+        for statement in self.statements(
+            replace=replace, manifest=manifest, executor=executor, updated=updated
+        ):
+            fp.write(statement)
+            fp.write("\n")
+        return updated
@@ -0,0 +1,492 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import inspect
+import mmap
+from typing import Any, Callable, TypeVar
+
+from . import aggregate, query, table
+from .boolean import ConjExpr, DisjExpr, ReturnsBool
+from .identifier import Identifier
+
+# A serialized payload is laid out as follows:
+#
+#   magic (4 bytes) | version (1 byte) | string count (varint) | strings... | root value
+#
+# Each string in the string table is a varint length followed by UTF-8 bytes. Each value is a single tag byte
+# followed by a tag-specific payload. Strings in the value stream are varint references into the string table, which
+# deduplicates identifiers and expression text that occur several times in a tree or a catalog of trees.
+#
+# The version is incremented whenever the fields encoded for a registered type change, because such a payload would
+# be decoded with misaligned fields. Registering a new type needs no new version.
+
+_MAGIC = b"PSQX"
+_VERSION = 2
+
+_TAG_NONE = 0
+_TAG_FALSE = 1
+_TAG_TRUE = 2
+_TAG_INT = 3
+_TAG_STR = 4
+_TAG_LIST = 5
+_TAG_DICT = 6
+
+Buffer = bytes | bytearray | memoryview | mmap.mmap
+
+T = TypeVar("T")
+
+_Encoder = Callable[[Any], tuple[Any, ...]]
+_Decoder = Callable[..., Any]
+
+_encoders: dict[type, tuple[int, _Encoder]] = {}
+_decoders: dict[int, tuple[int, _Decoder]] = {}
+
+
+def _register(
+    tag: int, cls: type[T], encode: Callable[[T], tuple[Any, ...]], decode: _Decoder
+) -> None:
+    "Associates a node type with a tag, a function that extracts its fields, and a function that rebuilds it."
+
+    if tag in _decoders:
+        raise ValueError(f"duplicate tag: {tag}")
+    _encoders[cls] = (tag, encode)
+    _decoders[tag] = (len(inspect.signature(decode).parameters), decode)
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+class _Writer:
+    "Encodes values into a tagged binary stream, collecting strings into a shared string table."
+
+    __slots__ = ("body", "strings")
+
+    body: bytearray
+    strings: dict[str, int]
+
+    def __init__(self) -> None:
+        self.body = bytearray()
+        self.strings = {}
+
+    def write(self, value: Any) -> None:
+        out = self.body
+        if value is None:
+            out.append(_TAG_NONE)
+        elif value is True:
+            out.append(_TAG_TRUE)
+        elif value is False:
+            out.append(_TAG_FALSE)
+        elif isinstance(value, int):
+            out.append(_TAG_INT)
+            _write_varint(out, (-value << 1) - 1 if value < 0 else value << 1)
+        elif isinstance(value, str):
+            out.append(_TAG_STR)
+            self.write_str(value)
+        elif isinstance(value, (list, tuple)):
+            out.append(_TAG_LIST)
+            _write_varint(out, len(value))
+            for item in value:
+                self.write(item)
+        elif isinstance(value, dict):
+            out.append(_TAG_DICT)
+            _write_varint(out, len(value))
+            for key, item in value.items():
+                if not isinstance(key, str):
+                    raise TypeError(f"expected: `str` key; got: {type(key).__name__}")
+                self.write_str(key)
+                self.write(item)
+        else:
+            try:
+                tag, encode = _encoders[type(value)]
+            except KeyError:
+                raise TypeError(
+                    f"cannot serialize object of type `{type(value).__name__}`"
+                ) from None
+            out.append(tag)
+            for field in encode(value):
+                self.write(field)
+
+    def write_str(self, value: str) -> None:
+        index = self.strings.get(value)
+        if index is None:
+            index = len(self.strings)
+            self.strings[value] = index
+        _write_varint(self.body, index)
+
+    def getvalue(self) -> bytes:
+        header = bytearray(_MAGIC)
+        header.append(_VERSION)
+        _write_varint(header, len(self.strings))
+        for value in self.strings:
+            data = value.encode("utf-8")
+            _write_varint(header, len(data))
+            header.extend(data)
+        return bytes(header + self.body)
+
+
+class _Reader:
+    """
+    Decodes values from a tagged binary stream.
+
+    The reader operates on a memory view of the original buffer. The string table is indexed when the reader is
+    created, but individual strings are only decoded when first referenced.
+    """
+
+    __slots__ = ("view", "offset", "bounds", "strings")
+
+    view: memoryview
+    offset: int
+    bounds: list[tuple[int, int]]
+    strings: list[str | None]
+
+    def __init__(self, view: memoryview) -> None:
+        if view[:4] != _MAGIC:
+            raise ValueError("not a serialized expression tree")
+        if len(view) < 5:
+            raise ValueError("truncated header")
+        if view[4] != _VERSION:
+            raise ValueError(f"unsupported serialization format version: {view[4]}")
+        self.view = view
+        self.offset = 5
+
+        count = self.read_varint()
+        bounds: list[tuple[int, int]] = []
+        for _ in range(count):
+            length = self.read_varint()
+            start = self.offset
+            self.offset += length
+            bounds.append((start, self.offset))
+        if self.offset > len(view):
+            raise ValueError("truncated string table")
+        self.bounds = bounds
+        self.strings = [None] * count
+
+    def read_varint(self) -> int:
+        view = self.view
+        result = 0
+        shift = 0
+        while True:
+            try:
+                byte = view[self.offset]
+            except IndexError:
+                raise ValueError("unexpected end of data") from None
+            self.offset += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def read_str(self) -> str:
+        index = self.read_varint()
+        value = self.strings[index]
+        if value is None:
+            start, end = self.bounds[index]
+            value = str(self.view[start:end], "utf-8")
+            self.strings[index] = value
+        return value
+
+    def read(self) -> Any:
+        try:
+            tag = self.view[self.offset]
+        except IndexError:
+            raise ValueError("unexpected end of data") from None
+        self.offset += 1
+
+        if tag == _TAG_NONE:
+            return None
+        elif tag == _TAG_TRUE:
+            return True
+        elif tag == _TAG_FALSE:
+            return False
+        elif tag == _TAG_INT:
+            value = self.read_varint()
+            return -((value + 1) >> 1) if value & 1 else value >> 1
+        elif tag == _TAG_STR:
+            return self.read_str()
+        elif tag == _TAG_LIST:
+            return [self.read() for _ in range(self.read_varint())]
+        elif tag == _TAG_DICT:
+            result: dict[str, Any] = {}
+            for _ in range(self.read_varint()):
+                key = self.read_str()
+                result[key] = self.read()
+            return result
+
+        try:
+            arity, decode = _decoders[tag]
+        except KeyError:
+            raise ValueError(f"unrecognized tag: {tag}") from None
+        return decode(*(self.read() for _ in range(arity)))
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serializes an expression tree into a compact binary representation.
+
+    :param obj: A node such as a `Query`, `BoolExpr` or `Table`, or a (nested) `list` or `dict` of nodes.
+    :returns: A byte string that can be passed to `loads`.
+    """
+
+    writer = _Writer()
+    writer.write(obj)
+    return writer.getvalue()
+
+
+def loads(data: Buffer) -> Any:
+    """
+    Reconstructs an expression tree from its compact binary representation.
+
+    The input buffer is not copied. Passing a `memoryview` of a memory-mapped file decodes directly from the mapped
+    pages.
+
+    :param data: A byte string, `memoryview` or memory-mapped file produced by `dumps`.
+    :returns: The deserialized node, or the `list` or `dict` of nodes.
+    """
+
+    with memoryview(data) as buffer, buffer.cast("B") as view:
+        reader = _Reader(view)
+        value = reader.read()
+        if reader.offset != len(view):
+            raise ValueError("trailing data after serialized value")
+        return value
+
+
+# identifiers
+_register(
+    10,
+    Identifier,
+    lambda o: (o.identifier, o.path),
+    lambda identifier, path: Identifier(identifier, path=path),
+)
+
+# Boolean expressions
+_register(20, ReturnsBool, lambda o: (o.expr,), lambda expr: ReturnsBool(expr))
+_register(21, ConjExpr, lambda o: (o.operands,), lambda operands: ConjExpr(operands))
+_register(22, DisjExpr, lambda o: (o.operands,), lambda operands: DisjExpr(operands))
+
+# queries
+_register(
+    30,
+    query.Column,
+    lambda o: (o.expr, o.name),
+    lambda expr, name: query.Column(expr, name=name),
+)
+_register(
+    31,
+    query.ColumnList,
+    lambda o: (o.columns,),
+    lambda columns: query.ColumnList(columns),
+)
+_register(
+    32,
+    query.FromExpr,
+    lambda o: (o.expr, o.name, o.sample, o.statistics),
+    lambda expr, name, sample, statistics: query.FromExpr(
+        expr, name=name, sample=sample, statistics=statistics
+    ),
+)
+_register(
+    33,
+    query.Join,
+    lambda o: (o.left, o.right, o.condition),
+    lambda left, right, cond: query.Join(left, right, cond),
+)
+_register(
+    34,
+    query.LeftJoin,
+    lambda o: (o.left, o.right, o.condition),
+    lambda left, right, cond: query.LeftJoin(left, right, cond),
+)
+_register(
+    35,
+    query.RightJoin,
+    lambda o: (o.left, o.right, o.condition),
+    lambda left, right, cond: query.RightJoin(left, right, cond),
+)
+_register(
+    36,
+    query.LateralJoin,
+    lambda o: (o.left, o.right),
+    lambda left, right: query.LateralJoin(left, right),
+)
+_register(
+    37,
+    query.Query,
+    lambda o: (
+        o.source,
+        o.columns.columns,
+        o.where,
+        o.group_by,
+        o.qualify,
+        o.order_by,
+        o.limit,
+        o.offset,
+    ),
+    lambda source, columns, where, group_by, qualify, order_by, limit, offset: query.Query(
+        source,
+        columns,
+        where=where,
+        group_by=group_by,
+        qualify=qualify,
+        order_by=order_by,
+        limit=limit,
+        offset=offset,
+    ),
+)
+_register(
+    38,
+    query.Sample,
+    lambda o: (
+        None if o.probability is None else str(o.probability),
+        o.rows,
+        o.method,
+        o.seed,
+    ),
+    lambda probability, rows, method, seed: query.Sample(
+        None if probability is None else float(probability),
+        rows=rows,
+        method=method,
+        seed=seed,
+    ),
+)
+_register(
+    39,
+    query.UnionAll,
+    lambda o: (o.queries,),
+    lambda queries: query.UnionAll(queries),
+)
+
+# aggregates
+_register(
+    70,
+    aggregate.Count,
+    lambda o: (o.expr, o.distinct),
+    lambda expr, distinct: aggregate.Count(expr, distinct=distinct),
+)
+_register(71, aggregate.Sum, lambda o: (o.expr,), lambda expr: aggregate.Sum(expr))
+_register(72, aggregate.Avg, lambda o: (o.expr,), lambda expr: aggregate.Avg(expr))
+_register(73, aggregate.Min, lambda o: (o.expr,), lambda expr: aggregate.Min(expr))
+_register(74, aggregate.Max, lambda o: (o.expr,), lambda expr: aggregate.Max(expr))
+_register(
+    75,
+    aggregate.Percentile,
+    lambda o: (o.expr, str(o.fraction)),
+    lambda expr, fraction: aggregate.Percentile(expr, float(fraction)),
+)
+_register(
+    76,
+    aggregate.ApproxCountDistinct,
+    lambda o: (o.expr,),
+    lambda expr: aggregate.ApproxCountDistinct(expr),
+)
+_register(
+    77,
+    aggregate.ApproxPercentile,
+    lambda o: (o.expr, str(o.fraction)),
+    lambda expr, fraction: aggregate.ApproxPercentile(expr, float(fraction)),
+)
+
+# sub-query predicates
+_register(23, query.Exists, lambda o: (o.query,), lambda q: query.Exists(q))
+_register(24, query.NotExists, lambda o: (o.query,), lambda q: query.NotExists(q))
+_register(
+    25,
+    query.InSubquery,
+    lambda o: (o.expr, o.query),
+    lambda expr, q: query.InSubquery(expr, q),
+)
+
+# data types
+_register(40, table.BooleanType, lambda o: (), lambda: table.BOOLEAN)
+_register(
+    41,
+    table.NumberType,
+    lambda o: (o.precision, o.scale),
+    lambda precision, scale: table.NumberType(precision, scale),
+)
+_register(42, table.FloatType, lambda o: (), lambda: table.FLOAT)
+_register(
+    43, table.StringType, lambda o: (o.length,), lambda length: table.StringType(length)
+)
+_register(
+    44, table.BinaryType, lambda o: (o.length,), lambda length: table.BinaryType(length)
+)
+_register(45, table.DateType, lambda o: (), lambda: table.DATE)
+_register(
+    46,
+    table.TimeType,
+    lambda o: (o.precision,),
+    lambda precision: table.TimeType(precision),
+)
+_register(
+    47,
+    table.DateTimeType,
+    lambda o: (o.precision,),
+    lambda precision: table.DateTimeType(precision),
+)
+_register(48, table.VariantType, lambda o: (), lambda: table.VARIANT)
+_register(49, table.ArrayType, lambda o: (), lambda: table.ARRAY)
+_register(50, table.ObjectType, lambda o: (), lambda: table.OBJECT)
+
+# tables
+_register(
+    60,
+    table.Column,
+    lambda o: (
+        o.name.identifier,
+        o.data_type,
+        o.nullable,
+        o.default,
+        o.description,
+        o.search_optimization,
+        o.unique,
+    ),
+    lambda name, data_type, nullable, default, description, search, unique: table.Column(
+        name,
+        data_type,
+        nullable=nullable,
+        default=default,
+        description=description,
+        search_optimization=search,
+        unique=unique,
+    ),
+)
+_register(
+    61,
+    table.Table,
+    lambda o: (
+        o.name.identifier,
+        o.columns,
+        o.description,
+        o.transient,
+        o.cluster_by,
+        o.data_retention_time_in_days,
+        o.primary_key,
+        o.unique_keys,
+        o.statistics,
+    ),
+    lambda name, columns, description, transient, cluster_by, retention, primary_key, unique_keys, statistics: table.Table(
+        name,
+        columns,
+        description=description,
+        transient=transient,
+        cluster_by=cluster_by,
+        data_retention_time_in_days=retention,
+        primary_key=primary_key,
+        unique_keys=unique_keys,
+        statistics=statistics,
+    ),
+)
+_register(
+    62,
+    table.Statistics,
+    lambda o: (o.row_count, dict(o.distinct_values)),
+    lambda row_count, distinct_values: table.Statistics(row_count, distinct_values),
+)
@@ -0,0 +1,321 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Iterable, Iterator
+
+from ._patterns import AGGREGATE, STRING_LITERAL, WINDOW
+from .aggregate import Aggregate
+from .boolean import BoolExpr, ConjExpr, DisjExpr, LogicalExpr, ReturnsBool
+from .indentation import Printable, utf8_len
+from .query import FromExpr, JoinExpr, LateralJoin, Query
+from .table import Table
+
+MAX_STATEMENT_SIZE = 1024 * 1024
+"Maximum size of the text of a SQL statement accepted by Snowflake, in bytes."
+
+_LITERAL = re.compile(rf"{STRING_LITERAL.pattern}|-?\d+(?:\.\d+)?")
+_OPERAND = r'[\w$.:"]+'
+_EQUALS_LITERAL = re.compile(
+    rf"\s*(?P<lhs>{_OPERAND})\s*=\s*(?P<literal>{_LITERAL.pattern})\s*"
+)
+_IN_LITERALS = re.compile(
+    rf"\s*(?P<lhs>{_OPERAND})\s+IN\s*\((?P<literals>\s*(?:{_LITERAL.pattern})(?:\s*,\s*(?:{_LITERAL.pattern}))*)\s*\)\s*",
+    re.IGNORECASE,
+)
+
+
+class StatementTooLargeError(ValueError):
+    "Raised when the text of a SQL statement would exceed the size limit."
+
+    size: int
+    limit: int
+
+    def __init__(self, size: int, limit: int) -> None:
+        super().__init__(
+            f"statement size of {size} bytes exceeds limit of {limit} bytes"
+        )
+        self.size = size
+        self.limit = limit
+
+
+class SizeReport:
+    "The size of the compact representation of a node, broken down by sub-tree."
+
+    __slots__ = ("label", "size", "children")
+
+    label: str
+    size: int
+    children: tuple["SizeReport", ...]
+
+    def __init__(
+        self, label: str, size: int, children: Iterable["SizeReport"] = ()
+    ) -> None:
+        self.label = label
+        self.size = size
+        self.children = tuple(children)
+
+    def lines(self, depth: int = 0) -> Iterator[str]:
+        yield f"{'    ' * depth}{self.label}: {self.size}"
+        for child in self.children:
+            yield from child.lines(depth + 1)
+
+    def __str__(self) -> str:
+        return "\n".join(self.lines())
+
+
+def size_report(node: Printable, label: str = "") -> SizeReport:
+    """
+    Breaks down the size of the compact representation of a node by sub-tree.
+
+    :param node: The root of the expression tree.
+    :param label: The label to assign to the root of the report.
+    """
+
+    label = label or type(node).__name__
+    children: list[SizeReport] = []
+    if isinstance(node, Query):
+        children.append(size_report(node.columns, "SELECT"))
+        children.append(size_report(node.source, "FROM"))
+        if node.where is not None:
+            children.append(size_report(node.where, "WHERE"))
+        if node.group_by is not None:
+            children.append(SizeReport("GROUP BY", utf8_len(", ".join(node.group_by))))
+        if node.qualify is not None:
+            children.append(size_report(node.qualify, "QUALIFY"))
+        if node.order_by is not None:
+            children.append(SizeReport("ORDER BY", utf8_len(", ".join(node.order_by))))
+    elif isinstance(node, LateralJoin):
+        children.append(size_report(node.left))
+        children.append(size_report(node.right))
+    elif isinstance(node, JoinExpr):
+        children.append(size_report(node.left))
+        children.append(size_report(node.right))
+        if node.condition is not None:
+            children.append(size_report(node.condition, "ON"))
+    elif isinstance(node, FromExpr):
+        if isinstance(node.expr, Printable):
+            children.append(size_report(node.expr))
+    elif isinstance(node, LogicalExpr):
+        children.extend(size_report(op) for op in node.operands)
+    return SizeReport(label, node.packed_size(), children)
+
+
+def check_size(node: Printable, limit: int = MAX_STATEMENT_SIZE) -> int:
+    """
+    Verifies that the compact representation of a node fits within the size limit, without rendering it.
+
+    :param node: The root of the expression tree.
+    :param limit: The maximum number of bytes permitted.
+    :returns: The size of the compact representation in bytes.
+    :raises StatementTooLargeError: Raised when the size exceeds the limit.
+    """
+
+    size = node.packed_size()
+    if size > limit:
+        raise StatementTooLargeError(size, limit)
+    return size
+
+
+def _is_aggregating(query: Query) -> bool:
+    "True if the query aggregates rows or computes window functions, whose results depend on all qualifying rows."
+
+    if query.group_by is not None or query.qualify is not None:
+        return True
+    for column in query.columns.columns:
+        if isinstance(column.expr, Aggregate):
+            return True
+        if AGGREGATE.search(column.expr) or WINDOW.search(column.expr):
+            return True
+    return any(WINDOW.search(o) for o in query.order_by or ())
+
+
+def _literal_value(literal: str) -> object:
+    "Returns a value that compares equal for literals Snowflake may coerce to equal values, e.g. `1` and `'1.0'`."
+
+    if literal.startswith("'"):
+        literal = literal[1:-1].replace("''", "'")
+    try:
+        return Decimal(literal)
+    except InvalidOperation:
+        return literal
+
+
+def _keys(op: BoolExpr) -> dict[str, set[object]]:
+    """
+    Returns the literals that an expression must equal for the operand to be satisfied, keyed by the expression, for
+    equality predicates (`a.id = 1`), membership tests (`a.id IN (1, 2)`), and conjunctions of these with others.
+    """
+
+    if isinstance(op, ConjExpr):
+        keys: dict[str, set[object]] = {}
+        for operand in op.operands:
+            for lhs, values in _keys(operand).items():
+                keys[lhs] = keys[lhs] & values if lhs in keys else values
+        return keys
+    if not isinstance(op, ReturnsBool):
+        return {}
+    m = _EQUALS_LITERAL.fullmatch(op.expr)
+    if m is not None:
+        return {m.group("lhs"): {_literal_value(m.group("literal"))}}
+    m = _IN_LITERALS.fullmatch(op.expr)
+    if m is not None:
+        literals = _LITERAL.findall(m.group("literals"))
+        return {m.group("lhs"): {_literal_value(literal) for literal in literals}}
+    return {}
+
+
+def _is_disjoint(operands: Iterable[BoolExpr]) -> bool:
+    """
+    True if no row can satisfy more than one of the operands, i.e. each operand requires the same expression to equal
+    one of a set of literals, and the sets are disjoint (e.g. `a.id = 1 OR (a.id = 2 AND a.x > 0) OR a.id IN (3, 4)`).
+    """
+
+    common: dict[str, set[object]] | None = None
+    for op in operands:
+        keys = _keys(op)
+        if common is None:
+            common = keys
+            continue
+        shared: dict[str, set[object]] = {}
+        for lhs, seen in common.items():
+            values = keys.get(lhs)
+            if values is not None and not (seen & values):
+                shared[lhs] = seen | values
+        common = shared
+        if not common:
+            return False
+    return bool(common)
+
+
+def split_disjunction(query: Query, limit: int = MAX_STATEMENT_SIZE) -> list[Query]:
+    """
+    Splits a query whose WHERE clause is a large disjunction into branches that each fit within the size limit.
+
+    Each branch keeps all parts of the original query except the WHERE clause, which is a subset of the operands of
+    the original disjunction. The operands must be mutually exclusive, so that the branches are disjoint and the
+    results of the branches combined with `UNION ALL` are the result of the original query: each operand has to
+    compare the same expression against distinct literals, e.g. `a.id = 1 OR a.id = 2 OR (a.id = 3 AND a.x > 0)`.
+
+    :param query: A query whose WHERE clause is a disjunction.
+    :param limit: The maximum number of bytes permitted for each branch.
+    :raises StatementTooLargeError: Raised when a single operand cannot fit into a branch.
+    :raises ValueError: Raised when the query has a LIMIT or OFFSET clause, aggregates or window functions, which
+        would apply to each branch separately, or when operands may overlap, in which case a row would be returned by
+        more than one branch.
+    """
+
+    if query.packed_size() <= limit:
+        return [query]
+    if query.limit is not None or query.offset is not None:
+        raise ValueError("cannot split a query with a LIMIT or OFFSET clause")
+    if _is_aggregating(query):
+        raise ValueError("cannot split a query with aggregates or window functions")
+    if not isinstance(query.where, DisjExpr):
+        raise StatementTooLargeError(query.packed_size(), limit)
+    if not _is_disjoint(query.where.operands):
+        # excluding rows of preceding branches would repeat their operands, and the last branch would be no smaller
+        # than the original query
+        raise ValueError("cannot split a disjunction whose operands may overlap")
+
+    # size of the query without the WHERE clause, plus the keyword and enclosing parentheses
+    base = query.with_where(None).packed_size() + 9
+    separator = len(DisjExpr.operator) + 2
+
+    branches: list[Query] = []
+    operands: list[BoolExpr] = []
+    size = base
+    for op in query.where.operands:
+        op_size = op.packed_size()
+        if base + op_size > limit:
+            raise StatementTooLargeError(base + op_size, limit)
+        if operands and size + separator + op_size > limit:
+            branches.append(query.with_where(DisjExpr(operands).unwrap()))
+            operands = []
+            size = base
+        if operands:
+            size += separator
+        operands.append(op)
+        size += op_size
+    if operands:
+        branches.append(query.with_where(DisjExpr(operands).unwrap()))
+    return branches
+
+
+def chunk_statements(
+    statements: Iterable[str], limit: int = MAX_STATEMENT_SIZE
+) -> Iterator[str]:
+    """
+    Concatenates statements into scripts that each fit within the size limit.
+
+    :param statements: SQL statements, each terminated by a semicolon.
+    :param limit: The maximum number of bytes permitted for each script.
+    :raises StatementTooLargeError: Raised when a single statement exceeds the limit.
+    """
+
+    chunk: list[str] = []
+    size = 0
+    for statement in statements:
+        stmt_size = utf8_len(statement)
+        if stmt_size > limit:
+            raise StatementTooLargeError(stmt_size, limit)
+        if chunk and size + 1 + stmt_size > limit:
+            yield "\n".join(chunk)
+            chunk = []
+            size = 0
+        if chunk:
+            size += 1
+        chunk.append(statement)
+        size += stmt_size
+    if chunk:
+        yield "\n".join(chunk)
+
+
+def chunk_tables(
+    tables: Iterable[Table], limit: int = MAX_STATEMENT_SIZE, *, replace: bool = False
+) -> Iterator[str]:
+    """
+    Emits the statements that create the tables in scripts that each fit within the size limit.
+
+    :param tables: Tables to create.
+    :param limit: The maximum number of bytes permitted for each script.
+    :param replace: True for `CREATE OR REPLACE`. False for `CREATE`.
+    """
+
+    return chunk_statements((table.as_stmt(replace=replace) for table in tables), limit)
+
+
+def chunk_values(
+    head: str, rows: Iterable[str], limit: int = MAX_STATEMENT_SIZE, tail: str = ";"
+) -> Iterator[str]:
+    """
+    Builds bulk statements with a `VALUES` list, splitting rows across statements that each fit within the size limit.
+
+    :param head: The part of the statement before the list of rows, e.g. `INSERT INTO t (a, b) VALUES`.
+    :param rows: Rendered row constructors, e.g. `(1, 'a')`.
+    :param limit: The maximum number of bytes permitted for each statement.
+    :param tail: The part of the statement after the list of rows.
+    :raises StatementTooLargeError: Raised when a single row cannot fit into a statement.
+    """
+
+    base = utf8_len(head) + utf8_len(tail) + 1
+    chunk: list[str] = []
+    size = base
+    for row in rows:
+        row_size = utf8_len(row)
+        if base + row_size > limit:
+            raise StatementTooLargeError(base + row_size, limit)
+        if chunk and size + 2 + row_size > limit:
+            yield f"{head} {', '.join(chunk)}{tail}"
+            chunk = []
+            size = base
+        if chunk:
+            size += 2
+        chunk.append(row)
+        size += row_size
+    if chunk:
+        yield f"{head} {', '.join(chunk)}{tail}"
@@ -0,0 +1,273 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import csv
+import datetime
+import decimal
+import json
+import os
+from concurrent.futures import Executor, Future, wait
+from pathlib import Path
+from typing import Any, Callable, Iterable, Literal, Mapping, Sequence, TextIO
+
+from .identifier import Identifier
+from .table import Table, VariantType, sql_quoted_string
+
+FileType = Literal["CSV", "JSON"]
+
+Row = Sequence[Any] | Mapping[str, Any]
+
+_NULL = "\\N"
+
+
+class FileFormat:
+    """
+    A named file format for staged files produced by `write_staged_files`.
+
+    CSV files use a comma as separator, double quotes to enclose fields as necessary, and `\\N` to represent NULL.
+    JSON files contain a single object per line (newline-delimited JSON), keyed by column name.
+    """
+
+    __slots__ = ("name", "type")
+
+    name: Identifier
+    type: FileType
+
+    def __init__(self, name: str, type: FileType) -> None:
+        self.name = Identifier(name)
+        self.type = type
+
+    @property
+    def extension(self) -> str:
+        return ".csv" if self.type == "CSV" else ".ndjson"
+
+    def as_stmt(self, *, replace: bool = False) -> str:
+        """
+        Emits a SQL statement for creating the file format.
+
+        :param replace: True for `CREATE OR REPLACE`. False for `CREATE`.
+        """
+
+        or_replace = " OR REPLACE" if replace else ""
+        if self.type == "CSV":
+            options = (
+                "TYPE = CSV FIELD_DELIMITER = ',' FIELD_OPTIONALLY_ENCLOSED_BY = '\"' "
+                f"NULL_IF = ({sql_quoted_string(_NULL)}) EMPTY_FIELD_AS_NULL = FALSE "
+                "BINARY_FORMAT = HEX"
+            )
+        else:
+            options = "TYPE = JSON STRIP_OUTER_ARRAY = FALSE BINARY_FORMAT = HEX"
+        return f"CREATE{or_replace} FILE FORMAT {self.name} {options};"
+
+
+def copy_into_stmt(
+    table: Table, stage: str, file_format: FileFormat, *, pattern: str | None = None
+) -> str:
+    """
+    Emits a `COPY INTO` statement that loads staged files into a table.
+
+    Each field in the staged files is cast to the data type of the corresponding column.
+
+    :param table: The table to load into.
+    :param stage: The stage that holds the files, with an optional path, e.g. `@my_stage/orders`.
+    :param file_format: The format of the staged files.
+    :param pattern: A regular expression that restricts which staged files are loaded.
+    """
+
+    names = ", ".join(str(c.name) for c in table.columns)
+    fields: list[str] = []
+    for index, column in enumerate(table.columns):
+        if file_format.type == "CSV":
+            field = f"${index + 1}"
+        else:
+            field = repr(Identifier("$1", path=column.name.raw))
+        if isinstance(column.data_type, VariantType) and file_format.type == "CSV":
+            field = f"PARSE_JSON({field})"
+        fields.append(f"{field}::{column.data_type}")
+
+    if not stage.startswith("@"):
+        stage = f"@{stage}"
+    pattern_option = (
+        f" PATTERN = {sql_quoted_string(pattern)}" if pattern is not None else ""
+    )
+    return (
+        f"COPY INTO {table.name} ({names}) FROM (SELECT {', '.join(fields)} FROM {stage})"
+        f" FILE_FORMAT = (FORMAT_NAME = {file_format.name}){pattern_option};"
+    )
+
+
+def put_stmt(
+    path: str | os.PathLike[str],
+    stage: str,
+    *,
+    parallel: int = 4,
+    auto_compress: bool = True,
+    overwrite: bool = False,
+) -> str:
+    """
+    Emits a `PUT` command that uploads local files to a stage.
+
+    :param path: A local file path, which may contain wildcards (`*` and `?`) to upload several files.
+    :param stage: The stage to upload files to, with an optional path.
+    :param parallel: The number of threads to use for uploading files.
+    :param auto_compress: Whether to compress files with gzip before uploading.
+    :param overwrite: Whether to overwrite existing files with the same name.
+    """
+
+    if not stage.startswith("@"):
+        stage = f"@{stage}"
+    uri = "file://" + Path(path).absolute().as_posix()
+    compress = "TRUE" if auto_compress else "FALSE"
+    replace = "TRUE" if overwrite else "FALSE"
+    return (
+        f"PUT {sql_quoted_string(uri)} {stage} PARALLEL = {parallel}"
+        f" AUTO_COMPRESS = {compress} OVERWRITE = {replace};"
+    )
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return _NULL
+    elif isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    elif isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    elif isinstance(value, datetime.datetime):
+        return value.isoformat(sep=" ")
+    elif isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    elif isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    else:
+        return value
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    elif isinstance(value, datetime.datetime):
+        return value.isoformat(sep=" ")
+    elif isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    elif isinstance(value, decimal.Decimal):
+        return str(value)
+    else:
+        raise TypeError(f"cannot serialize object of type `{type(value).__name__}`")
+
+
+def _ordered(table: Table, row: Row) -> Sequence[Any]:
+    "Arranges the values in a row in the order of the table columns."
+
+    if isinstance(row, Mapping):
+        return [row.get(column.name.raw) for column in table.columns]
+    if len(row) != len(table.columns):
+        raise ValueError(
+            f"expected: {len(table.columns)} values in row; got: {len(row)}"
+        )
+    return row
+
+
+def _write_csv_chunk(table: Table, rows: list[Row], fp: TextIO) -> None:
+    writer = csv.writer(fp, lineterminator="\n")
+    for row in rows:
+        writer.writerow([_csv_value(v) for v in _ordered(table, row)])
+
+
+def _write_ndjson_chunk(table: Table, rows: list[Row], fp: TextIO) -> None:
+    names = [column.name.raw for column in table.columns]
+    for row in rows:
+        record = dict(zip(names, _ordered(table, row)))
+        fp.write(json.dumps(record, default=_json_default, ensure_ascii=False))
+        fp.write("\n")
+
+
+def _write_file(
+    writer: Callable[[Table, list[Row], TextIO], None],
+    table: Table,
+    rows: list[Row],
+    path: Path,
+) -> Path:
+    with open(path, "w", encoding="utf-8", newline="") as fp:
+        writer(table, rows, fp)
+    return path
+
+
+def write_staged_files(
+    table: Table,
+    rows: Iterable[Row],
+    directory: str | os.PathLike[str],
+    file_format: FileFormat,
+    *,
+    prefix: str | None = None,
+    rows_per_file: int = 100000,
+    executor: Executor | None = None,
+    max_pending: int = 4,
+) -> list[Path]:
+    """
+    Serializes rows into local files ready to be uploaded to a stage, in the column order of the table.
+
+    Rows are consumed lazily, and split into files of at most `rows_per_file` rows each, which lets `PUT` upload and
+    `COPY INTO` load the files in parallel. When an executor is given, files are written concurrently. If writing any
+    of the files fails, the files written so far are removed.
+
+    :param table: The table that defines the columns in each row.
+    :param rows: Rows as sequences of values in column order, or as mappings from column name to value.
+    :param directory: The directory to write files to.
+    :param file_format: The format of the files to produce.
+    :param prefix: The prefix of file names, which defaults to the table name.
+    :param rows_per_file: Maximum number of rows per file.
+    :param executor: An executor to write files with concurrently.
+    :param max_pending: Maximum number of files submitted to the executor but not yet written, which bounds the number
+        of rows held in memory. Typically at least the number of workers of the executor.
+    :returns: Paths to the files written, in order.
+    """
+
+    if rows_per_file < 1:
+        raise ValueError("number of rows per file must be positive")
+    if max_pending < 1:
+        raise ValueError("number of pending files must be positive")
+
+    writer = _write_csv_chunk if file_format.type == "CSV" else _write_ndjson_chunk
+    directory = Path(directory)
+    prefix = prefix if prefix is not None else table.name.raw
+
+    started: list[Path] = []
+    paths: list[Path] = []
+    pending: list[Future[Path]] = []
+
+    def flush(chunk: list[Row]) -> None:
+        path = directory / f"{prefix}_{len(started):05d}{file_format.extension}"
+        started.append(path)
+        if executor is not None:
+            # bound the number of chunks held in memory
+            while len(pending) >= max_pending:
+                paths.append(pending.pop(0).result())
+            pending.append(executor.submit(_write_file, writer, table, chunk, path))
+        else:
+            paths.append(_write_file(writer, table, chunk, path))
+
+    try:
+        chunk: list[Row] = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= rows_per_file:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+
+        while pending:
+            paths.append(pending.pop(0).result())
+    except BaseException:
+        # stop writing files that have not started, and wait for the others such that they can be removed
+        for future in pending:
+            future.cancel()
+        wait(pending)
+        for path in started:
+            path.unlink(missing_ok=True)
+        raise
+
+    return paths
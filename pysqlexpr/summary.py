@@ -0,0 +1,323 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import re
+from typing import Iterable, Mapping
+
+from ._patterns import IDENTIFIER, STRING_LITERAL
+from .aggregate import Aggregate, Avg, Count, Sum
+from .query import Column, FromExpr, Query
+from .table import Table
+
+_NAME = re.compile(rf"(?<![\w$.:])({IDENTIFIER})(?![\w$]|\s*[.(])")
+
+# words that may occur in a predicate over grouping keys, and are not column references
+_KEYWORDS = frozenset(
+    [
+        "AND",
+        "OR",
+        "NOT",
+        "IS",
+        "NULL",
+        "IN",
+        "LIKE",
+        "ILIKE",
+        "BETWEEN",
+        "TRUE",
+        "FALSE",
+        "DATE",
+        "TIME",
+        "TIMESTAMP",
+        "INTERVAL",
+        "CASE",
+        "WHEN",
+        "THEN",
+        "ELSE",
+        "END",
+        "AS",
+    ]
+)
+
+
+class ApproximationPolicy:
+    "Declares the error that is acceptable in exchange for computing aggregates approximately."
+
+    __slots__ = ("tolerance",)
+
+    tolerance: float
+
+    def __init__(self, tolerance: float) -> None:
+        """
+        :param tolerance: Maximum acceptable relative error of an approximate aggregate, e.g. 0.02 for 2%.
+        """
+
+        if tolerance < 0:
+            raise ValueError("error tolerance must be non-negative")
+        self.tolerance = tolerance
+
+    def approximate(self, aggregate: Aggregate) -> Aggregate:
+        "Returns the approximate counterpart of an aggregate if its error is within tolerance, or the aggregate itself."
+
+        approximation = aggregate.approximation()
+        if approximation is not None:
+            approximate, error = approximation
+            if error <= self.tolerance:
+                return approximate
+        return aggregate
+
+
+def approximate_aggregates(query: Query, policy: ApproximationPolicy) -> Query:
+    """
+    Replaces exact aggregates in the SELECT list of a query with approximate ones permitted by the policy.
+
+    For example, `COUNT(DISTINCT user_id)` becomes `APPROX_COUNT_DISTINCT(user_id)` (HyperLogLog), and
+    `PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY latency)` becomes `APPROX_PERCENTILE(latency, 0.9)` (t-Digest).
+    Only structured aggregates (see `pysqlexpr.aggregate`) are considered; columns with SQL text are left as is.
+
+    :param query: The query to rewrite.
+    :param policy: The policy that declares the acceptable error.
+    :returns: The rewritten query, or the original query if no aggregate is replaced.
+    """
+
+    columns: list[Column] = []
+    changed = False
+    for column in query.columns.columns:
+        if isinstance(column.expr, Aggregate):
+            expr = policy.approximate(column.expr)
+            if expr is not column.expr:
+                columns.append(Column(expr, name=column.name))
+                changed = True
+                continue
+        columns.append(column)
+
+    if not changed:
+        return query
+    return query.with_columns(columns)
+
+
+def _normalize(text: str, qualifier: str | None = None) -> str:
+    "Normalizes an expression for comparison, removing whitespace and the qualifier, and ignoring case."
+
+    parts: list[str] = []
+    position = 0
+    for m in STRING_LITERAL.finditer(text):
+        start = m.start()
+        parts.append(_normalize_code(text[position:start], qualifier))
+        parts.append(m.group(0))
+        position = m.end()
+    parts.append(_normalize_code(text[position:], qualifier))
+    return "".join(parts)
+
+
+def _normalize_code(text: str, qualifier: str | None) -> str:
+    if qualifier is not None:
+        text = re.sub(
+            rf"(?<![\w$.]){re.escape(qualifier)}\s*\.", "", text, flags=re.IGNORECASE
+        )
+    return re.sub(r"\s+", "", text).upper()
+
+
+class Summary:
+    """
+    A pre-aggregated summary table, which holds the result of grouping the rows of a base table by a set of keys.
+
+    For example, a table `sales_daily` with columns `day`, `region`, `revenue` and `orders` might be populated with
+    `SELECT DATE_TRUNC('DAY', sold_at) AS day, region, SUM(amount) AS revenue, COUNT(*) AS orders FROM sales
+    GROUP BY 1, 2`, and declared as
+    `Summary(sales_daily, "sales", {"DATE_TRUNC('DAY', sold_at)": "day", "region": "region"},
+    {"revenue": Sum("amount"), "orders": Count()})`.
+    """
+
+    __slots__ = ("table", "source", "keys", "measures")
+
+    table: Table
+    source: str
+    keys: dict[str, str]
+    measures: dict[str, Aggregate]
+
+    def __init__(
+        self,
+        table: Table,
+        source: str,
+        keys: Iterable[str] | Mapping[str, str],
+        measures: Mapping[str, Aggregate],
+    ) -> None:
+        """
+        :param table: The summary table.
+        :param source: The name of the base table that the summary table aggregates.
+        :param keys: The grouping keys of the summary table as column names, or as a mapping from grouping
+            expression over the base table to column name in the summary table.
+        :param measures: A mapping from column name in the summary table to the aggregate the column holds.
+        """
+
+        self.table = table
+        self.source = source
+        if isinstance(keys, Mapping):
+            self.keys = dict(keys)
+        else:
+            self.keys = {key: key for key in keys}
+        self.measures = dict(measures)
+
+        for name in list(self.keys.values()) + list(self.measures.keys()):
+            if table.get_column(name) is None:
+                raise ValueError(
+                    f"column `{name}` is not a column of summary table: {table.name}"
+                )
+
+
+class _Matcher:
+    "Translates the parts of a query over a base table into the equivalent parts over a summary table."
+
+    __slots__ = ("summary", "qualifier", "keys", "measures", "exact")
+
+    summary: Summary
+    qualifier: str
+    keys: dict[str, str]
+    measures: dict[str, str]
+    exact: bool
+
+    def __init__(self, summary: Summary, qualifier: str, group_by: list[str]) -> None:
+        self.summary = summary
+        self.qualifier = qualifier
+        self.keys = {_normalize(expr): column for expr, column in summary.keys.items()}
+        self.measures = {
+            _normalize(str(aggregate)): column
+            for column, aggregate in summary.measures.items()
+        }
+        self.exact = set(group_by) == set(self.keys)
+
+    def key(self, expr: str) -> str | None:
+        return self.keys.get(_normalize(expr, self.qualifier))
+
+    def aggregate(self, aggregate: Aggregate) -> str | None:
+        "Returns an expression that computes the aggregate from the summary table."
+
+        column = self.measures.get(_normalize(str(aggregate), self.qualifier))
+        if column is not None:
+            rollup = aggregate.rollup(column)
+            if rollup is not None:
+                return rollup
+            elif self.exact:
+                return f"ANY_VALUE({column})"
+
+        if isinstance(aggregate, Count) and aggregate.distinct:
+            key = self.key(aggregate.expr)
+            if key is not None:
+                return f"COUNT(DISTINCT {key})"
+
+        if isinstance(aggregate, Avg):
+            total = self.measures.get(
+                _normalize(str(Sum(aggregate.expr)), self.qualifier)
+            )
+            count = self.measures.get(
+                _normalize(str(Count(aggregate.expr)), self.qualifier)
+            )
+            if total is not None and count is not None:
+                return f"SUM({total}) / NULLIF(SUM({count}), 0)"
+
+        return None
+
+    def predicate(self, text: str) -> bool:
+        "True if the predicate references grouping keys of the summary table only."
+
+        text = STRING_LITERAL.sub("''", text)
+        text = re.sub(
+            rf"(?<![\w$.]){re.escape(self.qualifier)}\s*\.",
+            "",
+            text,
+            flags=re.IGNORECASE,
+        )
+        for m in _NAME.finditer(text):
+            name = m.group(1)
+            if name.upper() in _KEYWORDS:
+                continue
+            column = self.key(name)
+            if column is None or column.upper() != name.upper():
+                return False
+        return True
+
+
+def _use_summary(query: Query, summary: Summary) -> Query | None:
+    source = query.source
+    if not isinstance(source, FromExpr) or not isinstance(source.expr, str):
+        return None
+    if source.expr.split(".")[-1].upper() != summary.source.split(".")[-1].upper():
+        return None
+    if query.qualify is not None or query.order_by is not None:
+        return None
+
+    qualifier = source.name or source.expr.split(".")[-1]
+    group_by = [_normalize(expr, qualifier) for expr in query.group_by or ()]
+    matcher = _Matcher(summary, qualifier, group_by)
+
+    keys: list[str] = []
+    for expr in query.group_by or ():
+        key = matcher.key(expr)
+        if key is None:
+            return None
+        keys.append(key)
+
+    if query.where is not None and not matcher.predicate(query.where.packed()):
+        return None
+
+    columns: list[Column] = []
+    for column in query.columns.columns:
+        if isinstance(column.expr, Aggregate):
+            value = matcher.aggregate(column.expr)
+        elif _normalize(column.expr, qualifier) in group_by:
+            value = matcher.key(column.expr)
+        else:
+            value = None
+        if value is None:
+            return None
+        columns.append(Column(value, name=column.name))
+
+    return Query(
+        FromExpr(str(summary.table.name), name=qualifier),
+        columns,
+        where=query.where,
+        group_by=keys if query.group_by is not None else None,
+        limit=query.limit,
+        offset=query.offset,
+    )
+
+
+def use_summary(query: Query, summaries: Iterable[Summary]) -> Query:
+    """
+    Rewrites an aggregate query over a base table to read from a pre-aggregated summary table instead.
+
+    A summary table can answer a query if
+
+    * the query reads the base table of the summary table (and no other table),
+    * each grouping key of the query is a grouping key of the summary table (i.e. the summary table is at least as
+      fine-grained as the query result),
+    * the WHERE clause references only grouping keys of the summary table that are stored under the same name,
+    * each column in the SELECT list is a grouping key of the query, or a structured aggregate (see
+      `pysqlexpr.aggregate`) that can be computed from the measures of the summary table.
+
+    Counts and sums are re-aggregated with `SUM`, minimums with `MIN` and maximums with `MAX`. An average is computed
+    from the sum and count of the same expression. A distinct count is computed if the counted expression is a grouping
+    key of the summary table. Other aggregates can be read from the summary table only if its grouping keys match
+    those of the query exactly.
+
+    If several summary tables can answer the query, the one with the fewest rows (per its statistics) is chosen, or
+    else the first one declared.
+
+    :param query: The query to rewrite.
+    :param summaries: Summary tables that may answer the query.
+    :returns: The rewritten query, or the original query if no summary table can answer it.
+    """
+
+    best: tuple[float, Query] | None = None
+    for summary in summaries:
+        rewritten = _use_summary(query, summary)
+        if rewritten is None:
+            continue
+        statistics = summary.table.statistics
+        rows = float(statistics.row_count) if statistics is not None else float("inf")
+        if best is None or rows < best[0]:
+            best = (rows, rewritten)
+    return best[1] if best is not None else query
@@ -1,7 +1,10 @@
 import re
-from typing import ClassVar
+from types import MappingProxyType
+from typing import Any, ClassVar, Iterable, Mapping
 
+from pysqlexpr._patterns import IDENTIFIER
 from pysqlexpr.identifier import Identifier
+from pysqlexpr.immutable import Immutable
 
 _sql_quoted_str_table = str.maketrans(
     {
@@ -26,7 +29,7 @@ def sql_quoted_string(text: str) -> str:
     return f"'{text}'"
 
 
-class DataType:
+class DataType(Immutable):
     __slots__ = ()
 
     name: ClassVar[str] = "<NULL>"
@@ -55,13 +58,13 @@ class NumberType(DataType):
 
     def __init__(self, precision: int | None = None, scale: int | None = None) -> None:
         if precision is not None:
-            self.precision = precision
+            object.__setattr__(self, "precision", precision)
         else:
-            self.precision = 38
+            object.__setattr__(self, "precision", 38)
         if scale is not None:
-            self.scale = scale
+            object.__setattr__(self, "scale", scale)
         else:
-            self.scale = 0
+            object.__setattr__(self, "scale", 0)
 
     def __eq__(self, op: object) -> bool:
         return (
@@ -90,9 +93,9 @@ class _LengthType(DataType):
 
     def __init__(self, length: int | None, default: int) -> None:
         if length is not None:
-            self.length = length
+            object.__setattr__(self, "length", length)
         else:
-            self.length = default
+            object.__setattr__(self, "length", default)
 
     def __eq__(self, op: object) -> bool:
         return isinstance(op, _LengthType) and self.length == op.length
@@ -131,9 +134,9 @@ class _PrecisionType(DataType):
 
     def __init__(self, precision: int | None = None) -> None:
         if precision is not None:
-            self.precision = precision
+            object.__setattr__(self, "precision", precision)
         else:
-            self.precision = 9
+            object.__setattr__(self, "precision", 9)
 
     def __eq__(self, op: object) -> bool:
         return isinstance(op, _PrecisionType) and self.precision == op.precision
@@ -179,14 +182,24 @@ ARRAY = ArrayType()
 OBJECT = ObjectType()
 
 
-class Column:
-    __slots__ = ("name", "data_type", "nullable", "default", "description")
+class Column(Immutable):
+    __slots__ = (
+        "name",
+        "data_type",
+        "nullable",
+        "default",
+        "description",
+        "search_optimization",
+        "unique",
+    )
 
     name: Identifier
     data_type: DataType
     nullable: bool
     default: str | None
     description: str | None
+    search_optimization: bool
+    unique: bool
 
     def __init__(
         self,
@@ -196,12 +209,21 @@ class Column:
         nullable: bool = True,
         default: str | None = None,
         description: str | None = None,
+        search_optimization: bool = False,
+        unique: bool = False,
     ) -> None:
-        self.name = Identifier(name)
-        self.data_type = data_type
-        self.nullable = nullable
-        self.default = default
-        self.description = description
+        """
+        :param search_optimization: Whether to enable search optimization for equality predicates on the column.
+        :param unique: Whether values in the column are unique. Snowflake records but does not enforce the constraint.
+        """
+
+        object.__setattr__(self, "name", Identifier(name))
+        object.__setattr__(self, "data_type", data_type)
+        object.__setattr__(self, "nullable", nullable)
+        object.__setattr__(self, "default", default)
+        object.__setattr__(self, "description", description)
+        object.__setattr__(self, "search_optimization", search_optimization)
+        object.__setattr__(self, "unique", unique)
 
     @property
     def default_expr(self) -> str:
@@ -225,9 +247,10 @@ class Column:
     @property
     def data_spec(self) -> str:
         nullable = " NOT NULL" if not self.nullable else ""
+        unique = " UNIQUE" if self.unique else ""
         default = f" DEFAULT {self.default_expr}" if self.default is not None else ""
         description = f" COMMENT {self.comment}" if self.description is not None else ""
-        return f"{self.data_type}{nullable}{default}{description}"
+        return f"{self.data_type}{nullable}{unique}{default}{description}"
 
     @property
     def comment(self) -> str | None:
@@ -240,19 +263,195 @@ class Column:
         return self.column_spec
 
 
-class Table:
-    __slots__ = ("name", "columns", "description")
+class Statistics(Immutable):
+    "Estimates of the size of a table or other row source, used for cost-based query optimization."
+
+    __slots__ = ("row_count", "distinct_values")
+
+    row_count: int
+    distinct_values: Mapping[str, int]
+
+    def __init__(
+        self, row_count: int, distinct_values: Mapping[str, int] | None = None
+    ) -> None:
+        """
+        :param row_count: The (estimated) number of rows.
+        :param distinct_values: The (estimated) number of distinct values in each column, keyed by column name.
+        """
+
+        if row_count < 0:
+            raise ValueError("row count must be non-negative")
+        counts: dict[str, int] = {}
+        if distinct_values is not None:
+            for name, count in distinct_values.items():
+                if count < 0:
+                    raise ValueError(
+                        f"number of distinct values for column `{name}` must be non-negative"
+                    )
+                counts[name.upper()] = count
+        object.__setattr__(self, "row_count", row_count)
+        object.__setattr__(self, "distinct_values", MappingProxyType(counts))
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        "Pickles the object with a copy of the read-only mapping, which cannot be pickled itself."
+
+        return Statistics, (self.row_count, dict(self.distinct_values))
+
+    def get_distinct_values(self, name: str) -> int | None:
+        "Looks up the number of distinct values in a column, ignoring case."
+
+        return self.distinct_values.get(name.upper())
+
+
+class Table(Immutable):
+    __slots__ = (
+        "name",
+        "columns",
+        "description",
+        "transient",
+        "cluster_by",
+        "data_retention_time_in_days",
+        "primary_key",
+        "unique_keys",
+        "statistics",
+    )
 
     name: Identifier
-    columns: list[Column]
+    columns: tuple[Column, ...]
     description: str | None
+    transient: bool
+    cluster_by: tuple[str, ...] | None
+    data_retention_time_in_days: int | None
+    primary_key: tuple[str, ...] | None
+    unique_keys: tuple[tuple[str, ...], ...]
+    statistics: Statistics | None
 
     def __init__(
-        self, name: str, columns: list[Column], *, description: str | None = None
+        self,
+        name: str,
+        columns: Iterable[Column],
+        *,
+        description: str | None = None,
+        transient: bool = False,
+        cluster_by: Iterable[str] | None = None,
+        data_retention_time_in_days: int | None = None,
+        primary_key: Iterable[str] | None = None,
+        unique_keys: Iterable[Iterable[str]] | None = None,
+        statistics: Statistics | None = None,
     ) -> None:
-        self.name = Identifier(name)
-        self.columns = columns
-        self.description = description
+        """
+        :param transient: True for a transient table, which has no Fail-safe period.
+        :param cluster_by: Clustering keys, each a column name or an expression over columns.
+        :param data_retention_time_in_days: Number of days for which historical data is retained for Time Travel.
+        :param primary_key: Names of the columns that make up the primary key.
+        :param unique_keys: Sets of column names whose combined values are unique, in addition to the primary key.
+        :param statistics: Size estimates for cost-based query optimization, which do not affect the table definition.
+        """
+
+        object.__setattr__(self, "name", Identifier(name))
+        object.__setattr__(self, "columns", tuple(columns))
+        object.__setattr__(self, "description", description)
+        object.__setattr__(self, "transient", transient)
+        object.__setattr__(
+            self, "cluster_by", tuple(cluster_by) if cluster_by is not None else None
+        )
+        object.__setattr__(
+            self, "data_retention_time_in_days", data_retention_time_in_days
+        )
+        object.__setattr__(
+            self, "primary_key", tuple(primary_key) if primary_key is not None else None
+        )
+        object.__setattr__(
+            self,
+            "unique_keys",
+            (
+                tuple(tuple(key) for key in unique_keys)
+                if unique_keys is not None
+                else ()
+            ),
+        )
+        object.__setattr__(self, "statistics", statistics)
+        self._check()
+
+    def get_column(self, name: str) -> Column | None:
+        "Looks up a column by name, ignoring case (as Snowflake does for unquoted identifiers)."
+
+        name = name.upper()
+        for column in self.columns:
+            if column.name.raw.upper() == name:
+                return column
+        return None
+
+    def _check(self) -> None:
+        "Verifies if the physical design options and constraints are consistent with the column definitions."
+
+        unique_keys = self.unique_keys
+        if self.primary_key is not None:
+            unique_keys = (self.primary_key,) + unique_keys
+        for unique_key in unique_keys:
+            if not unique_key:
+                raise ValueError(f"empty unique key for table: {self.name}")
+            for name in unique_key:
+                if self.get_column(name) is None:
+                    raise ValueError(
+                        f"key column `{name}` is not a column of table: {self.name}"
+                    )
+
+        if self.cluster_by is not None:
+            if not self.cluster_by:
+                raise ValueError(f"empty clustering key for table: {self.name}")
+            for key in self.cluster_by:
+                if not re.fullmatch(IDENTIFIER, key):
+                    continue  # an expression, e.g. `TO_DATE(created_at)` or `payload:region::STRING`
+                column = self.get_column(key)
+                if column is None:
+                    raise ValueError(
+                        f"clustering key `{key}` is not a column of table: {self.name}"
+                    )
+                if isinstance(column.data_type, (VariantType, ArrayType, ObjectType)):
+                    raise ValueError(
+                        f"clustering key `{key}` of type {column.data_type} requires an expression "
+                        "that extracts and casts a value"
+                    )
+
+        if self.data_retention_time_in_days is not None:
+            limit = 1 if self.transient else 90
+            if not 0 <= self.data_retention_time_in_days <= limit:
+                raise ValueError(
+                    f"data retention time for table {self.name} must be between 0 and {limit} days"
+                )
+
+    @property
+    def unique_column_sets(self) -> list[frozenset[str]]:
+        """
+        Sets of (upper-case) column names whose combined values identify at most one row.
+
+        Includes the primary key, unique keys declared on the table and columns declared unique.
+        """
+
+        keys: list[frozenset[str]] = []
+        if self.primary_key is not None:
+            keys.append(frozenset(name.upper() for name in self.primary_key))
+        for key in self.unique_keys:
+            keys.append(frozenset(name.upper() for name in key))
+        for column in self.columns:
+            if column.unique:
+                keys.append(frozenset([column.name.raw.upper()]))
+        return keys
+
+    def is_unique(self, names: Iterable[str]) -> bool:
+        "True if the given set of columns (matched without regard to case) contains a unique key."
+
+        columns = frozenset(name.upper() for name in names)
+        return any(key <= columns for key in self.unique_column_sets)
+
+    @property
+    def search_optimization_columns(self) -> list[Column]:
+        return [c for c in self.columns if c.search_optimization]
+
+    def _search_optimization_stmt(self, columns: list[Column], action: str) -> str:
+        names = ", ".join(str(c.name) for c in columns)
+        return f"ALTER TABLE {self.name} {action} SEARCH OPTIMIZATION ON EQUALITY({names});"
 
     def as_stmt(self, *, replace: bool = False) -> str:
         """
@@ -261,14 +460,120 @@ class Table:
         :param replace: True for `CREATE OR REPLACE`. False for `CREATE`.
         """
 
-        definitions = ",\n".join(str(c) for c in self.columns)
+        definitions = [str(c) for c in self.columns]
+        if self.primary_key is not None:
+            definitions.append(f"PRIMARY KEY ({self._key_spec(self.primary_key)})")
+        for key in self.unique_keys:
+            definitions.append(f"UNIQUE ({self._key_spec(key)})")
+        body = ",\n".join(definitions)
+        cluster_by = (
+            f"\nCLUSTER BY ({', '.join(self.cluster_by)})"
+            if self.cluster_by is not None
+            else ""
+        )
+        retention = (
+            f"\nDATA_RETENTION_TIME_IN_DAYS = {self.data_retention_time_in_days}"
+            if self.data_retention_time_in_days is not None
+            else ""
+        )
         comment = (
             f"\nCOMMENT = {sql_quoted_string(self.description)}"
             if self.description
             else ""
         )
         or_replace = " OR REPLACE" if replace else ""
-        return f"CREATE{or_replace} TABLE {self.name} (\n{definitions}\n){comment};"
+        transient = " TRANSIENT" if self.transient else ""
+        return f"CREATE{or_replace}{transient} TABLE {self.name} (\n{body}\n){cluster_by}{retention}{comment};"
+
+    def _key_spec(self, key: tuple[str, ...]) -> str:
+        return ", ".join(
+            str(c.name) for c in map(self.get_column, key) if c is not None
+        )
+
+    def create_stmts(self, *, replace: bool = False) -> list[str]:
+        """
+        Emits SQL statements for creating the table, and for enabling options that cannot be set on creation.
+
+        :param replace: True for `CREATE OR REPLACE`. False for `CREATE`.
+        """
+
+        statements = [self.as_stmt(replace=replace)]
+        columns = self.search_optimization_columns
+        if columns:
+            statements.append(self._search_optimization_stmt(columns, "ADD"))
+        return statements
+
+    def comment_stmts(self) -> list[str]:
+        "Emits SQL statements that set (or unset) the comment of the table and the comments of its columns."
+
+        if self.description:
+            statements = [
+                f"ALTER TABLE {self.name} SET COMMENT = {sql_quoted_string(self.description)};"
+            ]
+        else:
+            statements = [f"ALTER TABLE {self.name} UNSET COMMENT;"]
+        if self.columns:
+            columns = ", ".join(
+                (
+                    f"COLUMN {c.name} COMMENT {c.comment}"
+                    if c.description is not None
+                    else f"COLUMN {c.name} UNSET COMMENT"
+                )
+                for c in self.columns
+            )
+            statements.append(f"ALTER TABLE {self.name} ALTER {columns};")
+        return statements
+
+    def alter_stmts(self, source: "Table") -> list[str]:
+        """
+        Emits SQL statements that change the physical design options of an existing table to match this table.
+
+        :param source: The current definition of the table.
+        :raises ValueError: Raised when the change cannot be made with `ALTER TABLE`.
+        """
+
+        if self.transient != source.transient:
+            raise ValueError(
+                f"cannot change whether table {self.name} is transient; re-create the table instead"
+            )
+
+        statements: list[str] = []
+        if self.cluster_by != source.cluster_by:
+            if self.cluster_by is not None:
+                statements.append(
+                    f"ALTER TABLE {self.name} CLUSTER BY ({', '.join(self.cluster_by)});"
+                )
+            else:
+                statements.append(f"ALTER TABLE {self.name} DROP CLUSTERING KEY;")
+
+        if self.data_retention_time_in_days != source.data_retention_time_in_days:
+            if self.data_retention_time_in_days is not None:
+                statements.append(
+                    f"ALTER TABLE {self.name} SET DATA_RETENTION_TIME_IN_DAYS = {self.data_retention_time_in_days};"
+                )
+            else:
+                statements.append(
+                    f"ALTER TABLE {self.name} UNSET DATA_RETENTION_TIME_IN_DAYS;"
+                )
+
+        current = {c.name.raw.upper() for c in source.search_optimization_columns}
+        target = {c.name.raw.upper() for c in self.search_optimization_columns}
+        removed = [
+            c
+            for c in source.search_optimization_columns
+            if c.name.raw.upper() not in target
+        ]
+        added = [
+            c
+            for c in self.search_optimization_columns
+            if c.name.raw.upper() not in current
+        ]
+        if removed:
+            statements.append(self._search_optimization_stmt(removed, "DROP"))
+        if added:
+            statements.append(self._search_optimization_stmt(added, "ADD"))
+
+        return statements
 
     def __str__(self) -> str:
         """
@@ -0,0 +1,426 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import re
+from collections import Counter
+from typing import Callable
+
+from ._patterns import IDENTIFIER, QUOTED_IDENTIFIER, STRING_LITERAL
+from .boolean import BoolExpr, ReturnsBool
+from .identifier import Identifier
+from .query import (
+    Column,
+    FromExpr,
+    InSubquery,
+    JoinExpr,
+    LateralJoin,
+    Query,
+    SourceExpr,
+)
+from .table import (
+    ARRAY,
+    BOOLEAN,
+    DATE,
+    FLOAT,
+    INTEGER,
+    OBJECT,
+    VARIANT,
+    DataType,
+    DateTimeType,
+    NumberType,
+    ObjectType,
+    StringType,
+    Table,
+    TimeType,
+    VariantType,
+)
+from .table import Column as TableColumn
+
+# Each occurrence of a path into a semi-structured column (e.g. `payload:"customer":"id"`) traverses the value anew,
+# and an extraction without a cast yields a VARIANT, which Snowflake cannot use to prune micro-partitions. A path that
+# occurs several times in a query with the same cast is extracted once in an inner projection over the table, and
+# references to the path are replaced with the projected column. Paths without a cast are left as they are, because
+# projecting them would yield an untyped VARIANT column.
+
+_NAME = rf"{IDENTIFIER}|{QUOTED_IDENTIFIER.pattern}"
+_PATH = re.compile(
+    rf"{STRING_LITERAL.pattern}"
+    rf"|(?<![\w$.:\"])(?:(?P<qualifier>{_NAME})\s*\.\s*)?(?P<column>{_NAME})"
+    rf"(?P<path>(?:\s*:(?!:)\s*(?:{_NAME}))+)(?!\s*[.\[])"
+    r"(?:\s*::\s*(?P<cast>[A-Za-z_]\w*(?:\s*\(\s*\d+(?:\s*,\s*\d+)?\s*\))?))?"
+)
+_SEGMENT = re.compile(_NAME)
+_TYPE = re.compile(r"(?P<name>[A-Z_]+)(?:\((?P<p>\d+)(?:,(?P<s>\d+))?\))?")
+
+_PathKey = tuple[str, tuple[str, ...], str]
+
+
+def _unquote(name: str) -> str:
+    return name[1:-1].replace('""', '"') if name.startswith('"') else name
+
+
+def _data_type(cast: str) -> DataType:
+    "Maps the type in a cast expression (e.g. `NUMBER(10,2)`) to a column data type."
+
+    m = _TYPE.fullmatch(cast)
+    if m is None:
+        return VARIANT
+    name = m.group("name")
+    p = int(m.group("p")) if m.group("p") is not None else None
+    s = int(m.group("s")) if m.group("s") is not None else None
+    if name in ("NUMBER", "NUMERIC", "DECIMAL"):
+        return NumberType(p, s)
+    elif name in ("INT", "INTEGER", "BIGINT", "SMALLINT", "TINYINT", "BYTEINT"):
+        return INTEGER
+    elif name in ("FLOAT", "FLOAT4", "FLOAT8", "DOUBLE", "REAL"):
+        return FLOAT
+    elif name in ("VARCHAR", "STRING", "TEXT", "CHAR", "CHARACTER"):
+        return StringType(p)
+    elif name == "BOOLEAN":
+        return BOOLEAN
+    elif name == "DATE":
+        return DATE
+    elif name == "TIME":
+        return TimeType(p)
+    elif name in ("DATETIME", "TIMESTAMP", "TIMESTAMP_NTZ"):
+        return DateTimeType(p)
+    elif name == "ARRAY":
+        return ARRAY
+    elif name == "OBJECT":
+        return OBJECT
+    else:
+        return VARIANT
+
+
+class VariantPath:
+    "A path into a semi-structured column that is extracted once, and referenced by name."
+
+    __slots__ = ("column", "path", "cast", "name", "count")
+
+    column: str
+    path: tuple[str, ...]
+    cast: str
+    name: str
+    count: int
+
+    def __init__(
+        self,
+        column: str,
+        path: tuple[str, ...],
+        cast: str,
+        name: str,
+        count: int,
+    ) -> None:
+        """
+        :param column: The name of the semi-structured column.
+        :param path: The keys that lead to the value within the column.
+        :param cast: The type the value is cast to.
+        :param name: The name of the column the extracted value is projected as.
+        :param count: The number of references to the path (with the same cast) in the query.
+        """
+
+        self.column = column
+        self.path = path
+        self.cast = cast
+        self.name = name
+        self.count = count
+
+    @property
+    def data_type(self) -> DataType:
+        "The data type of the extracted value."
+
+        return _data_type(self.cast)
+
+    @property
+    def expr(self) -> str:
+        'The SQL expression that extracts the value, e.g. `payload:"customer":"id"::NUMBER`.'
+
+        identifier = str(Identifier(self.column, path="/".join(self.path)))
+        return f"{identifier}::{self.cast}"
+
+
+class VariantResult:
+    "The outcome of hoisting repeated semi-structured path extractions into an inner projection."
+
+    __slots__ = ("query", "paths")
+
+    query: Query
+    paths: list[VariantPath]
+
+    def __init__(self, query: Query, paths: list[VariantPath]) -> None:
+        """
+        :param query: The rewritten query, or the original query if no path has been hoisted.
+        :param paths: The paths that have been hoisted, in order of first occurrence.
+        """
+
+        self.query = query
+        self.paths = paths
+
+    def materialize_stmts(self, table: Table, *, backfill: bool = False) -> list[str]:
+        """
+        Emits SQL statements that add a typed column to the table for each hoisted path.
+
+        A materialized column has its own micro-partition metadata, which makes predicates on the value prunable.
+        Keeping the column up to date as new rows arrive (e.g. in the `COPY INTO` or `INSERT` statement that loads the
+        table) is up to the caller.
+
+        :param table: The table that the paths point into.
+        :param backfill: Whether to fill the new columns of existing rows from the paths. The `UPDATE` statement
+            rewrites every row of the table.
+        """
+
+        if not self.paths:
+            return []
+        statements = [
+            f"ALTER TABLE {table.name} ADD COLUMN {TableColumn(path.name, path.data_type).column_spec};"
+            for path in self.paths
+        ]
+        if backfill:
+            assignments = ", ".join(f"{path.name} = {path.expr}" for path in self.paths)
+            statements.append(f"UPDATE {table.name} SET {assignments};")
+        return statements
+
+
+class _Hoister:
+    __slots__ = ("table", "qualifiers", "counter", "names")
+
+    table: Table
+    qualifiers: set[str]
+    counter: Counter[_PathKey]
+    names: dict[_PathKey, str]
+
+    def __init__(self, table: Table, qualifiers: set[str]) -> None:
+        self.table = table
+        self.qualifiers = qualifiers
+        self.counter = Counter()
+        self.names = {}
+
+    def key(self, m: re.Match[str]) -> _PathKey | None:
+        "Returns the column, path and cast that a match refers to, or `None` if it is not a cast path into the table."
+
+        if m.group("column") is None or m.group("cast") is None:
+            return None
+        qualifier = m.group("qualifier")
+        if qualifier is not None and _unquote(qualifier).upper() not in self.qualifiers:
+            return None
+        column = self.table.get_column(_unquote(m.group("column")))
+        if column is None or not isinstance(
+            column.data_type, (VariantType, ObjectType)
+        ):
+            return None
+        path = tuple(_unquote(s) for s in _SEGMENT.findall(m.group("path")))
+        if any("/" in segment for segment in path):
+            # not representable as an identifier path
+            return None
+        cast = re.sub(r"\s+", "", m.group("cast")).upper()
+        return column.name.raw, path, cast
+
+    def count(self, text: str) -> None:
+        for m in _PATH.finditer(text):
+            key = self.key(m)
+            if key is not None:
+                self.counter[key] += 1
+
+    def replace(self, text: str) -> str:
+        def substitute(m: re.Match[str]) -> str:
+            key = self.key(m)
+            if key is None or key not in self.names:
+                return m.group(0)
+            qualifier = m.group("qualifier")
+            name = self.names[key]
+            return f"{qualifier}.{name}" if qualifier is not None else name
+
+        return _PATH.sub(substitute, text)
+
+
+def _is_bare_path(expr: str) -> bool:
+    "True if the expression is a path extraction and nothing else, which gives an unaliased column its name."
+
+    m = _PATH.fullmatch(expr.strip())
+    return m is not None and m.group("column") is not None
+
+
+def _visit(query: Query, target: FromExpr, fn: Callable[[str], str]) -> Query:
+    "Applies a function to the SQL text in the query that may reference the target, rebuilding the changed parts."
+
+    def predicate(expr: BoolExpr) -> BoolExpr:
+        if isinstance(expr, ReturnsBool):
+            text = fn(expr.expr)
+            return ReturnsBool(text) if text != expr.expr else expr
+        elif isinstance(expr, InSubquery):
+            text = fn(expr.expr)
+            return InSubquery(text, expr.query) if text != expr.expr else expr
+        else:
+            return expr
+
+    def source(node: SourceExpr) -> SourceExpr:
+        if isinstance(node, LateralJoin):
+            left = source(node.left)
+            right = source(node.right)
+            if left is node.left and right is node.right:
+                return node
+            return node._derive(left, right)
+        elif isinstance(node, JoinExpr):
+            left = source(node.left)
+            right = source(node.right)
+            assert node.condition is not None
+            condition = node.condition.transform(predicate)
+            if (
+                left is node.left
+                and right is node.right
+                and condition is node.condition
+            ):
+                return node
+            return type(node)(left, right, condition)
+        elif isinstance(node, FromExpr) and node is not target:
+            if isinstance(node.expr, str):
+                text = fn(node.expr)
+                if text != node.expr:
+                    return FromExpr(
+                        text,
+                        name=node.name,
+                        sample=node.sample,
+                        statistics=node.statistics,
+                    )
+            return node
+        else:
+            return node
+
+    columns: list[Column] = []
+    for column in query.columns.columns:
+        if (
+            isinstance(column.expr, str)
+            and not (column.name is None and _is_bare_path(column.expr))
+            and (text := fn(column.expr)) != column.expr
+        ):
+            columns.append(Column(text, name=column.name))
+        else:
+            columns.append(column)
+
+    result = query.with_source(source(query.source)).with_columns(columns)
+    if query.where is not None:
+        result = result.with_where(query.where.transform(predicate))
+    if query.group_by is not None:
+        result = result.with_group_by([fn(g) for g in query.group_by])
+    if query.qualify is not None:
+        result = result.with_qualify(query.qualify.transform(predicate))
+    if query.order_by is not None:
+        result = result.with_order_by([fn(o) for o in query.order_by])
+    return result
+
+
+def _name(column: str, path: tuple[str, ...], taken: set[str]) -> str:
+    "Derives a column name for an extracted value that is unique among the names taken."
+
+    base = re.sub(r"\W+", "_", "_".join((column,) + path)).strip("_").lower()
+    name = base
+    suffix = 1
+    while name.upper() in taken:
+        suffix += 1
+        name = f"{base}_{suffix}"
+    taken.add(name.upper())
+    return name
+
+
+def hoist_variant_paths(
+    query: Query, table: Table, *, min_count: int = 2
+) -> VariantResult:
+    """
+    Extracts paths into semi-structured columns that a query references repeatedly once, in an inner projection.
+
+    For example, if `payload:"customer":"id"::NUMBER` occurs both in the SELECT list and in the WHERE clause of a
+    query over the table `orders`, the table is replaced with
+    `(SELECT *, payload:"customer":"id"::NUMBER AS payload_customer_id FROM orders)`, and both occurrences with
+    `payload_customer_id`. The same path with different casts is extracted separately. A path without a cast is not
+    extracted, because the projected column would be an untyped VARIANT.
+
+    Paths are searched in the SELECT list, the WHERE, GROUP BY, QUALIFY and ORDER BY clauses, join conditions and
+    table functions. Arguments of structured aggregates and correlated references in sub-queries are left as they
+    are, which remains valid because the inner projection retains all columns of the table. An unaliased column that
+    is nothing but a path keeps its path, so that the name of the result column does not change; in a query with a
+    GROUP BY clause, such a path is not extracted at all.
+
+    The query is returned unchanged if the table occurs more than once in the FROM clause, or if the SELECT list
+    has a wildcard, which would pick up the projected columns.
+
+    :param query: The query to rewrite.
+    :param table: The table whose VARIANT and OBJECT columns to look for paths into.
+    :param min_count: The number of references to a path (with the same cast) that warrants extracting it once.
+    :returns: The rewritten query, and the hoisted paths. Use `materialize_stmts` to turn the paths into columns.
+    """
+
+    name = table.name.raw.upper()
+    targets = [
+        source
+        for source in query.source.sources()
+        if isinstance(source.expr, str) and source.expr.split(".")[-1].upper() == name
+    ]
+    if len(targets) != 1:
+        return VariantResult(query, [])
+    target = targets[0]
+    if any(
+        isinstance(c.expr, str) and c.expr.strip().endswith("*")
+        for c in query.columns.columns
+    ):
+        return VariantResult(query, [])
+
+    qualifiers = {name}
+    if target.name is not None:
+        qualifiers.add(_unquote(target.name).upper())
+    hoister = _Hoister(table, qualifiers)
+
+    def count(text: str) -> str:
+        hoister.count(text)
+        return text
+
+    _visit(query, target, count)
+
+    if query.group_by is not None:
+        # an unaliased column that is nothing but a path keeps its path, which would no longer match a GROUP BY
+        # expression in which the path has been replaced
+        for c in query.columns.columns:
+            if isinstance(c.expr, str) and c.name is None:
+                m = _PATH.fullmatch(c.expr.strip())
+                key = hoister.key(m) if m is not None else None
+                if key is not None:
+                    del hoister.counter[key]
+
+    taken = {column.name.raw.upper() for column in table.columns}
+    paths: list[VariantPath] = []
+    for key, occurrences in hoister.counter.items():
+        if occurrences < min_count:
+            continue
+        column, path, cast = key
+        hoister.names[key] = _name(column, path, taken)
+        paths.append(VariantPath(column, path, cast, hoister.names[key], occurrences))
+    if not paths:
+        return VariantResult(query, [])
+
+    assert isinstance(target.expr, str)
+    inner = Query(
+        FromExpr(target.expr, sample=target.sample),
+        [Column("*")] + [Column(path.expr, name=path.name) for path in paths],
+    )
+    alias = target.name if target.name is not None else target.expr.split(".")[-1]
+    projection = FromExpr(inner, name=alias, statistics=target.statistics)
+
+    rewritten = _visit(query, target, hoister.replace)
+    return VariantResult(
+        rewritten.with_source(_replace(rewritten.source, target, projection)), paths
+    )
+
+
+def _replace(source: SourceExpr, target: FromExpr, by: FromExpr) -> SourceExpr:
+    "Replaces a FROM expression, sharing all sub-trees that do not contain it."
+
+    if source is target:
+        return by
+    if isinstance(source, JoinExpr):
+        left = _replace(source.left, target, by)
+        right = _replace(source.right, target, by)
+        if left is not source.left or right is not source.right:
+            return source._derive(left, right)
+    return source
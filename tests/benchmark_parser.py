@@ -0,0 +1,57 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+
+Measures the throughput of the SQL parser. Run with `python -m tests.benchmark_parser`.
+"""
+
+import time
+
+from pysqlexpr.parser import parse_query
+
+QUERY = """
+SELECT a.zip, c.name AS country, COUNT(*) AS n,
+    CASE WHEN a.zip LIKE '1%' THEN 'A' ELSE 'B' END AS zone, p.value:number::STRING AS phone
+FROM address AS a
+    INNER JOIN LATERAL TABLE(FLATTEN(INPUT => a.phone_numbers)) AS p
+    LEFT JOIN country AS c SAMPLE SYSTEM (10) SEED (7) ON a.country_id = c.id
+    INNER JOIN (SELECT id, address_id FROM customer) AS u ON u.address_id = a.id
+WHERE a.zip IS NOT NULL
+    AND (c.name = 'Hungary' OR c.id > -42)
+    AND a.created BETWEEN DATE '2024-01-01' AND CURRENT_DATE()
+    AND a.id IN (SELECT address_id FROM customer)
+    AND (EXISTS (SELECT 1 FROM blocked AS b WHERE b.zip = a.zip) OR NOT EXISTS (SELECT 1 FROM blocked AS b))
+GROUP BY a.zip, c.name
+QUALIFY ROW_NUMBER() OVER (PARTITION BY a.zip ORDER BY c.id) = 1
+ORDER BY a.zip DESC, country
+LIMIT 100 OFFSET 10
+"""
+
+
+def measure(text: str, count: int = 1000, repeat: int = 5) -> float:
+    "Returns the best parse throughput over several runs, in MB/s."
+
+    size = len(text.encode("utf-8")) * count
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(count):
+            parse_query(text)
+        best = min(best, time.perf_counter() - start)
+    return size / best / 1e6
+
+
+def main() -> None:
+    query = parse_query(QUERY)
+    for name, text in [
+        ("original", QUERY),
+        ("packed", query.packed()),
+        ("wire", query.wire()),
+        ("spacious", query.spacious()),
+    ]:
+        print(f"{name:>8}: {measure(text):6.2f} MB/s ({len(text)} bytes per query)")
+
+
+if __name__ == "__main__":
+    main()
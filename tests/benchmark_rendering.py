@@ -0,0 +1,72 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+
+Measures how rendering scales with the number of threads. Run with `python -m tests.benchmark_rendering`.
+
+Threads only run in parallel on a free-threaded build of Python (e.g. `python3.13t`), on which throughput should grow
+with the number of threads, because nodes are immutable and their caches need no lock.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pysqlexpr.aggregate import Count
+from pysqlexpr.boolean import ReturnsBool
+from pysqlexpr.query import Column, FromExpr, Join, Query
+
+E = ReturnsBool
+
+
+def make_query(k: int) -> Query:
+    return Query(
+        Join(
+            FromExpr("orders", name="o"),
+            FromExpr("customer", name="c"),
+            E("o.customer_id = c.id"),
+        ),
+        [Column("c.name"), Column(Count(), name="n")],
+        where=(E(f"o.amount > {k}") & E("c.active")) | E(f"c.id = {k}"),
+        group_by=["c.name"],
+        order_by=["n DESC"],
+    )
+
+
+def work(count: int) -> int:
+    "Builds and renders queries whose caches are cold, and returns the number of bytes produced."
+
+    size = 0
+    shared = make_query(0)
+    for k in range(count):
+        query = shared.with_limit(k)
+        size += len(query.packed()) + len(query.wire()) + len(query.spacious())
+    return size
+
+
+def measure(threads: int, count: int = 20000) -> float:
+    "Returns the number of queries rendered per second with the given number of threads."
+
+    with ThreadPoolExecutor(threads) as executor:
+        start = time.perf_counter()
+        list(executor.map(work, [count // threads] * threads))
+        elapsed = time.perf_counter() - start
+    return count / elapsed
+
+
+def main() -> None:
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(
+        f"Python {sys.version.split()[0]}, GIL {'enabled' if is_gil_enabled else 'disabled'}"
+    )
+    baseline = measure(1)
+    print(f"{os.cpu_count()} CPUs")
+    for threads in (1, 2, 4, 8, 16):
+        rate = measure(threads)
+        print(f"{threads:>3} threads: {rate:10.0f} queries/s ({rate / baseline:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import unittest
+
+from pysqlexpr.aggregate import (
+    ApproxCountDistinct,
+    ApproxPercentile,
+    Avg,
+    Count,
+    Max,
+    Min,
+    Percentile,
+    Sum,
+)
+from pysqlexpr.query import Column, FromExpr, Query
+
+
+class TestAggregate(unittest.TestCase):
+    def test_render(self) -> None:
+        self.assertEqual(str(Count()), "COUNT(*)")
+        self.assertEqual(
+            str(Count("user_id", distinct=True)), "COUNT(DISTINCT user_id)"
+        )
+        self.assertEqual(str(Sum("amount")), "SUM(amount)")
+        self.assertEqual(str(Avg("amount")), "AVG(amount)")
+        self.assertEqual(str(Min("amount")), "MIN(amount)")
+        self.assertEqual(str(Max("amount")), "MAX(amount)")
+        self.assertEqual(
+            str(Percentile("latency", 0.9)),
+            "PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY latency)",
+        )
+        self.assertEqual(
+            str(ApproxCountDistinct("user_id")), "APPROX_COUNT_DISTINCT(user_id)"
+        )
+        self.assertEqual(
+            str(ApproxPercentile("latency", 0.5)), "APPROX_PERCENTILE(latency, 0.5)"
+        )
+
+        query = Query(
+            FromExpr("events"),
+            [Column("region"), Column(Count(), name="n")],
+            group_by=["region"],
+        )
+        self.assertEqual(
+            query.packed(), "SELECT region, COUNT(*) AS n FROM events GROUP BY region"
+        )
+        self.assertEqual(query.packed_size(), len(query.packed()))
+
+    def test_equality(self) -> None:
+        self.assertEqual(Count("x", distinct=True), Count("x", distinct=True))
+        self.assertNotEqual(Count("x", distinct=True), Count("x"))
+        self.assertNotEqual(Min("x"), Max("x"))
+        self.assertEqual(hash(Percentile("x", 0.5)), hash(Percentile("x", 0.5)))
+        self.assertNotEqual(Percentile("x", 0.5), ApproxPercentile("x", 0.5))
+
+    def test_invalid(self) -> None:
+        with self.assertRaises(ValueError):
+            Count(distinct=True)
+        with self.assertRaises(ValueError):
+            Percentile("x", 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,6 +19,9 @@ class TestBoolean(unittest.TestCase):
     def assertSpaciousEqual(self, expr: BoolExpr, lines: list[str]) -> None:
         self.assertEqual(expr.spacious(), "\n".join(lines))
 
+    def assertWireEqual(self, expr: BoolExpr, text: str) -> None:
+        self.assertEqual(expr.wire(), text)
+
     def test_equal(self) -> None:
         E = ReturnsBool
         self.assertEqual(E("a"), E("a"))
@@ -74,6 +77,20 @@ class TestBoolean(unittest.TestCase):
             ],
         )
 
+    def test_wire(self) -> None:
+        E = ReturnsBool
+
+        self.assertWireEqual(E("a"), "a")
+        self.assertWireEqual(E("a") & E("b") & E("c"), "a AND b AND c")
+        self.assertWireEqual(E("a") | E("b") | E("c"), "a OR b OR c")
+        self.assertWireEqual(E("a") & E("b") | E("c"), "a AND b OR c")
+        self.assertWireEqual(E("a") | E("b") & E("c"), "a OR b AND c")
+        self.assertWireEqual((E("a") | E("b")) & E("c"), "(a OR b) AND c")
+        self.assertWireEqual(
+            (E("a") | E("b")) & (E("c") | E("d") & E("e")),
+            "(a OR b) AND (c OR d AND e)",
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
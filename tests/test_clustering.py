@@ -0,0 +1,58 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import unittest
+
+from pysqlexpr.boolean import ReturnsBool
+from pysqlexpr.clustering import predicate_columns, suggest_cluster_keys
+from pysqlexpr.query import Column, FromExpr, Join, Query
+from pysqlexpr.table import DATE, INTEGER, STRING, VARIANT
+from pysqlexpr.table import Column as TableColumn
+from pysqlexpr.table import Table
+
+
+class TestClustering(unittest.TestCase):
+    def test_suggest(self) -> None:
+        table = Table(
+            "event",
+            [
+                TableColumn("id", INTEGER),
+                TableColumn("event_date", DATE),
+                TableColumn("region", STRING),
+                TableColumn("payload", VARIANT),
+            ],
+        )
+        E = ReturnsBool
+        events = FromExpr("analytics.event", name="e")
+        queries = [
+            Query(
+                events,
+                [Column("e.id")],
+                where=E("e.event_date >= '2024-01-01'") & E("e.region = 'id'"),
+            ),
+            Query(events, [Column("id")], where=E("EVENT_DATE = CURRENT_DATE()")),
+            Query(
+                Join(events, FromExpr("region", name="r"), E("r.code = e.region")),
+                [Column("e.id")],
+                where=E("e.payload:kind = 'click'") & E("r.id > 0"),
+            ),
+            Query(FromExpr("other"), [Column("id")], where=E("region = 'x'")),
+        ]
+        self.assertEqual(predicate_columns(queries[0], table), {"event_date", "region"})
+        self.assertEqual(predicate_columns(queries[2], table), {"payload"})
+        self.assertEqual(suggest_cluster_keys(table, queries), ["event_date", "region"])
+        self.assertEqual(
+            suggest_cluster_keys(table, queries, max_keys=1), ["event_date"]
+        )
+
+        keys = suggest_cluster_keys(table, queries, max_keys=2)
+        self.assertEqual(
+            Table("event", table.columns, cluster_by=keys).cluster_by, tuple(keys)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import unittest
+
+from pysqlexpr.aggregate import Count
+from pysqlexpr.boolean import ReturnsBool
+from pysqlexpr.coalescing import CoalesceMode, coalesce, demultiplex
+from pysqlexpr.query import Column, FromExpr, Query, UnionAll
+
+E = ReturnsBool
+
+
+def lookup(customer: int, status: str) -> Query:
+    return Query(
+        FromExpr("orders", name="o"),
+        [Column("o.id"), Column("o.amount")],
+        where=E(f"o.customer_id = {customer}") & E(f"o.status = '{status}'"),
+    )
+
+
+class TestCoalescing(unittest.TestCase):
+    def test_union(self) -> None:
+        queries = [lookup(1, "open"), lookup(2, "closed"), lookup(3, "open")]
+        batches = coalesce(queries)
+        self.assertEqual(len(batches), 1)
+        batch = batches[0]
+        self.assertIsInstance(batch.query, UnionAll)
+        self.assertEqual(batch.requests, (0, 1, 2))
+        self.assertEqual(
+            batch.query.packed(),
+            "SELECT o.id, o.amount, 0 AS _request FROM orders AS o WHERE (o.customer_id = 1 AND o.status = 'open') "
+            "UNION ALL "
+            "SELECT o.id, o.amount, 1 AS _request FROM orders AS o WHERE (o.customer_id = 2 AND o.status = 'closed') "
+            "UNION ALL "
+            "SELECT o.id, o.amount, 2 AS _request FROM orders AS o WHERE (o.customer_id = 3 AND o.status = 'open')",
+        )
+        self.assertEqual(batch.query.packed_size(), len(batch.query.packed()))
+
+        rows = [(10, 1.5, 0), (11, 2.5, 2), (12, 3.5, 0)]
+        self.assertEqual(
+            demultiplex(batches, [rows]),
+            [[(10, 1.5), (12, 3.5)], [], [(11, 2.5)]],
+        )
+        with self.assertRaises(ValueError):
+            batch.demultiplex([(1, 1.0, 7)])
+
+    def test_values(self) -> None:
+        queries = [lookup(1, "open"), lookup(-2, "it''s")]
+        batches = coalesce(queries, mode="values")
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(
+            batches[0].query.packed(),
+            "SELECT o.id, o.amount, _p._request AS _request FROM orders AS o "
+            "INNER JOIN (SELECT $1 AS _request, $2 AS _p0, $3 AS _p1 "
+            "FROM VALUES (0, 1, 'open'), (1, -2, 'it''s')) AS _p ON TRUE "
+            "WHERE (o.customer_id = _p._p0 AND o.status = _p._p1)",
+        )
+
+        # aggregates are grouped by original query
+        grouped = [
+            Query(
+                FromExpr("orders"),
+                [Column("region"), Column(Count(), name="n")],
+                where=E(f"created >= DATE '2024-0{month}-01'"),
+                group_by=["region"],
+            )
+            for month in (1, 2)
+        ]
+        self.assertEqual(
+            coalesce(grouped, mode="values")[0].query.packed(),
+            "SELECT region, COUNT(*) AS n, _p._request AS _request FROM orders "
+            "INNER JOIN (SELECT $1 AS _request, $2 AS _p0 "
+            "FROM VALUES (0, DATE '2024-01-01'), (1, DATE '2024-02-01')) AS _p ON TRUE "
+            "WHERE created >= _p._p0 GROUP BY region, _p._request",
+        )
+
+        # an aggregate without grouping returns a row even if no rows match
+        totals = [q.with_columns([Column("SUM(o.amount)")]) for q in queries]
+        self.assertIsInstance(coalesce(totals, mode="values")[0].query, UnionAll)
+
+        # a window function would compute over the rows of all original queries
+        for expr in [
+            "ROW_NUMBER() OVER (ORDER BY o.amount DESC)",
+            "SUM(o.amount) over(PARTITION BY o.status)",
+        ]:
+            with self.subTest(expr=expr):
+                windowed = [
+                    q.with_columns([Column("o.id"), Column(expr, name="w")])
+                    for q in queries
+                ]
+                self.assertIsInstance(
+                    coalesce(windowed, mode="values")[0].query, UnionAll
+                )
+                grouped_windowed = [
+                    q.with_group_by(["o.id", "o.status"]) for q in windowed
+                ]
+                self.assertIsInstance(
+                    coalesce(grouped_windowed, mode="values")[0].query, UnionAll
+                )
+
+    def test_groups(self) -> None:
+        other = Query(
+            FromExpr("orders", name="o"),
+            [Column("o.id"), Column("o.amount")],
+            where=E("o.customer_id > 5"),
+        )
+        ordered = lookup(4, "open").with_order_by(["o.id"]).with_limit(10)
+        queries = [lookup(1, "open"), other, ordered, lookup(2, "open")]
+        batches = coalesce(queries)
+        self.assertEqual([batch.requests for batch in batches], [(0, 3), (1,), (2,)])
+        self.assertEqual(
+            batches[2].query.packed(),
+            "SELECT o.id, o.amount, 2 AS _request FROM orders AS o "
+            "WHERE (o.customer_id = 4 AND o.status = 'open') ORDER BY o.id LIMIT 10",
+        )
+        results = demultiplex(
+            batches, [[(1, 1.0, 3)], [(2, 2.0, 1)], [(3, 3.0, 2), (4, 4.0, 2)]]
+        )
+        self.assertEqual(results, [[], [(2, 2.0)], [(3, 3.0), (4, 4.0)], [(1, 1.0)]])
+
+    def test_limit(self) -> None:
+        queries = [lookup(i, "open") for i in range(100)]
+        modes: list[CoalesceMode] = ["union", "values"]
+        for mode in modes:
+            with self.subTest(mode=mode):
+                batches = coalesce(queries, mode=mode, limit=1000)
+                self.assertGreater(len(batches), 1)
+                for batch in batches:
+                    self.assertLessEqual(batch.query.packed_size(), 1000)
+                    self.assertEqual(
+                        batch.query.packed_size(), len(batch.query.packed())
+                    )
+                self.assertEqual(
+                    [i for batch in batches for i in batch.requests], list(range(100))
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
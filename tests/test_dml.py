@@ -0,0 +1,156 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import datetime
+import decimal
+import unittest
+from typing import Iterator
+
+from pysqlexpr.boolean import ReturnsBool
+from pysqlexpr.dml import Delete, Update, sql_literal
+from pysqlexpr.indentation import utf8_len
+from pysqlexpr.query import Column, FromExpr, Query
+from pysqlexpr.size import StatementTooLargeError
+from pysqlexpr.table import DATE, INTEGER, STRING, NumberType, Table
+from pysqlexpr.table import Column as TableColumn
+
+TABLE = Table(
+    "ledger",
+    [
+        TableColumn("id", INTEGER, nullable=False),
+        TableColumn("locale", STRING, nullable=False),
+        TableColumn("amount", NumberType(9, 2)),
+        TableColumn("status", STRING),
+        TableColumn("updated", DATE),
+    ],
+    primary_key=["id", "locale"],
+)
+
+
+class TestDML(unittest.TestCase):
+    def test_literal(self) -> None:
+        self.assertEqual(sql_literal(None), "NULL")
+        self.assertEqual(sql_literal(True), "TRUE")
+        self.assertEqual(sql_literal(-42), "-42")
+        self.assertEqual(sql_literal(0.5), "0.5")
+        self.assertEqual(sql_literal(float("inf")), "'inf'::FLOAT")
+        self.assertEqual(sql_literal(decimal.Decimal("1.20")), "1.20")
+        self.assertEqual(sql_literal("it's"), "'it''s'")
+        self.assertEqual(sql_literal(b"\x01\xab"), "X'01AB'")
+        self.assertEqual(sql_literal(datetime.date(2024, 1, 31)), "DATE '2024-01-31'")
+        self.assertEqual(
+            sql_literal(datetime.datetime(2024, 1, 31, 12, 30)),
+            "TIMESTAMP '2024-01-31 12:30:00'",
+        )
+        self.assertEqual(
+            sql_literal(
+                datetime.datetime(2024, 1, 31, 12, 30, tzinfo=datetime.timezone.utc)
+            ),
+            "TIMESTAMP_TZ '2024-01-31 12:30:00+00:00'",
+        )
+        self.assertEqual(sql_literal(datetime.time(8, 15)), "TIME '08:15:00'")
+        with self.assertRaises(TypeError):
+            sql_literal(object())
+
+    def test_delete(self) -> None:
+        statement = Delete(TABLE, ["id", "locale"], [(1, "en"), (2, "de")])
+        self.assertEqual(
+            list(statement.statements()),
+            [
+                "DELETE FROM ledger USING (VALUES (1, 'en'), (2, 'de')) AS k (id, locale) "
+                "WHERE ledger.id = k.id AND ledger.locale = k.locale;"
+            ],
+        )
+
+        source = Query(
+            FromExpr("corrections", name="c"),
+            [Column("c.id"), Column("c.locale")],
+            where=ReturnsBool("c.action = 'delete'"),
+        )
+        statements = list(Delete(TABLE, ["ID", "LOCALE"], source).statements())
+        self.assertEqual(
+            statements,
+            [
+                "DELETE FROM ledger USING (SELECT c.id, c.locale FROM corrections AS c "
+                "WHERE c.action = 'delete') AS k (id, locale) "
+                "WHERE ledger.id = k.id AND ledger.locale = k.locale;"
+            ],
+        )
+        with self.assertRaises(StatementTooLargeError):
+            list(Delete(TABLE, ["id", "locale"], source).statements(100))
+
+        with self.assertRaises(ValueError):
+            Delete(TABLE, ["missing"], [])
+        with self.assertRaises(ValueError):
+            Delete(TABLE, [], [])
+        with self.assertRaises(ValueError):
+            list(Delete(TABLE, ["id"], [(1, "en")]).statements())
+
+    def test_update(self) -> None:
+        statement = Update(
+            TABLE,
+            ["id", "locale"],
+            [(1, "en", decimal.Decimal("9.99"), "fixed")],
+            columns=["amount", "status"],
+            assignments={"updated": "CURRENT_DATE()"},
+        )
+        self.assertEqual(
+            list(statement.statements()),
+            [
+                "UPDATE ledger SET amount = k.amount, status = k.status, updated = CURRENT_DATE() "
+                "FROM (VALUES (1, 'en', 9.99, 'fixed')) AS k (id, locale, amount, status) "
+                "WHERE ledger.id = k.id AND ledger.locale = k.locale;"
+            ],
+        )
+
+        source = Query(FromExpr("corrections", name="c"), [Column("c.id")])
+        self.assertEqual(
+            list(
+                Update(
+                    TABLE, ["id"], source, assignments={"status": "'void'"}
+                ).statements()
+            ),
+            [
+                "UPDATE ledger SET status = 'void' "
+                "FROM (SELECT c.id FROM corrections AS c) AS k (id) "
+                "WHERE ledger.id = k.id;"
+            ],
+        )
+
+        with self.assertRaises(ValueError):
+            Update(TABLE, ["id"], [])
+        with self.assertRaises(ValueError):
+            Update(TABLE, ["id"], [], columns=["id"])
+        with self.assertRaises(ValueError):
+            Update(TABLE, ["id"], [], columns=["status"], assignments={"STATUS": "1"})
+
+    def test_chunk(self) -> None:
+        consumed = 0
+
+        def keys() -> Iterator[tuple[int, str]]:
+            nonlocal consumed
+            for i in range(10_000):
+                consumed += 1
+                yield (i, "en")
+
+        statements = Delete(TABLE, ["id", "locale"], keys()).statements(4096)
+        first = next(statements)
+        self.assertLessEqual(utf8_len(first), 4096)
+        self.assertLess(consumed, 10_000)
+
+        rest = list(statements)
+        self.assertGreater(len(rest), 1)
+        for statement in rest:
+            self.assertLessEqual(utf8_len(statement), 4096)
+            self.assertTrue(statement.endswith("ledger.locale = k.locale;"))
+        self.assertEqual(sum(s.count("'en')") for s in [first] + rest), 10_000)
+
+        with self.assertRaises(StatementTooLargeError):
+            list(Delete(TABLE, ["id", "locale"], [(1, "x" * 200)]).statements(200))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,276 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import unittest
+
+from pysqlexpr.boolean import ReturnsBool
+from pysqlexpr.elimination import convert_semi_joins, eliminate_joins
+from pysqlexpr.query import (
+    Column,
+    Exists,
+    FromExpr,
+    Join,
+    LeftJoin,
+    NotExists,
+    Query,
+)
+from pysqlexpr.table import DATE, INTEGER, STRING
+from pysqlexpr.table import Column as TableColumn
+from pysqlexpr.table import Table
+
+E = ReturnsBool
+
+TABLES = [
+    Table(
+        "customer",
+        [
+            TableColumn("id", INTEGER, nullable=False),
+            TableColumn("name", STRING),
+            TableColumn("email", STRING, unique=True),
+        ],
+        primary_key=["id"],
+    ),
+    Table(
+        "calendar",
+        [
+            TableColumn("day", DATE),
+            TableColumn("fiscal_year", INTEGER),
+            TableColumn("locale", STRING),
+        ],
+        unique_keys=[["day", "locale"]],
+    ),
+    Table("segment", [TableColumn("id", INTEGER), TableColumn("label", STRING)]),
+]
+
+
+class TestElimination(unittest.TestCase):
+    def test_unused(self) -> None:
+        orders = FromExpr("sales.orders", name="o")
+        source = LeftJoin(
+            LeftJoin(
+                orders,
+                FromExpr("customer", name="c"),
+                E("o.customer_id = c.id"),
+            ),
+            FromExpr("calendar", name="d"),
+            E("d.day = o.order_date") & E("d.locale = 'en'") & E("d.locale = o.locale"),
+        )
+        query = Query(
+            source,
+            [Column("o.id"), Column("SUM(o.amount)", name="total")],
+            where=E("o.status = 'open'"),
+            group_by=["o.id"],
+        )
+        optimized = eliminate_joins(query, TABLES)
+        self.assertEqual(
+            optimized.packed(),
+            "SELECT o.id, SUM(o.amount) AS total FROM sales.orders AS o WHERE o.status = 'open' GROUP BY o.id",
+        )
+        self.assertIs(optimized.columns, query.columns)
+        self.assertIs(optimized.where, query.where)
+
+        # tables given as a mapping
+        self.assertEqual(
+            eliminate_joins(query, {t.name.raw: t for t in TABLES}), optimized
+        )
+
+    def test_unique_column(self) -> None:
+        query = Query(
+            LeftJoin(
+                FromExpr("orders", name="o"),
+                FromExpr("customer"),
+                E("customer.email = o.email"),
+            ),
+            [Column("o.id")],
+        )
+        self.assertEqual(
+            eliminate_joins(query, TABLES).packed(), "SELECT o.id FROM orders AS o"
+        )
+
+    def test_kept(self) -> None:
+        orders = FromExpr("orders", name="o")
+        customer = FromExpr("customer", name="c")
+        on_key = E("o.customer_id = c.id")
+
+        queries = [
+            # referenced in the SELECT list, WHERE, GROUP BY, QUALIFY and ORDER BY clauses
+            Query(LeftJoin(orders, customer, on_key), [Column("c.name")]),
+            Query(
+                LeftJoin(orders, customer, on_key),
+                [Column("o.id")],
+                where=E("C.name LIKE 'A%'"),
+            ),
+            Query(
+                LeftJoin(orders, customer, on_key),
+                [Column("COUNT(*)")],
+                group_by=["c.name"],
+            ),
+            Query(
+                LeftJoin(orders, customer, on_key),
+                [Column("o.id")],
+                qualify=E("ROW_NUMBER() OVER (PARTITION BY c.id ORDER BY o.id) = 1"),
+            ),
+            Query(
+                LeftJoin(orders, customer, on_key),
+                [Column("o.id")],
+                order_by=["c.name"],
+            ),
+            # referenced in another join condition
+            Query(
+                Join(
+                    LeftJoin(orders, customer, on_key),
+                    FromExpr("segment", name="s"),
+                    E("s.id = c.segment_id"),
+                ),
+                [Column("o.id")],
+            ),
+            # unqualified column of the right side, or all columns
+            Query(LeftJoin(orders, customer, on_key), [Column("name")]),
+            Query(LeftJoin(orders, customer, on_key), [Column("*")]),
+            # join condition not on a unique key
+            Query(
+                LeftJoin(orders, customer, E("o.customer_name = c.name")),
+                [Column("o.id")],
+            ),
+            Query(
+                LeftJoin(orders, customer, E("o.customer_id >= c.id")),
+                [Column("o.id")],
+            ),
+            Query(
+                LeftJoin(
+                    orders,
+                    FromExpr("calendar", name="d"),
+                    E("d.day = o.order_date"),
+                ),
+                [Column("o.id")],
+            ),
+            Query(
+                LeftJoin(orders, customer, E("o.customer_id = c.id") | E("o.x = c.id")),
+                [Column("o.id")],
+            ),
+            # no uniqueness metadata, or unknown table
+            Query(
+                LeftJoin(orders, FromExpr("segment", name="s"), E("o.segment = s.id")),
+                [Column("o.id")],
+            ),
+            Query(
+                LeftJoin(orders, FromExpr("product", name="p"), E("o.product = p.id")),
+                [Column("o.id")],
+            ),
+            # inner joins filter rows
+            Query(Join(orders, customer, on_key), [Column("o.id")]),
+        ]
+        for query in queries:
+            with self.subTest(query=query.packed()):
+                self.assertIs(eliminate_joins(query, TABLES), query)
+
+    def test_sub_query(self) -> None:
+        inner = Query(
+            LeftJoin(
+                FromExpr("orders", name="o"),
+                FromExpr("customer", name="c"),
+                E("o.customer_id = c.id"),
+            ),
+            [Column("o.id"), Column("o.amount")],
+        )
+        query = Query(FromExpr(inner, name="t"), [Column("SUM(t.amount)")])
+        self.assertEqual(
+            eliminate_joins(query, TABLES).packed(),
+            "SELECT SUM(t.amount) FROM (SELECT o.id, o.amount FROM orders AS o) AS t",
+        )
+
+    def test_semi_join(self) -> None:
+        orders = FromExpr("orders", name="o")
+        segment = FromExpr("segment", name="s")
+
+        # fan-out collapsed by GROUP BY
+        query = Query(
+            Join(orders, segment, E("s.id = o.segment_id")),
+            [
+                Column("o.region"),
+                Column("MAX(o.amount)"),
+                Column("COUNT(DISTINCT o.id)"),
+            ],
+            where=E("o.status = 'open'"),
+            group_by=["o.region"],
+        )
+        self.assertEqual(
+            convert_semi_joins(query, TABLES).packed(),
+            "SELECT o.region, MAX(o.amount), COUNT(DISTINCT o.id) FROM orders AS o "
+            "WHERE (o.status = 'open' AND o.segment_id IN (SELECT s.id FROM segment AS s)) "
+            "GROUP BY o.region",
+        )
+
+        # unique key, multi-column condition
+        query = Query(
+            Join(
+                orders,
+                FromExpr("calendar", name="d"),
+                E("d.day = o.order_date") & E("d.locale = o.locale"),
+            ),
+            [Column("o.id")],
+        )
+        optimized = convert_semi_joins(query, TABLES)
+        self.assertEqual(
+            optimized.packed(),
+            "SELECT o.id FROM orders AS o WHERE EXISTS "
+            "(SELECT 1 FROM calendar AS d WHERE (d.day = o.order_date AND d.locale = o.locale))",
+        )
+        self.assertIsInstance(optimized.where, Exists)
+        self.assertEqual(optimized.packed_size(), len(optimized.packed()))
+
+        # anti-join
+        self.assertEqual(
+            NotExists(
+                Query(segment, [Column("1")], where=E("s.id = o.segment_id"))
+            ).wire(),
+            "NOT EXISTS(SELECT 1 FROM segment AS s WHERE s.id = o.segment_id)",
+        )
+
+    def test_semi_join_kept(self) -> None:
+        orders = FromExpr("orders", name="o")
+        segment = FromExpr("segment", name="s")
+        on_segment = E("s.id = o.segment_id")
+
+        queries = [
+            # fan-out changes the result
+            Query(Join(orders, segment, on_segment), [Column("o.id")]),
+            Query(
+                Join(orders, segment, on_segment),
+                [Column("o.region"), Column("SUM(o.amount)")],
+                group_by=["o.region"],
+            ),
+            # columns of the right side are used
+            Query(
+                Join(orders, segment, on_segment),
+                [Column("s.label"), Column("MIN(o.amount)")],
+                group_by=["s.label"],
+            ),
+            # columns of the right side are used for ordering
+            Query(
+                Join(orders, segment, on_segment),
+                [Column("o.region"), Column("MIN(o.amount)")],
+                group_by=["o.region"],
+                order_by=["MIN(s.label)"],
+            ),
+            # right side of a join is null-extended
+            Query(
+                LeftJoin(
+                    FromExpr("customer", name="c"),
+                    Join(orders, segment, on_segment),
+                    E("o.customer_id = c.id"),
+                ),
+                [Column("c.id"), Column("MAX(o.amount)")],
+                group_by=["c.id"],
+            ),
+        ]
+        for query in queries:
+            with self.subTest(query=query.packed()):
+                self.assertIs(convert_semi_joins(query, TABLES), query)
+
+
+if __name__ == "__main__":
+    unittest.main()
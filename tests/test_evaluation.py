@@ -0,0 +1,192 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import datetime
+import importlib.util
+import unittest
+from typing import Any
+
+from pysqlexpr.boolean import BoolExpr, ReturnsBool
+from pysqlexpr.evaluation import compile_mask, compile_predicate, filter_rows
+from pysqlexpr.query import Exists, FromExpr, Query
+
+E = ReturnsBool
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+COLUMNS = ["id", "name", "amount", "created", "active"]
+ROWS: list[tuple[Any, ...]] = [
+    (1, "Alice", 10.5, datetime.date(2024, 1, 5), True),
+    (2, "bob", None, datetime.date(2024, 2, 1), False),
+    (3, None, 30.0, None, None),
+    (4, "O'Brien", 7.0, datetime.date(2023, 12, 31), True),
+]
+
+CASES: list[tuple[BoolExpr, list[bool | None]]] = [
+    (E("o.id = 2"), [False, True, False, False]),
+    (E("id <> 2"), [True, False, True, True]),
+    (E("amount >= 10"), [True, None, True, False]),
+    (E("amount > id"), [True, None, True, True]),
+    (E("name IS NULL"), [False, False, True, False]),
+    (E("name IS NOT NULL"), [True, True, False, True]),
+    (E("id IN (1, 3)"), [True, False, True, False]),
+    (E("id NOT IN (1, NULL)"), [False, None, None, None]),
+    (E("amount BETWEEN 7 AND 10.5"), [True, None, False, True]),
+    (E("name LIKE 'A%'"), [True, False, None, False]),
+    (E("name ILIKE '_O%'"), [False, True, None, False]),
+    (E("name = 'O''Brien'"), [False, False, None, True]),
+    (E("created < DATE '2024-01-31'"), [True, False, None, True]),
+    (E("created < '2024-01-31'"), [True, False, None, True]),
+    (E("amount >= '10'"), [True, None, True, False]),
+    (E("active"), [True, False, None, True]),
+    (E("NOT active"), [False, True, None, False]),
+    (E("NOT (amount > 8)"), [False, None, False, True]),
+    (E("TRUE"), [True, True, True, True]),
+    (E("NULL"), [None, None, None, None]),
+    # three-valued logic
+    (E("amount > 8") & E("id > 1"), [False, None, True, False]),
+    (E("amount > 8") | E("id > 1"), [True, True, True, True]),
+    (E("amount > 8") | E("id = 4"), [True, None, True, True]),
+    ((E("amount > 8") & E("active")) | E("name = 'bob'"), [True, True, None, False]),
+]
+
+# strings are converted to the type of the value they are compared with
+CONVERSION_COLUMNS = ["code", "flag", "stamp"]
+CONVERSION_ROWS: list[tuple[Any, ...]] = [
+    ("5", True, datetime.datetime(2024, 1, 5, 12)),
+    ("20", False, datetime.datetime(2024, 1, 31)),
+    (None, None, None),
+]
+CONVERSION_CASES: list[tuple[BoolExpr, list[bool | None]]] = [
+    (E("code > 10"), [False, True, None]),
+    (E("code = 20.0"), [False, True, None]),
+    (E("flag = 'yes'"), [True, False, None]),
+    (E("stamp >= DATE '2024-01-31'"), [False, True, None]),
+    (E("stamp < '2024-01-06'"), [True, False, None]),
+    (E("code IN (5, 7)"), [True, False, None]),
+    (E("code NOT IN (1, 2.0, 20)"), [True, False, None]),
+    (E("code IN (1, NULL)"), [None, None, None]),
+]
+TRUTH_ROWS: list[tuple[Any, ...]] = [("false",), ("Yes",), ("0",), (None,)]
+
+
+class TestEvaluation(unittest.TestCase):
+    def test_rows(self) -> None:
+        for expr, expected in CASES:
+            with self.subTest(expr=expr.packed()):
+                predicate = compile_predicate(expr, COLUMNS)
+                self.assertEqual([predicate(row) for row in ROWS], expected)
+
+    def test_mappings(self) -> None:
+        rows = [dict(zip(COLUMNS, row)) for row in ROWS]
+        expr = E("amount > 8") | E("name = 'bob'")
+        self.assertEqual(
+            [row["id"] for row in filter_rows(expr, rows)],
+            [1, 2, 3],
+        )
+        with self.assertRaises(KeyError):
+            list(filter_rows(E("missing = 1"), rows))
+
+    def test_unsupported(self) -> None:
+        for expr in [
+            E("UPPER(name) = 'BOB'"),
+            E("amount + 1 > 2"),
+            E("a = 1 AND b = 2"),
+            E("id IN (SELECT id FROM t)"),
+            E("created = DATE 'yesterday'"),
+            Exists(Query(FromExpr("t"), [])),
+        ]:
+            with self.subTest(expr=expr.packed()):
+                with self.assertRaises(ValueError):
+                    compile_predicate(expr, COLUMNS)
+        with self.assertRaises(ValueError):
+            compile_predicate(E("missing = 1"), COLUMNS)
+
+    def test_conversion(self) -> None:
+        for expr, expected in CONVERSION_CASES:
+            with self.subTest(expr=expr.packed()):
+                predicate = compile_predicate(expr, CONVERSION_COLUMNS)
+                self.assertEqual([predicate(row) for row in CONVERSION_ROWS], expected)
+
+        for expr in [
+            E("amount > 'abc'"),
+            E("created < 5"),
+            E("active = 'maybe'"),
+            E("name IN (1, 2)"),
+        ]:
+            with self.subTest(expr=expr.packed()):
+                predicate = compile_predicate(expr, COLUMNS)
+                with self.assertRaises(ValueError):
+                    predicate(ROWS[0])
+
+        predicate = compile_predicate(E("flag"), ["flag"])
+        self.assertEqual(
+            [predicate(row) for row in TRUTH_ROWS], [False, True, False, None]
+        )
+        with self.assertRaises(ValueError):
+            predicate(("maybe",))
+
+    @unittest.skipUnless(HAS_NUMPY, "requires numpy")
+    def test_mask(self) -> None:
+        import numpy as np
+
+        arrays = {
+            "id": np.array([row[0] for row in ROWS]),
+            "name": np.array([row[1] for row in ROWS], dtype=object),
+            "amount": np.array([np.nan if row[2] is None else row[2] for row in ROWS]),
+            "created": np.array([row[3] for row in ROWS], dtype="datetime64[D]"),
+            "active": np.ma.array(
+                [bool(row[4]) for row in ROWS], mask=[row[4] is None for row in ROWS]
+            ),
+        }
+        for expr, expected in CASES:
+            with self.subTest(expr=expr.packed()):
+                mask = compile_mask(expr)(arrays)
+                self.assertEqual(mask.dtype, np.bool_)
+                self.assertEqual(mask.tolist(), [value is True for value in expected])
+
+    @unittest.skipUnless(HAS_NUMPY, "requires numpy")
+    def test_mask_conversion(self) -> None:
+        import numpy as np
+
+        arrays = {
+            "code": np.array([row[0] for row in CONVERSION_ROWS], dtype=object),
+            "flag": np.ma.array(
+                [bool(row[1]) for row in CONVERSION_ROWS],
+                mask=[row[1] is None for row in CONVERSION_ROWS],
+            ),
+            "stamp": np.array(
+                [row[2] for row in CONVERSION_ROWS], dtype="datetime64[s]"
+            ),
+        }
+        for expr, expected in CONVERSION_CASES:
+            with self.subTest(expr=expr.packed()):
+                mask = compile_mask(expr)(arrays)
+                self.assertEqual(mask.tolist(), [value is True for value in expected])
+
+        for expr in [E("stamp < 'abc'"), E("flag = 'maybe'")]:
+            with self.subTest(expr=expr.packed()):
+                with self.assertRaises(ValueError):
+                    compile_mask(expr)(arrays)
+
+        for dtype in ["O", "U"]:
+            with self.subTest(dtype=dtype):
+                flag = np.array(["false", "Yes", "0"], dtype=dtype)
+                self.assertEqual(
+                    compile_mask(E("flag"))({"flag": flag}).tolist(),
+                    [False, True, False],
+                )
+                code = np.array(["5", "20", "7"], dtype=dtype)
+                self.assertEqual(
+                    compile_mask(E("code IN (5, 7)"))({"code": code}).tolist(),
+                    [True, False, True],
+                )
+        with self.assertRaises(ValueError):
+            compile_mask(E("flag"))({"flag": np.array(["maybe"], dtype=object)})
+
+
+if __name__ == "__main__":
+    unittest.main()
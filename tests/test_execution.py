@@ -0,0 +1,161 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import os.path
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from pysqlexpr.boolean import ReturnsBool
+from pysqlexpr.execution import ConnectionPool, Database, StatementMetrics
+from pysqlexpr.query import Column, FromExpr, Query
+from pysqlexpr.table import INTEGER, STRING
+from pysqlexpr.table import Column as TableColumn
+from pysqlexpr.table import Table
+
+
+class TestExecution(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        path = os.path.join(self.directory.name, "test.db")
+        self.connections = 0
+        self.lock = threading.Lock()
+
+        def connect() -> sqlite3.Connection:
+            with self.lock:
+                self.connections += 1
+            return sqlite3.connect(path, check_same_thread=False)
+
+        self.pool = ConnectionPool(connect, max_size=2)
+        self.table = Table(
+            "item",
+            [
+                TableColumn("id", INTEGER, nullable=False),
+                TableColumn("name", STRING),
+            ],
+        )
+
+    def tearDown(self) -> None:
+        self.pool.close()
+        self.directory.cleanup()
+
+    def test_execute(self) -> None:
+        metrics: list[StatementMetrics] = []
+        db = Database(self.pool, listener=metrics.append)
+        db.execute(self.table.as_stmt())
+        db.execute("INSERT INTO item (id, name) VALUES (?, ?)", (1, "one"))
+        db.execute("INSERT INTO item (id, name) VALUES (?, ?)", (2, "two"))
+
+        query = Query(
+            FromExpr("item"),
+            [Column("id"), Column("name")],
+            where=ReturnsBool("id > ?") & ReturnsBool("name IS NOT NULL"),
+        )
+        self.assertEqual(db.execute(query, (1,)), [(2, "two")])
+        self.assertEqual(db.metrics.statements, 4)
+        self.assertEqual(metrics[-1].statement, query.wire())
+        self.assertEqual(metrics[-1].rows, 1)
+        self.assertEqual(metrics[1].rows, 1)
+
+    def test_executemany(self) -> None:
+        db = Database(self.pool)
+        db.execute(self.table.as_stmt())
+
+        metrics: list[StatementMetrics] = []
+        db.listener = metrics.append
+        rows = ((i, f"item #{i}") for i in range(2500))
+        self.assertEqual(db.executemany(self.table, rows, batch_rows=1000), 2500)
+        self.assertEqual([m.rows for m in metrics], [1000, 1000, 500])
+        self.assertEqual(db.execute("SELECT COUNT(*) FROM item"), [(2500,)])
+
+        metrics.clear()
+        rows = ((i, "x" * 100) for i in range(100))
+        db.executemany(self.table, rows, batch_bytes=1000)
+        # each row is an estimated 108 bytes, so at most 9 rows fit in a batch
+        self.assertEqual([m.rows for m in metrics], [9] * 11 + [1])
+
+        metrics.clear()
+        db.executemany(self.table, [(1, "x" * 2000), (2, "y")], batch_bytes=1000)
+        self.assertEqual([m.rows for m in metrics], [1, 1])
+        self.assertGreater(db.metrics.rows_per_second, 0)
+
+        with self.assertRaises(ValueError):
+            db.executemany(self.table, [(1,)])
+
+    def test_pool(self) -> None:
+        db = Database(self.pool)
+        db.execute(self.table.as_stmt())
+
+        def worker(start: int) -> None:
+            db.executemany(
+                self.table,
+                ((i, None) for i in range(start, start + 100)),
+                batch_rows=10,
+            )
+
+        threads = [threading.Thread(target=worker, args=(i * 100,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(db.execute("SELECT COUNT(*) FROM item"), [(800,)])
+        self.assertLessEqual(self.connections, 2)
+
+        with self.pool.connection():
+            with self.pool.connection():
+                with self.assertRaises(TimeoutError):
+                    with self.pool.connection(timeout=0.01):
+                        pass
+
+    def test_rollback(self) -> None:
+        db = Database(self.pool)
+        db.execute(self.table.as_stmt())
+        with self.assertRaises(RuntimeError):
+            with self.pool.connection() as conn:
+                conn.cursor().execute("INSERT INTO item (id, name) VALUES (1, 'a')")
+                raise RuntimeError()
+        self.assertEqual(db.execute("SELECT COUNT(*) FROM item"), [(0,)])
+
+    def test_discard(self) -> None:
+        "A connection whose commit or rollback fails is not returned to the pool."
+
+        class BrokenConnection:
+            def __init__(self) -> None:
+                self.closed = False
+
+            def cursor(self) -> sqlite3.Cursor:
+                raise NotImplementedError()
+
+            def commit(self) -> None:
+                raise sqlite3.OperationalError("commit failed")
+
+            def rollback(self) -> None:
+                raise sqlite3.OperationalError("rollback failed")
+
+            def close(self) -> None:
+                self.closed = True
+
+        created: list[BrokenConnection] = []
+
+        def connect() -> BrokenConnection:
+            created.append(BrokenConnection())
+            return created[-1]
+
+        with ConnectionPool(connect, max_size=1) as pool:
+            with self.assertRaises(sqlite3.OperationalError):
+                with pool.connection():
+                    pass
+            with self.assertRaises(sqlite3.OperationalError):
+                with pool.connection():
+                    raise RuntimeError()
+            self.assertEqual(len(created), 2)
+            self.assertTrue(all(conn.closed for conn in created))
+            self.assertTrue(pool.idle.empty())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import copy
+import pickle
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pysqlexpr.aggregate import Count
+from pysqlexpr.boolean import ReturnsBool
+from pysqlexpr.identifier import Identifier
+from pysqlexpr.query import Column, FromExpr, Join, Query, Sample
+from pysqlexpr.table import INTEGER, STRING, Statistics, Table
+from pysqlexpr.table import Column as TableColumn
+
+E = ReturnsBool
+
+
+def make_query(k: int) -> Query:
+    return Query(
+        Join(
+            FromExpr("orders", name="o", sample=Sample(10)),
+            FromExpr("customer", name="c"),
+            E("o.customer_id = c.id"),
+        ),
+        [Column("c.name"), Column(Count(), name="n")],
+        where=(E(f"o.amount > {k}") & E("c.active")) | E(f"c.id = {k}"),
+        group_by=["c.name"],
+        order_by=["n DESC"],
+        limit=k,
+    )
+
+
+class TestImmutable(unittest.TestCase):
+    def test_assign(self) -> None:
+        query = make_query(1)
+        nodes: list[object] = [
+            query,
+            query.source,
+            query.columns,
+            query.columns.columns[0],
+            query.where,
+            Count(),
+            Sample(10),
+            Identifier("a"),
+            Statistics(10),
+            INTEGER,
+            TableColumn("id", INTEGER),
+            Table("orders", [TableColumn("id", INTEGER)]),
+        ]
+        for node in nodes:
+            with self.subTest(node=type(node).__name__):
+                with self.assertRaises(AttributeError):
+                    setattr(node, "limit", 10)
+                with self.assertRaises(AttributeError):
+                    delattr(node, "__class__")
+
+        # private caches cannot be tampered with either
+        query.packed()
+        with self.assertRaises(AttributeError):
+            setattr(query, "_packed", "SELECT 1")
+        self.assertTrue(query.packed().startswith("SELECT c.name"))
+
+    def test_table(self) -> None:
+        columns = [TableColumn("id", INTEGER), TableColumn("name", STRING)]
+        statistics = Statistics(10, {"id": 10, "name": 4})
+        table = Table("orders", columns, statistics=statistics)
+
+        # the list passed to the constructor is not shared
+        columns.append(TableColumn("amount", INTEGER))
+        self.assertEqual(len(table.columns), 2)
+
+        with self.assertRaises(TypeError):
+            statistics.distinct_values["ID"] = 1  # type: ignore[index]
+        self.assertEqual(statistics.get_distinct_values("id"), 10)
+
+        for clone in [copy.copy(table), pickle.loads(pickle.dumps(table))]:
+            self.assertEqual(str(clone), str(table))
+            assert clone.statistics is not None
+            self.assertEqual(
+                dict(clone.statistics.distinct_values), {"ID": 10, "NAME": 4}
+            )
+
+    def test_copy(self) -> None:
+        query = make_query(1)
+        query.packed()
+        for clone in [copy.copy(query), copy.deepcopy(query)]:
+            self.assertEqual(clone, query)
+            self.assertEqual(clone.packed(), query.packed())
+        self.assertEqual(pickle.loads(pickle.dumps(query)), query)
+
+    def test_concurrent(self) -> None:
+        "Many threads render the same trees, whose caches are cold, at the same time."
+
+        thread_count = 8
+        expected = [
+            (q.packed(), q.wire(), q.spacious(), q.packed_size(), hash(q))
+            for q in (make_query(k) for k in range(50))
+        ]
+        for _ in range(5):
+            shared = [make_query(k) for k in range(50)]
+            barrier = threading.Barrier(thread_count)
+
+            def render(offset: int) -> list[tuple[str, str, str, int, int]]:
+                barrier.wait()
+                results = [
+                    (q.packed(), q.wire(), q.spacious(), q.packed_size(), hash(q))
+                    for q in shared[offset:] + shared[:offset]
+                ]
+                return results[-offset:] + results[:-offset] if offset else results
+
+            with ThreadPoolExecutor(thread_count) as executor:
+                outputs = list(executor.map(render, range(thread_count)))
+            for output in outputs:
+                self.assertEqual(output, expected)
+
+            derived = [q.with_limit(None) for q in shared]
+            self.assertTrue(all(d.where is q.where for d, q in zip(derived, shared)))
+
+
+if __name__ == "__main__":
+    unittest.main()
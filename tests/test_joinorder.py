@@ -0,0 +1,144 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import unittest
+
+from pysqlexpr.boolean import ReturnsBool
+from pysqlexpr.joinorder import reorder_joins
+from pysqlexpr.query import Column, FromExpr, Join, LateralJoin, LeftJoin, Query
+from pysqlexpr.table import INTEGER, STRING, Statistics
+from pysqlexpr.table import Column as TableColumn
+from pysqlexpr.table import Table
+
+E = ReturnsBool
+
+
+def make_table(name: str, rows: int, **distinct_values: int) -> Table:
+    return Table(
+        name,
+        [TableColumn("id", INTEGER), TableColumn("label", STRING)],
+        statistics=Statistics(rows, distinct_values),
+    )
+
+
+TABLES = [
+    make_table("fact", 1_000_000_000),
+    make_table("customer", 10_000_000),
+    make_table("country", 200),
+    make_table("vip", 100),
+]
+
+
+class TestJoinOrder(unittest.TestCase):
+    def make_query(self) -> Query:
+        source = Join(
+            Join(
+                Join(
+                    FromExpr("fact", name="f"),
+                    FromExpr("customer", name="c"),
+                    E("f.customer_id = c.id"),
+                ),
+                FromExpr("country", name="n"),
+                E("c.country_id = n.id"),
+            ),
+            FromExpr("vip", name="v"),
+            E("v.customer_id = c.id") & E("v.since > f.created_at"),
+        )
+        return Query(source, [Column("f.id"), Column("n.label")])
+
+    def test_reorder(self) -> None:
+        query = self.make_query()
+        result = reorder_joins(query, TABLES)
+        self.assertEqual(
+            result.query.packed(),
+            "SELECT f.id, n.label FROM vip AS v "
+            "INNER JOIN customer AS c ON v.customer_id = c.id "
+            "INNER JOIN country AS n ON c.country_id = n.id "
+            "INNER JOIN fact AS f ON (f.customer_id = c.id AND v.since > f.created_at)",
+        )
+        self.assertIs(result.query.columns, query.columns)
+        self.assertEqual(len(result.before), 1)
+        self.assertEqual(len(result.after), 1)
+        self.assertEqual(
+            result.after[0].order,
+            ["vip AS v", "customer AS c", "country AS n", "fact AS f"],
+        )
+        self.assertEqual(result.after[0].rows[:2], [100.0, 100.0])
+        self.assertLess(result.cost_after, result.cost_before)
+
+        # greedy search finds the same order
+        greedy = reorder_joins(query, TABLES, exhaustive_limit=2)
+        self.assertEqual(greedy.query, result.query)
+
+        # optimal order is kept
+        self.assertIs(reorder_joins(result.query, TABLES).query, result.query)
+
+    def test_statistics(self) -> None:
+        # statistics on a FROM expression override those of the table
+        source = Join(
+            Join(
+                FromExpr("country", name="n", statistics=Statistics(10**9)),
+                FromExpr("customer", name="c"),
+                E("c.country_id = n.id"),
+            ),
+            FromExpr("vip", name="v"),
+            E("v.customer_id = c.id"),
+        )
+        query = Query(source, [Column("c.id")])
+        result = reorder_joins(query, TABLES)
+        self.assertEqual(
+            result.after[0].order, ["vip AS v", "customer AS c", "country AS n"]
+        )
+
+        # number of distinct values limits the selectivity of an equi-join
+        country = Statistics(200, {"ID": 50})
+        skewed = Statistics(10_000_000, {"country_id": 2})
+        source = Join(
+            Join(
+                FromExpr("customer", name="c", statistics=skewed),
+                FromExpr("country", name="n", statistics=country),
+                E("c.country_id = n.id"),
+            ),
+            FromExpr("vip", name="v"),
+            E("v.customer_id = c.id"),
+        )
+        result = reorder_joins(Query(source, [Column("c.id")]), TABLES)
+        self.assertEqual(result.before[0].rows, [10_000_000, 40_000_000, 400])
+
+    def test_kept(self) -> None:
+        query = self.make_query()
+
+        # unknown statistics
+        self.assertIs(reorder_joins(query).query, query)
+        self.assertEqual(reorder_joins(query).before, [])
+
+        # order of columns in result depends on order of joins
+        star = query.with_columns([Column("*")])
+        self.assertIs(reorder_joins(star, TABLES).query, star)
+
+    def test_barriers(self) -> None:
+        inner = self.make_query().source
+        source = LateralJoin(
+            FromExpr(
+                LeftJoin(inner, FromExpr("product", name="p"), E("p.id = f.product_id"))
+            ),
+            FromExpr("FLATTEN(INPUT => f.tags)", name="t"),
+        )
+        query = Query(source, [Column("f.id")])
+        result = reorder_joins(query, TABLES)
+        self.assertEqual(
+            result.query.packed(),
+            "SELECT f.id FROM vip AS v "
+            "INNER JOIN customer AS c ON v.customer_id = c.id "
+            "INNER JOIN country AS n ON c.country_id = n.id "
+            "INNER JOIN fact AS f ON (f.customer_id = c.id AND v.since > f.created_at) "
+            "LEFT JOIN product AS p ON p.id = f.product_id "
+            "INNER JOIN LATERAL FLATTEN(INPUT => f.tags) AS t",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
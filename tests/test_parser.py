@@ -0,0 +1,190 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import unittest
+
+from pysqlexpr.boolean import ConjExpr, DisjExpr, ReturnsBool
+from pysqlexpr.identifier import Identifier
+from pysqlexpr.parser import ParseError, parse_condition, parse_identifier, parse_query
+from pysqlexpr.query import (
+    Column,
+    Exists,
+    FromExpr,
+    InSubquery,
+    Join,
+    LateralJoin,
+    LeftJoin,
+    NotExists,
+    Query,
+    RightJoin,
+    Sample,
+)
+
+E = ReturnsBool
+
+
+def make_query() -> Query:
+    source = Join(
+        LeftJoin(
+            LateralJoin(
+                FromExpr("address", name="a"),
+                FromExpr("TABLE(FLATTEN(INPUT => a.phone_numbers))", name="p"),
+            ),
+            FromExpr("country", name="c", sample=Sample(10, method="SYSTEM", seed=7)),
+            E("a.country_id = c.id"),
+        ),
+        FromExpr(
+            Query(FromExpr("customer"), [Column("id"), Column("address_id")]),
+            name="u",
+        ),
+        E("u.address_id = a.id"),
+    )
+    blocked = Query(
+        FromExpr("blocked", name="b", sample=Sample(rows=5)),
+        [Column("1")],
+        where=E("b.zip = a.zip"),
+    )
+    return Query(
+        source=source,
+        columns=[
+            Column("a.zip"),
+            Column("c.name", name="country"),
+            Column("-1"),
+            Column("CASE WHEN a.zip LIKE '1%' THEN 'A' ELSE 'B' END", name="zone"),
+            Column("p.value:number::STRING", name="phone"),
+        ],
+        where=E("a.zip IS NOT NULL")
+        & (E("c.name = 'Hungary'") | E("c.id > -42"))
+        & E("a.created BETWEEN DATE '2024-01-01' AND CURRENT_DATE()")
+        & InSubquery("a.id", Query(FromExpr("customer"), [Column("address_id")]))
+        & (
+            Exists(blocked)
+            | NotExists(Query(FromExpr("blocked", name="b"), [Column("1")]))
+        ),
+        group_by=["a.zip", "c.name"],
+        qualify=E("ROW_NUMBER() OVER (PARTITION BY a.zip ORDER BY c.id) = 1"),
+        order_by=["a.zip DESC", "country"],
+        limit=100,
+        offset=10,
+    )
+
+
+class TestParser(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        queries = [
+            make_query(),
+            Query(FromExpr("t"), [Column("*")]),
+            Query(FromExpr("t"), [Column("*")], limit=None, offset=5),
+            Query(
+                RightJoin(
+                    FromExpr("a"),
+                    Join(FromExpr("b"), FromExpr("c"), E("b.id = c.id")),
+                    E("a.id = b.id") & E("LEFT(a.code, 2) = 'HU'"),
+                ),
+                [Column("a.id", name="id")],
+                where=(E("a.x = 1") & E("a.y = 2")) | (E("a.x = 2") & E("a.y = 1")),
+            ),
+            Query(
+                FromExpr(
+                    Query(FromExpr("t", sample=Sample(0.5)), [Column("x")]),
+                    name="s",
+                ),
+                [Column("COUNT(*)", name="n")],
+            ),
+        ]
+        for query in queries:
+            for text in [query.packed(), query.wire(), query.spacious()]:
+                with self.subTest(text=text):
+                    self.assertEqual(parse_query(text), query)
+
+    def test_text(self) -> None:
+        query = parse_query("""
+            -- comment
+            select a.id, /* inline */ upper( a.name )  as "Name"
+            from "db"."schema".accounts a tablesample block (5) repeatable (3)
+            left outer join owners as o on a.owner_id = o.id
+            where a.active and (a.balance > 0 or a.id in (select id from vip))
+            order by 1
+            fetch first 10 rows only;
+            """)
+        self.assertEqual(
+            query,
+            Query(
+                LeftJoin(
+                    FromExpr(
+                        '"db"."schema".accounts',
+                        name="a",
+                        sample=Sample(5, method="SYSTEM", seed=3),
+                    ),
+                    FromExpr("owners", name="o"),
+                    E("a.owner_id = o.id"),
+                ),
+                [Column("a.id"), Column("upper( a.name )", name='"Name"')],
+                where=E("a.active")
+                & (
+                    E("a.balance > 0")
+                    | InSubquery("a.id", Query(FromExpr("vip"), [Column("id")]))
+                ),
+                order_by=["1"],
+                limit=10,
+            ),
+        )
+
+    def test_lateral(self) -> None:
+        query = Query(
+            LateralJoin(FromExpr("t"), FromExpr("FLATTEN(input => t.v)", name="f")),
+            [Column("f.value")],
+        )
+        for text in [
+            "SELECT f.value FROM t, LATERAL FLATTEN(input => t.v) f",
+            "SELECT f.value FROM t JOIN LATERAL FLATTEN(input => t.v) AS f",
+        ]:
+            with self.subTest(text=text):
+                parsed = parse_query(text)
+                self.assertEqual(parsed, query)
+                self.assertEqual(parse_query(parsed.packed()), query)
+
+    def test_condition(self) -> None:
+        self.assertEqual(
+            parse_condition("a = 1 AND (b = 2 AND c = 3) OR NOT d"),
+            DisjExpr([ConjExpr([E("a = 1"), E("b = 2"), E("c = 3")]), E("NOT d")]),
+        )
+        self.assertEqual(parse_condition("(x) = 1"), E("(x) = 1"))
+        self.assertEqual(
+            parse_condition("x NOT IN (SELECT y FROM t) AND z"),
+            ConjExpr([E("x NOT IN (SELECT y FROM t)"), E("z")]),
+        )
+
+    def test_identifier(self) -> None:
+        self.assertEqual(parse_identifier("payload"), Identifier("payload"))
+        identifier = Identifier("payload", path="customer/Full name")
+        self.assertEqual(parse_identifier(str(identifier)), identifier)
+
+    def test_errors(self) -> None:
+        for text in [
+            "SELECT DISTINCT a FROM t",
+            "SELECT a FROM t HAVING COUNT(*) > 1",
+            "SELECT a FROM t UNION SELECT b FROM u",
+            "SELECT a FROM t, u",
+            "SELECT a FROM t CROSS JOIN u",
+            "SELECT a FROM t WHERE (a = 1",
+            "SELECT a FROM t LIMIT -1",
+            "SELECT a FROM t WHERE",
+            "SELECT a",
+            "SELECT a FROM t; SELECT b FROM u",
+            "SELECT a FROM t WHERE a = #",
+        ]:
+            with self.subTest(text=text):
+                with self.assertRaises(ParseError):
+                    parse_query(text)
+        with self.assertRaisesRegex(ParseError, "unsupported: USING"):
+            parse_query("SELECT a FROM t JOIN u USING (id)")
+        with self.assertRaisesRegex(ParseError, "line 2, column 8"):
+            parse_query("SELECT a\nFROM t HAVING a > 1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator
+
+from pysqlexpr.boolean import ReturnsBool
+from pysqlexpr.pipeline import PipelineResult, run_pipeline
+from pysqlexpr.query import Column, FromExpr, Query
+
+
+class FakeDriver:
+    "Simulates a database that takes some time to respond."
+
+    def __init__(self) -> None:
+        self.active = 0
+        self.peak = 0
+        self.statements: list[str] = []
+
+    async def execute(self, statement: str) -> int:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.001 * (len(self.statements) % 3))
+            self.statements.append(statement)
+            if "13" in statement:
+                raise RuntimeError("simulated failure")
+            return len(statement)
+        finally:
+            self.active -= 1
+
+
+def build(spec: int) -> Query:
+    return Query(
+        FromExpr("customer"),
+        [Column("id"), Column("name")],
+        where=ReturnsBool(f"id = {spec}"),
+    )
+
+
+class TestPipeline(unittest.IsolatedAsyncioTestCase):
+    async def test_pipeline(self) -> None:
+        produced = 0
+
+        async def specs() -> AsyncIterator[int]:
+            nonlocal produced
+            for i in range(100):
+                produced += 1
+                yield i
+
+        driver = FakeDriver()
+        results: list[PipelineResult[int, int]] = []
+        with ThreadPoolExecutor(4) as executor:
+            async for result in run_pipeline(
+                specs(), build, driver, executor=executor, concurrency=8
+            ):
+                self.assertLessEqual(produced - len(results), 8)
+                results.append(result)
+
+        self.assertEqual(len(results), 100)
+        self.assertLessEqual(driver.peak, 8)
+        self.assertGreater(driver.peak, 1)
+        self.assertEqual(sorted(r.spec for r in results), list(range(100)))
+
+        for result in results:
+            self.assertEqual(result.statement, build(result.spec).wire())
+            if result.spec == 13:
+                self.assertIsInstance(result.error, RuntimeError)
+            else:
+                self.assertIsNone(result.error)
+                self.assertEqual(result.result, len(build(result.spec).wire()))
+
+    async def test_build_error(self) -> None:
+        async def specs() -> AsyncIterator[int]:
+            yield 1
+            yield -1
+
+        def failing_build(spec: int) -> Query:
+            if spec < 0:
+                raise ValueError("negative")
+            return build(spec)
+
+        driver = FakeDriver()
+        results = [r async for r in run_pipeline(specs(), failing_build, driver)]
+        errors = [r for r in results if r.error is not None]
+        self.assertEqual(len(errors), 1)
+        self.assertIsNone(errors[0].statement)
+        self.assertEqual(len(driver.statements), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
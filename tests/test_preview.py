@@ -0,0 +1,89 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import unittest
+
+from pysqlexpr.boolean import ReturnsBool
+from pysqlexpr.preview import preview
+from pysqlexpr.query import (
+    Column,
+    Exists,
+    FromExpr,
+    Join,
+    LateralJoin,
+    Query,
+    Sample,
+)
+
+E = ReturnsBool
+
+
+class TestPreview(unittest.TestCase):
+    def test_limit(self) -> None:
+        query = Query(FromExpr("orders"), [Column("id")], order_by=["id"])
+        self.assertEqual(
+            preview(query).packed(), "SELECT id FROM orders ORDER BY id LIMIT 1000"
+        )
+        self.assertEqual(
+            preview(query, limit=10).packed(),
+            "SELECT id FROM orders ORDER BY id LIMIT 10",
+        )
+
+        # a smaller limit is kept, an offset is preserved
+        limited = query.with_limit(5, offset=100)
+        self.assertIs(preview(limited), limited)
+        self.assertEqual(
+            preview(query.with_limit(None, offset=100), limit=10).packed(),
+            "SELECT id FROM orders ORDER BY id LIMIT 10 OFFSET 100",
+        )
+
+        with self.assertRaises(ValueError):
+            preview(query, limit=-1)
+
+    def test_sample(self) -> None:
+        inner = Query(
+            Join(
+                FromExpr("sales.public.orders", name="o"),
+                FromExpr('"Customer"', name="c"),
+                E("o.customer_id = c.id"),
+            ),
+            [Column("o.id"), Column("c.name")],
+        )
+        already = Sample(50)
+        query = Query(
+            Join(
+                LateralJoin(
+                    FromExpr(inner, name="t"),
+                    FromExpr("FLATTEN(INPUT => t.tags)", name="f"),
+                ),
+                FromExpr("region", name="r", sample=already),
+                E("r.id = t.region_id"),
+            ),
+            [Column("t.id")],
+            where=Exists(
+                Query(
+                    FromExpr("blocked", name="b"), [Column("1")], where=E("b.id = t.id")
+                )
+            ),
+        )
+        result = preview(query, limit=100, sample=Sample(1, method="SYSTEM", seed=7))
+        self.assertEqual(
+            result.packed(),
+            "SELECT t.id FROM "
+            "(SELECT o.id, c.name FROM sales.public.orders AS o SAMPLE SYSTEM (1) SEED (7) "
+            'INNER JOIN "Customer" AS c SAMPLE SYSTEM (1) SEED (7) ON o.customer_id = c.id) AS t '
+            "INNER JOIN LATERAL FLATTEN(INPUT => t.tags) AS f "
+            "INNER JOIN region AS r SAMPLE BERNOULLI (50) ON r.id = t.region_id "
+            "WHERE EXISTS (SELECT 1 FROM blocked AS b WHERE b.id = t.id) "
+            "LIMIT 100",
+        )
+        self.assertIs(result.where, query.where)
+        self.assertIs(result.columns, query.columns)
+        self.assertEqual(result.packed_size(), len(result.packed()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,7 +7,16 @@ pysqlexpr: Expressive SQL for Python
 import unittest
 
 from pysqlexpr.boolean import ReturnsBool
-from pysqlexpr.query import Column, FromExpr, Join, LateralJoin, Query, SourceExpr
+from pysqlexpr.indentation import render
+from pysqlexpr.query import (
+    Column,
+    FromExpr,
+    Join,
+    LateralJoin,
+    Query,
+    Sample,
+    SourceExpr,
+)
 
 
 class TestQuery(unittest.TestCase):
@@ -57,6 +66,31 @@ class TestQuery(unittest.TestCase):
             ],
         )
 
+    def test_wire(self) -> None:
+        query = Query(
+            source=Join(
+                FromExpr("address", name="a"),
+                FromExpr(Query(FromExpr("country"), [Column("id")]), name="c"),
+                (ReturnsBool("a.country_id = c.id") | ReturnsBool("c.id IS NULL"))
+                & ReturnsBool("a.zip > 0"),
+            ),
+            columns=[Column("a.zip", name="code")]
+            + [Column(f"a.line{i}") for i in range(20)],
+            where=ReturnsBool("a > 1") & ReturnsBool("b IS NOT NULL"),
+            group_by=["a", "b"],
+        )
+        self.assertEqual(
+            render(query, style="wire"),
+            "SELECT a.zip AS code,"
+            + ",".join(f"a.line{i}" for i in range(20))
+            + " FROM address AS a INNER JOIN (SELECT id FROM country) AS c ON (a.country_id = c.id OR c.id IS NULL) AND a.zip > 0"
+            + " WHERE a > 1 AND b IS NOT NULL GROUP BY a,b",
+        )
+        self.assertEqual(render(query), str(query))
+        self.assertEqual(render(query), query.spacious())
+        self.assertEqual(render(query, style="packed"), query.packed())
+        self.assertEqual(render(query, style="spacious"), query.spacious())
+
     def test_group_by(self) -> None:
         query = Query(
             source=FromExpr("source"),
@@ -79,6 +113,138 @@ class TestQuery(unittest.TestCase):
             ],
         )
 
+    def test_order_by_limit(self) -> None:
+        query = Query(
+            source=FromExpr("source"),
+            columns=[Column("a"), Column("b")],
+            where=ReturnsBool("a > 1"),
+            order_by=["a DESC", "b"],
+            limit=10,
+            offset=20,
+        )
+        self.assertPackedEqual(
+            query,
+            "SELECT a, b FROM source WHERE a > 1 ORDER BY a DESC, b LIMIT 10 OFFSET 20",
+        )
+        self.assertEqual(
+            query.wire(),
+            "SELECT a,b FROM source WHERE a > 1 ORDER BY a DESC,b LIMIT 10 OFFSET 20",
+        )
+        self.assertSpaciousEqual(
+            query,
+            [
+                "SELECT",
+                "    a,",
+                "    b",
+                "FROM",
+                "    source",
+                "WHERE",
+                "    a > 1",
+                "ORDER BY a DESC, b",
+                "LIMIT 10 OFFSET 20",
+            ],
+        )
+        self.assertEqual(query.packed_size(), len(query.packed()))
+
+        variant = query.with_limit(5)
+        self.assertIs(variant.order_by, query.order_by)
+        self.assertPackedEqual(
+            variant, "SELECT a, b FROM source WHERE a > 1 ORDER BY a DESC, b LIMIT 5"
+        )
+        variant = query.with_order_by(None).with_limit(None, offset=3)
+        self.assertPackedEqual(
+            variant, "SELECT a, b FROM source WHERE a > 1 LIMIT NULL OFFSET 3"
+        )
+        self.assertEqual(variant.packed_size(), len(variant.packed()))
+        self.assertNotEqual(variant, query.with_order_by(None).with_limit(None))
+
+        with self.assertRaises(ValueError):
+            Query(FromExpr("source"), [Column("a")], limit=-1)
+        with self.assertRaises(ValueError):
+            query.with_limit(10, offset=-1)
+
+    def test_sample(self) -> None:
+        self.assertEqual(str(Sample(10)), "SAMPLE BERNOULLI (10)")
+        self.assertEqual(str(Sample(0.5, method="SYSTEM")), "SAMPLE SYSTEM (0.5)")
+        self.assertEqual(str(Sample(1, seed=42)), "SAMPLE BERNOULLI (1) SEED (42)")
+        self.assertEqual(str(Sample(rows=100)), "SAMPLE (100 ROWS)")
+        self.assertEqual(Sample(10), Sample(10.0))
+        self.assertNotEqual(Sample(10), Sample(10, method="SYSTEM"))
+
+        for args in [
+            {},
+            {"probability": 10, "rows": 10},
+            {"probability": 101},
+            {"rows": -1},
+            {"rows": 10, "method": "SYSTEM"},
+            {"rows": 10, "seed": 1},
+        ]:
+            with self.subTest(args=args):
+                with self.assertRaises(ValueError):
+                    Sample(**args)  # type: ignore[arg-type]
+
+        query = Query(
+            source=Join(
+                FromExpr("address", name="a", sample=Sample(5, method="SYSTEM")),
+                FromExpr("country", name="c"),
+                ReturnsBool("a.country_id = c.id"),
+            ),
+            columns=[Column("a.zip")],
+        )
+        self.assertPackedEqual(
+            query,
+            "SELECT a.zip FROM address AS a SAMPLE SYSTEM (5) INNER JOIN country AS c ON a.country_id = c.id",
+        )
+        self.assertEqual(query.packed_size(), len(query.packed()))
+        self.assertNotEqual(FromExpr("address", sample=Sample(5)), FromExpr("address"))
+
+    def test_derive(self) -> None:
+        query = Query(
+            source=Join(
+                FromExpr("address", name="a"),
+                FromExpr("country", name="c"),
+                ReturnsBool("a.country_id = c.id"),
+            ),
+            columns=[Column("a.zip"), Column("c.name")],
+            where=ReturnsBool("a.zip > 1000"),
+        )
+        packed = query.packed()
+        spacious = query.spacious()
+
+        variant = query.with_where(ReturnsBool("a.zip > 2000"))
+        self.assertIs(variant.source, query.source)
+        self.assertIs(variant.columns, query.columns)
+        self.assertIs(variant.source.packed(), query.source.packed())
+        self.assertEqual(packed, query.packed())
+        self.assertEqual(spacious, query.spacious())
+        self.assertEqual(
+            variant,
+            Query(
+                source=query.source,
+                columns=[Column("a.zip"), Column("c.name")],
+                where=ReturnsBool("a.zip > 2000"),
+            ),
+        )
+        self.assertPackedEqual(
+            variant,
+            "SELECT a.zip, c.name FROM address AS a INNER JOIN country AS c ON a.country_id = c.id WHERE a.zip > 2000",
+        )
+
+        variant = query.with_columns([Column("a.zip")]).with_group_by(["a.zip"])
+        self.assertIs(variant.where, query.where)
+        self.assertPackedEqual(
+            variant,
+            "SELECT a.zip FROM address AS a INNER JOIN country AS c ON a.country_id = c.id WHERE a.zip > 1000 GROUP BY a.zip",
+        )
+
+        variant = query.with_source(FromExpr("address", name="a")).with_where(None)
+        self.assertIs(variant.columns, query.columns)
+        self.assertPackedEqual(variant, "SELECT a.zip, c.name FROM address AS a")
+        self.assertPackedEqual(
+            variant.with_qualify(ReturnsBool("x = 1")),
+            "SELECT a.zip, c.name FROM address AS a QUALIFY x = 1",
+        )
+
     def test_join(self) -> None:
         flatten_expr = FromExpr(
             "FLATTEN(INPUT => a.phone_numbers)",
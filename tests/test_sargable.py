@@ -0,0 +1,132 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import unittest
+
+from pysqlexpr.boolean import BoolExpr, ConjExpr, ReturnsBool
+from pysqlexpr.sargable import make_sargable
+from pysqlexpr.table import DATE, DATETIME, INTEGER, STRING, Column, Table
+
+
+class TestSargable(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = Table(
+            "event",
+            [
+                Column("id", INTEGER),
+                Column("event_ts", DATETIME),
+                Column("event_date", DATE),
+                Column("name", STRING),
+            ],
+        )
+
+    def assertRewrite(self, source: str, target: str) -> None:
+        result = make_sargable(ReturnsBool(source), self.table)
+        self.assertEqual(result.expr.wire(), target)
+        self.assertEqual(result.rewritten, [ReturnsBool(source)])
+        self.assertEqual(result.unsargable, [])
+
+    def test_date(self) -> None:
+        self.assertRewrite(
+            "DATE(event_ts) = '2024-01-01'",
+            "event_ts >= TIMESTAMP '2024-01-01 00:00:00' AND event_ts < TIMESTAMP '2024-01-02 00:00:00'",
+        )
+        self.assertRewrite(
+            "TO_DATE(e.event_ts) >= DATE '2024-02-29'",
+            "e.event_ts >= TIMESTAMP '2024-02-29 00:00:00'",
+        )
+        self.assertRewrite(
+            "event_ts::DATE > '2024-12-31'",
+            "event_ts >= TIMESTAMP '2025-01-01 00:00:00'",
+        )
+        self.assertRewrite(
+            "CAST(event_ts AS DATE) <= '2024-01-31'",
+            "event_ts < TIMESTAMP '2024-02-01 00:00:00'",
+        )
+
+    def test_year(self) -> None:
+        self.assertRewrite(
+            "YEAR(event_date) = 2024",
+            "event_date >= DATE '2024-01-01' AND event_date < DATE '2025-01-01'",
+        )
+        self.assertRewrite(
+            "EXTRACT(YEAR FROM event_ts) < 2024",
+            "event_ts < TIMESTAMP '2024-01-01 00:00:00'",
+        )
+
+    def test_format(self) -> None:
+        self.assertRewrite(
+            "TO_CHAR(event_ts, 'YYYY-MM') = '2024-12'",
+            "event_ts >= TIMESTAMP '2024-12-01 00:00:00' AND event_ts < TIMESTAMP '2025-01-01 00:00:00'",
+        )
+        self.assertRewrite(
+            "DATE_TRUNC('month', event_date) = '2024-02-01'",
+            "event_date >= DATE '2024-02-01' AND event_date < DATE '2024-03-01'",
+        )
+
+    def test_tree(self) -> None:
+        E = ReturnsBool
+        expr: BoolExpr = (
+            E("id > 10")
+            & E("DATE(event_ts) = '2024-01-01'")
+            & (E("MONTH(event_ts) = 3") | E("UPPER(name) = 'X'"))
+        )
+        result = make_sargable(expr, {"EVENT_TS": DATETIME, "name": STRING})
+        assert isinstance(result.expr, ConjExpr)
+        self.assertEqual(len(result.expr.operands), 4)
+        self.assertEqual(
+            result.expr.wire(),
+            "id > 10 AND event_ts >= TIMESTAMP '2024-01-01 00:00:00' AND event_ts < TIMESTAMP '2024-01-02 00:00:00'"
+            " AND (MONTH(event_ts) = 3 OR UPPER(name) = 'X')",
+        )
+        self.assertIs(result.expr.operands[3], expr.operands[2])  # type: ignore[attr-defined]
+        self.assertEqual(result.unsargable, [E("MONTH(event_ts) = 3")])
+
+    def test_unchanged(self) -> None:
+        E = ReturnsBool
+        expr = E("id > 10") & E("name = 'DATE(event_ts) = ''2024-01-01'''")
+        result = make_sargable(expr, self.table)
+        self.assertIs(result.expr, expr)
+        self.assertEqual(result.rewritten, [])
+        self.assertEqual(result.unsargable, [])
+
+        result = make_sargable(
+            E("DATE_TRUNC('month', event_date) = '2024-02-15'"), self.table
+        )
+        self.assertEqual(result.rewritten, [])
+        self.assertEqual(len(result.unsargable), 1)
+
+        result = make_sargable(E("DATE(name) = '2024-02-15'"), self.table)
+        self.assertEqual(result.rewritten, [])
+        self.assertEqual(result.unsargable, [])
+
+    def test_last_period(self) -> None:
+        "The period that follows the last date that Python represents cannot be an upper bound."
+
+        self.assertRewrite(
+            "DATE(event_ts) >= '9999-12-31'",
+            "event_ts >= TIMESTAMP '9999-12-31 00:00:00'",
+        )
+        self.assertRewrite(
+            "YEAR(event_date) < 9999",
+            "event_date < DATE '9999-01-01'",
+        )
+        for source in [
+            "DATE(event_ts) = '9999-12-31'",
+            "YEAR(event_ts) = 9999",
+            "YEAR(event_date) > 9999",
+            "DATE_TRUNC('month', event_date) <= '9999-12-01'",
+        ]:
+            with self.subTest(source=source):
+                predicate = ReturnsBool(source)
+                result = make_sargable(predicate, self.table)
+                self.assertIs(result.expr, predicate)
+                self.assertEqual(result.rewritten, [])
+                self.assertEqual(result.unsargable, [predicate])
+
+
+if __name__ == "__main__":
+    unittest.main()
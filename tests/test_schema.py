@@ -0,0 +1,187 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import io
+import json
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from pysqlexpr.schema import Schema
+from pysqlexpr.table import INTEGER, STRING, Column, Table
+
+
+class TestSchema(unittest.TestCase):
+    def make_tables(self, count: int) -> list[Table]:
+        return [
+            Table(
+                f"table_{i}",
+                [Column("id", INTEGER, nullable=False), Column("value", STRING)],
+                description=f"Table #{i}.",
+            )
+            for i in range(count)
+        ]
+
+    def test_index(self) -> None:
+        schema = Schema("sales", self.make_tables(3))
+        self.assertEqual(len(schema), 3)
+        self.assertIn("table_1", schema)
+        self.assertNotIn("table_3", schema)
+        self.assertIs(schema["table_2"], schema.tables[2])
+        with self.assertRaises(ValueError):
+            Schema("sales", self.make_tables(2) + self.make_tables(1))
+
+        # unquoted identifiers are case-insensitive
+        self.assertIs(schema["TABLE_2"], schema.tables[2])
+        with self.assertRaises(ValueError):
+            Schema("sales", self.make_tables(1) + [Table("TABLE_0", [])])
+
+    def test_script(self) -> None:
+        tables = self.make_tables(2)
+        schema = Schema("sales", tables, description="Sales data.")
+        fp = io.StringIO()
+        schema.write(fp)
+        self.assertMultiLineEqual(
+            fp.getvalue(),
+            "\n".join(
+                [
+                    "CREATE SCHEMA IF NOT EXISTS sales COMMENT = 'Sales data.';",
+                    "USE SCHEMA sales;",
+                    str(tables[0]),
+                    str(tables[1]),
+                    "",
+                ]
+            ),
+        )
+
+    def test_parallel(self) -> None:
+        schema = Schema("sales", self.make_tables(200))
+        expected = list(schema.statements(replace=True))
+        with ThreadPoolExecutor(4) as executor:
+            self.assertEqual(
+                list(schema.statements(replace=True, executor=executor)), expected
+            )
+        with ProcessPoolExecutor(2) as executor:
+            self.assertEqual(
+                list(schema.statements(replace=True, executor=executor)), expected
+            )
+
+    def test_incremental(self) -> None:
+        tables = self.make_tables(3)
+        manifest = json.loads(json.dumps(Schema("sales", tables).manifest()))
+
+        changed = Table(
+            "table_1", [Column("id", INTEGER, nullable=False), Column("value", INTEGER)]
+        )
+        added = Table("table_3", [Column("id", INTEGER)])
+        schema = Schema("sales", [tables[0], changed, added])
+        fp = io.StringIO()
+        updated = schema.write(fp, manifest=manifest)
+        self.assertMultiLineEqual(
+            fp.getvalue(),
+            "\n".join(
+                [
+                    "CREATE SCHEMA IF NOT EXISTS sales;",
+                    "USE SCHEMA sales;",
+                    changed.as_stmt(replace=True),
+                    added.as_stmt(replace=True),
+                    "DROP TABLE IF EXISTS table_2;",
+                    "",
+                ]
+            ),
+        )
+        self.assertEqual(updated, schema.manifest())
+        self.assertEqual(
+            list(schema.statements(manifest=updated)),
+            ["CREATE SCHEMA IF NOT EXISTS sales;", "USE SCHEMA sales;"],
+        )
+
+    def test_incremental_alter(self) -> None:
+        "Changes that do not affect the structure of a table keep the table and its data."
+
+        table = Table(
+            "event",
+            [Column("id", INTEGER, nullable=False), Column("value", STRING)],
+            description="Events.",
+        )
+        manifest = Schema("sales", [table]).manifest()
+
+        def alter(changed: Table) -> list[str]:
+            return list(Schema("sales", [changed]).statements(manifest=manifest))[2:]
+
+        self.assertEqual(
+            alter(
+                Table(
+                    "EVENT",
+                    [
+                        Column("ID", INTEGER, nullable=False),
+                        Column("value", STRING, description="Payload."),
+                    ],
+                )
+            ),
+            [
+                "ALTER TABLE EVENT UNSET COMMENT;",
+                "ALTER TABLE EVENT ALTER COLUMN ID UNSET COMMENT, COLUMN value COMMENT 'Payload.';",
+            ],
+        )
+        self.assertEqual(
+            alter(
+                Table(
+                    "event",
+                    [
+                        Column("id", INTEGER, nullable=False),
+                        Column("value", STRING, search_optimization=True),
+                    ],
+                    description="Events.",
+                    cluster_by=["id"],
+                    data_retention_time_in_days=7,
+                )
+            ),
+            [
+                "ALTER TABLE event CLUSTER BY (id);",
+                "ALTER TABLE event SET DATA_RETENTION_TIME_IN_DAYS = 7;",
+                "ALTER TABLE event ADD SEARCH OPTIMIZATION ON EQUALITY(value);",
+            ],
+        )
+
+        optimized = Table(
+            "event",
+            [
+                Column("id", INTEGER, nullable=False, search_optimization=True),
+                Column("value", STRING, search_optimization=True),
+            ],
+            cluster_by=["id"],
+        )
+        manifest = Schema("sales", [optimized]).manifest()
+        self.assertEqual(
+            alter(
+                Table(
+                    "event",
+                    [
+                        Column("id", INTEGER, nullable=False, search_optimization=True),
+                        Column("value", STRING),
+                    ],
+                )
+            ),
+            [
+                "ALTER TABLE event DROP CLUSTERING KEY;",
+                "ALTER TABLE event DROP SEARCH OPTIMIZATION ON EQUALITY(value);",
+            ],
+        )
+
+        # a structural change (or a manifest in an earlier format) re-creates the table
+        for changed, known in [
+            (Table("event", [Column("id", INTEGER, nullable=False)]), manifest),
+            (optimized, {"event": ".".join(["0" * 16] * 5)}),
+        ]:
+            with self.subTest(known=known):
+                self.assertEqual(
+                    list(Schema("sales", [changed]).statements(manifest=known))[2:],
+                    ["\n".join(changed.create_stmts(replace=True))],
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
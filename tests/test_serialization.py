@@ -0,0 +1,180 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import mmap
+import pickle
+import tempfile
+import unittest
+
+from pysqlexpr.aggregate import ApproxPercentile, Count, Percentile
+from pysqlexpr.boolean import ReturnsBool
+from pysqlexpr.identifier import Identifier
+from pysqlexpr.query import (
+    Column,
+    Exists,
+    FromExpr,
+    InSubquery,
+    Join,
+    LateralJoin,
+    LeftJoin,
+    NotExists,
+    Query,
+    Sample,
+)
+from pysqlexpr.serialization import dumps, loads
+from pysqlexpr.table import (
+    DATETIME,
+    INTEGER,
+    NumberType,
+    Statistics,
+    StringType,
+    Table,
+)
+from pysqlexpr.table import Column as TableColumn
+
+
+class TestSerialization(unittest.TestCase):
+    def make_query(self) -> Query:
+        source = Join(
+            LeftJoin(
+                LateralJoin(
+                    FromExpr("address", name="a"),
+                    FromExpr("FLATTEN(INPUT => a.phone_numbers)", name="p"),
+                ),
+                FromExpr(
+                    "country", name="c", sample=Sample(10, method="SYSTEM", seed=7)
+                ),
+                ReturnsBool("a.country_id = c.id"),
+            ),
+            FromExpr(
+                Query(FromExpr("customer"), [Column("id"), Column("address_id")]),
+                name="u",
+            ),
+            ReturnsBool("u.address_id = a.id"),
+        )
+        blocked = Query(
+            FromExpr("blocked", name="b", sample=Sample(rows=5)),
+            [Column("1")],
+            where=ReturnsBool("b.zip = a.zip"),
+        )
+        return Query(
+            source=source,
+            columns=[Column("a.zip"), Column("c.name", name="country"), Column("-1")],
+            where=ReturnsBool("a.zip IS NOT NULL")
+            & (ReturnsBool("c.name = 'Hungary'") | ReturnsBool("c.id > -42"))
+            & InSubquery("a.id", Query(FromExpr("customer"), [Column("address_id")]))
+            & (
+                Exists(blocked)
+                | NotExists(Query(FromExpr("blocked", name="b"), [Column("1")]))
+            ),
+            group_by=["a.zip", "c.name"],
+            qualify=ReturnsBool("ROW_NUMBER() OVER (PARTITION BY a.zip) = 1"),
+            order_by=["a.zip DESC", "country"],
+            limit=100,
+            offset=10,
+        )
+
+    def make_table(self) -> Table:
+        return Table(
+            "token",
+            columns=[
+                TableColumn("id", INTEGER, nullable=False, description="Identifier."),
+                TableColumn("amount", NumberType(9, 3), default="0"),
+                TableColumn(
+                    "label", StringType(64), search_optimization=True, unique=True
+                ),
+                TableColumn("expires_at", DATETIME),
+            ],
+            description="Stores access tokens for entities.",
+            transient=True,
+            cluster_by=["TO_DATE(expires_at)", "label"],
+            data_retention_time_in_days=0,
+            primary_key=["id"],
+            unique_keys=[["label", "expires_at"]],
+            statistics=Statistics(1000, {"label": 10}),
+        )
+
+    def test_query(self) -> None:
+        query = self.make_query()
+        copy = loads(dumps(query))
+        self.assertEqual(copy, query)
+        self.assertEqual(str(copy), str(query))
+
+    def test_table(self) -> None:
+        table = self.make_table()
+        copy = loads(dumps(table))
+        self.assertEqual(copy.create_stmts(), table.create_stmts())
+
+    def test_statistics(self) -> None:
+        source = FromExpr("customer", name="c", statistics=Statistics(42, {"id": 42}))
+        copy = loads(dumps(source))
+        self.assertEqual(copy, source)
+        self.assertIsNotNone(copy.statistics)
+        self.assertEqual(copy.statistics.row_count, 42)
+        self.assertEqual(copy.statistics.get_distinct_values("ID"), 42)
+
+        table = loads(dumps(self.make_table()))
+        self.assertEqual(table.statistics.get_distinct_values("label"), 10)
+
+    def test_aggregate(self) -> None:
+        columns = [
+            Column(Count(), name="n"),
+            Column(Count("user_id", distinct=True)),
+            Column(Percentile("latency", 0.95)),
+            Column(ApproxPercentile("latency", 0.5)),
+        ]
+        query = Query(FromExpr("events"), columns)
+        self.assertEqual(loads(dumps(query)), query)
+
+    def test_identifier(self) -> None:
+        identifier = Identifier("select", path="a/b")
+        self.assertEqual(loads(dumps(identifier)), identifier)
+
+    def test_string_table(self) -> None:
+        queries = [
+            Query(
+                FromExpr("customer"),
+                [Column("customer_name")],
+                where=ReturnsBool(f"customer_id = {i}"),
+            )
+            for i in range(100)
+        ]
+        data = dumps(queries)
+        self.assertEqual(data.count(b"customer_name"), 1)
+        self.assertLess(len(data), len(pickle.dumps(queries)))
+        self.assertEqual(loads(data), queries)
+
+    def test_catalog(self) -> None:
+        catalog = {"query": self.make_query(), "table": self.make_table(), "none": None}
+        with tempfile.TemporaryFile() as f:
+            f.write(dumps(catalog))
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                copy = loads(memoryview(m))
+                self.assertEqual(copy["query"], catalog["query"])
+                self.assertEqual(str(copy["table"]), str(catalog["table"]))
+                self.assertIsNone(copy["none"])
+
+    def test_invalid(self) -> None:
+        data = dumps(self.make_query())
+        with self.assertRaises(ValueError):
+            loads(b"XXXX" + data[4:])
+        for version in [0, 1, data[4] + 1]:
+            with self.subTest(version=version):
+                with self.assertRaises(ValueError):
+                    loads(data[:4] + bytes([version]) + data[5:])
+        for length in [0, 3, 4, 5, len(data) - 1]:
+            with self.subTest(length=length):
+                with self.assertRaises(ValueError):
+                    loads(data[:length])
+        with self.assertRaises(ValueError):
+            loads(data + b"\0")
+        with self.assertRaises(TypeError):
+            dumps(object())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import unittest
+
+from pysqlexpr.boolean import BoolExpr, ConjExpr, DisjExpr, ReturnsBool
+from pysqlexpr.indentation import utf8_len
+from pysqlexpr.query import Column, FromExpr, Join, LateralJoin, Query
+from pysqlexpr.size import (
+    StatementTooLargeError,
+    check_size,
+    chunk_tables,
+    chunk_values,
+    size_report,
+    split_disjunction,
+)
+from pysqlexpr.table import INTEGER
+from pysqlexpr.table import Column as TableColumn
+from pysqlexpr.table import Table
+
+
+class TestSize(unittest.TestCase):
+    def make_query(self, count: int, *, grouped: bool = True) -> Query:
+        query = Query(
+            source=Join(
+                LateralJoin(
+                    FromExpr("address", name="a"),
+                    FromExpr("FLATTEN(INPUT => a.phone_numbers)", name="p"),
+                ),
+                FromExpr(Query(FromExpr("country"), [Column("id")]), name="c"),
+                ReturnsBool("a.country_id = c.id") & ReturnsBool("p.value <> 'ő'"),
+            ),
+            columns=[Column("a.zip", name="code"), Column("p.value")],
+            where=DisjExpr(ReturnsBool(f"a.id = {i}") for i in range(count)),
+        )
+        if grouped:
+            query = query.with_group_by(["a.zip", "p.value"]).with_qualify(
+                ReturnsBool("ROW_NUMBER() OVER (ORDER BY a.zip) = 1")
+            )
+        return query
+
+    def test_packed_size(self) -> None:
+        query = self.make_query(10)
+        self.assertEqual(query.packed_size(), utf8_len(query.packed()))
+        for node in (query.source, query.columns, query.where):
+            assert node is not None
+            self.assertEqual(node.packed_size(), utf8_len(node.packed()))
+
+    def test_check(self) -> None:
+        query = self.make_query(100)
+        size = check_size(query)
+        with self.assertRaises(StatementTooLargeError):
+            check_size(query, size - 1)
+
+    def test_report(self) -> None:
+        query = self.make_query(3)
+        report = size_report(query)
+        self.assertEqual(report.size, query.packed_size())
+        self.assertEqual(
+            [child.label for child in report.children],
+            ["SELECT", "FROM", "WHERE", "GROUP BY", "QUALIFY"],
+        )
+        self.assertEqual(len(report.children[2].children), 3)
+        self.assertTrue(str(report).startswith(f"Query: {query.packed_size()}\n"))
+
+    def test_split_disjunction(self) -> None:
+        query = self.make_query(1000, grouped=False)
+        limit = 2000
+        branches = split_disjunction(query, limit)
+        self.assertGreater(len(branches), 1)
+        operands: list[BoolExpr] = []
+        for branch in branches:
+            self.assertLessEqual(utf8_len(branch.packed()), limit)
+            self.assertIs(branch.source, query.source)
+            assert branch.where is not None
+            if isinstance(branch.where, DisjExpr):
+                operands.extend(branch.where.operands)
+            else:
+                operands.append(branch.where)
+        self.assertEqual(DisjExpr(operands), query.where)
+
+        self.assertEqual(split_disjunction(query), [query])
+        with self.assertRaises(StatementTooLargeError):
+            split_disjunction(query, 200)
+
+        # aggregates and window functions would be computed for each branch separately
+        for unsplittable in [
+            self.make_query(1000),
+            query.with_columns([Column("COUNT(*)")]),
+            query.with_columns([Column("ROW_NUMBER() OVER (ORDER BY a.zip)")]),
+            query.with_limit(10),
+        ]:
+            with self.subTest(query=unsplittable.with_where(None).packed()):
+                with self.assertRaises(ValueError):
+                    split_disjunction(unsplittable, limit)
+
+    def test_split_overlapping(self) -> None:
+        def query(*operands: BoolExpr) -> Query:
+            return Query(
+                FromExpr("orders", name="o"),
+                [Column("o.id"), Column("o.amount")],
+                where=DisjExpr(operands),
+            )
+
+        E = ReturnsBool
+        disjoint = query(
+            E("o.id = 1"),
+            E("o.id IN (2, '3', 4)") & E("o.amount > 10"),
+            ConjExpr([E("o.status = 'open'"), E("o.id = 5")]),
+            E("o.id = '6'"),
+        )
+        branches = split_disjunction(disjoint, 100)
+        self.assertGreater(len(branches), 1)
+        for branch in branches:
+            self.assertLessEqual(branch.packed_size(), 100)
+
+        for overlapping in [
+            query(E("o.id = 1"), E("o.id = 2"), E("o.id = 1.0")),
+            query(E("o.id = 1"), E("o.id IN (2, '1')")),
+            query(E("o.id = 1"), E("o.customer_id = 2"), E("o.id = 3")),
+            query(E("o.id = 1"), E("NOT o.id = 2"), E("o.id = 3")),
+            query(E("o.id = 1"), E("o.id NOT IN (2)"), E("o.id = 3")),
+            query(E("o.amount > 1"), E("o.amount > 2"), E("o.amount > 3")),
+        ]:
+            with self.subTest(query=overlapping.packed()):
+                with self.assertRaises(ValueError):
+                    split_disjunction(overlapping, 60)
+
+    def test_chunk_tables(self) -> None:
+        tables = [Table(f"table_{i}", [TableColumn("id", INTEGER)]) for i in range(100)]
+        scripts = list(chunk_tables(tables, 500))
+        self.assertGreater(len(scripts), 1)
+        for script in scripts:
+            self.assertLessEqual(utf8_len(script), 500)
+        self.assertEqual("\n".join(scripts), "\n".join(str(t) for t in tables))
+
+    def test_chunk_values(self) -> None:
+        rows = [f"({i}, 'value')" for i in range(1000)]
+        head = "INSERT INTO t (a, b) VALUES"
+        statements = list(chunk_values(head, rows, 1000))
+        self.assertGreater(len(statements), 1)
+        for statement in statements:
+            self.assertLessEqual(utf8_len(statement), 1000)
+            self.assertTrue(statement.startswith(head + " ("))
+            self.assertTrue(statement.endswith(");"))
+        self.assertEqual(sum(s.count("'value'") for s in statements), 1000)
+        with self.assertRaises(StatementTooLargeError):
+            list(chunk_values(head, rows, 40))
+
+
+if __name__ == "__main__":
+    unittest.main()
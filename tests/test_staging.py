@@ -0,0 +1,159 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import datetime
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from pysqlexpr.staging import FileFormat, copy_into_stmt, put_stmt, write_staged_files
+from pysqlexpr.table import BINARY, DATETIME, INTEGER, STRING, VARIANT, Column, Table
+
+
+class TestStaging(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = Table(
+            "event",
+            [
+                Column("id", INTEGER, nullable=False),
+                Column("name", STRING),
+                Column("payload", VARIANT),
+                Column("digest", BINARY),
+                Column("created_at", DATETIME),
+            ],
+        )
+        self.csv = FileFormat("csv_format", "CSV")
+        self.ndjson = FileFormat("ndjson_format", "JSON")
+
+    def test_statements(self) -> None:
+        self.assertEqual(
+            self.csv.as_stmt(replace=True),
+            "CREATE OR REPLACE FILE FORMAT csv_format TYPE = CSV FIELD_DELIMITER = ',' FIELD_OPTIONALLY_ENCLOSED_BY = '\"' "
+            "NULL_IF = ('\\\\N') EMPTY_FIELD_AS_NULL = FALSE BINARY_FORMAT = HEX;",
+        )
+        self.assertEqual(
+            copy_into_stmt(self.table, "load", self.csv),
+            "COPY INTO event (id, name, payload, digest, created_at) FROM ("
+            "SELECT $1::NUMBER(38, 0), $2::STRING(16777216), PARSE_JSON($3)::VARIANT, $4::BINARY(8388608), $5::DATETIME(9) "
+            "FROM @load) FILE_FORMAT = (FORMAT_NAME = csv_format);",
+        )
+        self.assertEqual(
+            copy_into_stmt(
+                self.table, "@load/event", self.ndjson, pattern=".*[.]ndjson"
+            ),
+            "COPY INTO event (id, name, payload, digest, created_at) FROM ("
+            'SELECT $1:"id"::NUMBER(38, 0), $1:"name"::STRING(16777216), $1:"payload"::VARIANT, '
+            '$1:"digest"::BINARY(8388608), $1:"created_at"::DATETIME(9) '
+            "FROM @load/event) FILE_FORMAT = (FORMAT_NAME = ndjson_format) PATTERN = '.*[.]ndjson';",
+        )
+        self.assertEqual(
+            put_stmt("/data/event_*.csv", "load", parallel=8),
+            "PUT 'file:///data/event_*.csv' @load PARALLEL = 8 AUTO_COMPRESS = TRUE OVERWRITE = FALSE;",
+        )
+
+    def make_rows(self, count: int) -> list[tuple]:
+        return [
+            (
+                i,
+                f"event, #{i}" if i % 2 else None,
+                {"index": i},
+                bytes([i % 256]),
+                datetime.datetime(2024, 1, 1, 12, 0, i % 60),
+            )
+            for i in range(count)
+        ]
+
+    def test_csv(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            paths = write_staged_files(
+                self.table, self.make_rows(25), directory, self.csv, rows_per_file=10
+            )
+            self.assertEqual(
+                [p.name for p in paths],
+                ["event_00000.csv", "event_00001.csv", "event_00002.csv"],
+            )
+            lines = paths[0].read_text().splitlines()
+            self.assertEqual(
+                lines[:2],
+                [
+                    '0,\\N,"{""index"": 0}",00,2024-01-01 12:00:00',
+                    '1,"event, #1","{""index"": 1}",01,2024-01-01 12:00:01',
+                ],
+            )
+            self.assertEqual(len(paths[2].read_text().splitlines()), 5)
+
+    def test_ndjson(self) -> None:
+        rows = [{"id": 1, "name": "ő", "created_at": datetime.datetime(2024, 1, 1)}]
+        with tempfile.TemporaryDirectory() as directory:
+            (path,) = write_staged_files(self.table, rows, directory, self.ndjson)
+            self.assertEqual(path.suffix, ".ndjson")
+            record = json.loads(path.read_text(encoding="utf-8"))
+            self.assertEqual(
+                record,
+                {
+                    "id": 1,
+                    "name": "ő",
+                    "payload": None,
+                    "digest": None,
+                    "created_at": "2024-01-01 00:00:00",
+                },
+            )
+
+    def test_parallel(self) -> None:
+        rows = self.make_rows(1000)
+        with tempfile.TemporaryDirectory() as directory:
+            serial = write_staged_files(
+                self.table,
+                rows,
+                Path(directory) / ".",
+                self.csv,
+                prefix="a",
+                rows_per_file=64,
+            )
+            with ThreadPoolExecutor(4) as executor:
+                parallel = write_staged_files(
+                    self.table,
+                    iter(rows),
+                    directory,
+                    self.csv,
+                    prefix="b",
+                    rows_per_file=64,
+                    executor=executor,
+                )
+            self.assertEqual(len(serial), 16)
+            self.assertEqual(
+                [p.read_text() for p in serial], [p.read_text() for p in parallel]
+            )
+            with self.assertRaises(ValueError):
+                write_staged_files(self.table, [(1, 2)], directory, self.csv)
+
+    def test_failure(self) -> None:
+        "Files written before a failure are removed."
+
+        rows = self.make_rows(100) + [(1, 2)] + self.make_rows(100)
+        with tempfile.TemporaryDirectory() as directory:
+            with ThreadPoolExecutor(2) as executor:
+                with self.assertRaises(ValueError):
+                    write_staged_files(
+                        self.table,
+                        rows,
+                        directory,
+                        self.csv,
+                        rows_per_file=10,
+                        executor=executor,
+                        max_pending=2,
+                    )
+            self.assertEqual(os.listdir(directory), [])
+            with self.assertRaises(ValueError):
+                write_staged_files(self.table, rows, directory, self.csv)
+            self.assertEqual(os.listdir(directory), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import unittest
+
+from pysqlexpr.aggregate import Avg, Count, Max, Percentile, Sum
+from pysqlexpr.boolean import ReturnsBool
+from pysqlexpr.query import Column, FromExpr, Join, Query
+from pysqlexpr.summary import (
+    ApproximationPolicy,
+    Summary,
+    approximate_aggregates,
+    use_summary,
+)
+from pysqlexpr.table import INTEGER, NUMBER, STRING, Statistics
+from pysqlexpr.table import Column as TableColumn
+from pysqlexpr.table import Table
+
+E = ReturnsBool
+
+
+def make_summary(name: str, keys: dict[str, str], rows: int | None = None) -> Summary:
+    return Summary(
+        Table(
+            name,
+            [TableColumn(column, STRING) for column in keys.values()]
+            + [
+                TableColumn("revenue", NUMBER),
+                TableColumn("orders", INTEGER),
+                TableColumn("items", INTEGER),
+                TableColumn("largest", NUMBER),
+                TableColumn("median", NUMBER),
+            ],
+            statistics=Statistics(rows) if rows is not None else None,
+        ),
+        "sales",
+        keys,
+        {
+            "revenue": Sum("amount"),
+            "orders": Count(),
+            "items": Count("amount"),
+            "largest": Max("amount"),
+            "median": Percentile("amount", 0.5),
+        },
+    )
+
+
+DAILY = make_summary(
+    "sales_daily",
+    {
+        "DATE_TRUNC('DAY', sold_at)": "day",
+        "region": "region",
+        "channel": "channel",
+    },
+)
+REGIONAL = make_summary("sales_regional", {"region": "region"}, rows=100)
+
+
+class TestApproximation(unittest.TestCase):
+    def test_approximate(self) -> None:
+        query = Query(
+            FromExpr("events"),
+            [
+                Column("region"),
+                Column(Count("user_id", distinct=True), name="users"),
+                Column(Percentile("latency", 0.9), name="p90"),
+                Column(Sum("bytes")),
+                Column("COUNT(DISTINCT session_id)"),
+            ],
+            group_by=["region"],
+        )
+        self.assertEqual(
+            approximate_aggregates(query, ApproximationPolicy(0.02)).packed(),
+            "SELECT region, APPROX_COUNT_DISTINCT(user_id) AS users, APPROX_PERCENTILE(latency, 0.9) AS p90, "
+            "SUM(bytes), COUNT(DISTINCT session_id) FROM events GROUP BY region",
+        )
+        self.assertEqual(
+            approximate_aggregates(query, ApproximationPolicy(0.015)).packed(),
+            "SELECT region, COUNT(DISTINCT user_id) AS users, APPROX_PERCENTILE(latency, 0.9) AS p90, "
+            "SUM(bytes), COUNT(DISTINCT session_id) FROM events GROUP BY region",
+        )
+        self.assertIs(approximate_aggregates(query, ApproximationPolicy(0)), query)
+        with self.assertRaises(ValueError):
+            ApproximationPolicy(-1)
+
+
+class TestSummary(unittest.TestCase):
+    def test_rollup(self) -> None:
+        query = Query(
+            FromExpr("analytics.sales", name="s"),
+            [
+                Column("DATE_TRUNC('DAY', s.sold_at)", name="day"),
+                Column(Sum("s.amount"), name="revenue"),
+                Column(Count(), name="orders"),
+                Column(Avg("amount"), name="average"),
+                Column(Max("s.amount")),
+                Column(Count("region", distinct=True), name="regions"),
+            ],
+            where=E("s.channel = 'web'") & E("region IN ('EU', 'US')"),
+            group_by=["DATE_TRUNC('DAY', s.sold_at)"],
+        )
+        self.assertEqual(
+            use_summary(query, [DAILY]).packed(),
+            "SELECT day AS day, SUM(revenue) AS revenue, COALESCE(SUM(orders), 0) AS orders, "
+            "SUM(revenue) / NULLIF(SUM(items), 0) AS average, MAX(largest), COUNT(DISTINCT region) AS regions "
+            "FROM sales_daily AS s "
+            "WHERE (s.channel = 'web' AND region IN ('EU', 'US')) "
+            "GROUP BY day",
+        )
+
+    def test_exact(self) -> None:
+        query = Query(
+            FromExpr("sales"),
+            [Column("region"), Column(Percentile("amount", 0.5))],
+            group_by=["region"],
+        )
+        # the smaller summary table is preferred
+        self.assertEqual(
+            use_summary(query, [DAILY, REGIONAL]).packed(),
+            "SELECT region, ANY_VALUE(median) FROM sales_regional AS sales GROUP BY region",
+        )
+        self.assertIs(use_summary(query, [DAILY]), query)
+
+    def test_global(self) -> None:
+        query = Query(FromExpr("sales"), [Column(Sum("amount"), name="total")])
+        self.assertEqual(
+            use_summary(query, [REGIONAL]).packed(),
+            "SELECT SUM(revenue) AS total FROM sales_regional AS sales",
+        )
+
+    def test_kept(self) -> None:
+        sales = FromExpr("sales", name="s")
+        queries = [
+            # grouping key not in summary
+            Query(sales, [Column("s.product")], group_by=["s.product"]),
+            # predicate on a column that is not a grouping key
+            Query(
+                sales,
+                [Column(Sum("s.amount"))],
+                where=E("s.amount > 100"),
+            ),
+            # aggregate not in summary, or in raw SQL
+            Query(sales, [Column(Sum("s.tax"))]),
+            Query(sales, [Column("SUM(s.amount)")]),
+            Query(sales, [Column(Avg("s.tax"))]),
+            # not the base table
+            Query(FromExpr("returns"), [Column(Sum("amount"))]),
+            Query(
+                Join(sales, FromExpr("region", name="r"), E("r.id = s.region")),
+                [Column(Sum("s.amount"))],
+            ),
+        ]
+        for query in queries:
+            with self.subTest(query=query.packed()):
+                self.assertIs(use_summary(query, [DAILY, REGIONAL]), query)
+
+        with self.assertRaises(ValueError):
+            Summary(REGIONAL.table, "sales", ["missing"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
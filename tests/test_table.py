@@ -5,10 +5,14 @@ pysqlexpr: Expressive SQL for Python
 """
 
 import unittest
+from typing import Any
 
 from pysqlexpr.table import (
+    DATE,
     DATETIME,
     INTEGER,
+    STRING,
+    VARIANT,
     BinaryType,
     Column,
     NumberType,
@@ -69,6 +73,138 @@ class TestTable(unittest.TestCase):
         )
         self.assertMultiLineEqual(actual, expected)
 
+    def make_fact_table(self, **kwargs: Any) -> Table:
+        return Table(
+            "event",
+            columns=[
+                Column("id", INTEGER, nullable=False, search_optimization=True),
+                Column("event_date", DATE),
+                Column("region", STRING),
+                Column("payload", VARIANT),
+            ],
+            **kwargs,
+        )
+
+    def test_physical_design(self) -> None:
+        table = self.make_fact_table(
+            transient=True,
+            cluster_by=["event_date", "payload:region::STRING"],
+            data_retention_time_in_days=1,
+            description="Events.",
+        )
+        self.assertEqual(
+            table.create_stmts(replace=True),
+            [
+                "\n".join(
+                    [
+                        "CREATE OR REPLACE TRANSIENT TABLE event (",
+                        "id NUMBER(38, 0) NOT NULL,",
+                        "event_date DATE,",
+                        "region STRING(16777216),",
+                        "payload VARIANT",
+                        ")",
+                        "CLUSTER BY (event_date, payload:region::STRING)",
+                        "DATA_RETENTION_TIME_IN_DAYS = 1",
+                        "COMMENT = 'Events.';",
+                    ]
+                ),
+                "ALTER TABLE event ADD SEARCH OPTIMIZATION ON EQUALITY(id);",
+            ],
+        )
+
+        with self.assertRaises(ValueError):
+            self.make_fact_table(cluster_by=["payload"])
+        with self.assertRaises(ValueError):
+            self.make_fact_table(cluster_by=["missing"])
+        with self.assertRaises(ValueError):
+            self.make_fact_table(cluster_by=[])
+        with self.assertRaises(ValueError):
+            self.make_fact_table(transient=True, data_retention_time_in_days=7)
+        with self.assertRaises(ValueError):
+            self.make_fact_table(data_retention_time_in_days=91)
+
+    def test_alter(self) -> None:
+        source = self.make_fact_table(cluster_by=["region"])
+        target = Table(
+            "event",
+            columns=[
+                Column("id", INTEGER, nullable=False),
+                Column("event_date", DATE),
+                Column("region", STRING, search_optimization=True),
+                Column("payload", VARIANT),
+            ],
+            cluster_by=["event_date", "region"],
+            data_retention_time_in_days=30,
+        )
+        self.assertEqual(
+            target.alter_stmts(source),
+            [
+                "ALTER TABLE event CLUSTER BY (event_date, region);",
+                "ALTER TABLE event SET DATA_RETENTION_TIME_IN_DAYS = 30;",
+                "ALTER TABLE event DROP SEARCH OPTIMIZATION ON EQUALITY(id);",
+                "ALTER TABLE event ADD SEARCH OPTIMIZATION ON EQUALITY(region);",
+            ],
+        )
+        self.assertEqual(
+            source.alter_stmts(target)[:2],
+            [
+                "ALTER TABLE event CLUSTER BY (region);",
+                "ALTER TABLE event UNSET DATA_RETENTION_TIME_IN_DAYS;",
+            ],
+        )
+        self.assertEqual(
+            self.make_fact_table().alter_stmts(source),
+            ["ALTER TABLE event DROP CLUSTERING KEY;"],
+        )
+        self.assertEqual(source.alter_stmts(source), [])
+        with self.assertRaises(ValueError):
+            self.make_fact_table(transient=True).alter_stmts(source)
+
+    def test_constraints(self) -> None:
+        table = Table(
+            "account",
+            columns=[
+                Column("id", INTEGER, nullable=False),
+                Column("email", STRING, unique=True),
+                Column("tenant", STRING),
+                Column("handle", STRING),
+            ],
+            primary_key=["ID"],
+            unique_keys=[["tenant", "handle"]],
+        )
+        self.assertEqual(
+            table.as_stmt(),
+            "\n".join(
+                [
+                    "CREATE TABLE account (",
+                    "id NUMBER(38, 0) NOT NULL,",
+                    "email STRING(16777216) UNIQUE,",
+                    "tenant STRING(16777216),",
+                    "handle STRING(16777216),",
+                    "PRIMARY KEY (id),",
+                    "UNIQUE (tenant, handle)",
+                    ");",
+                ]
+            ),
+        )
+        self.assertEqual(
+            table.unique_column_sets,
+            [
+                frozenset(["ID"]),
+                frozenset(["TENANT", "HANDLE"]),
+                frozenset(["EMAIL"]),
+            ],
+        )
+        self.assertTrue(table.is_unique(["handle", "tenant", "id"]))
+        self.assertTrue(table.is_unique(["Email"]))
+        self.assertFalse(table.is_unique(["tenant"]))
+        self.assertFalse(table.is_unique([]))
+
+        with self.assertRaises(ValueError):
+            Table("account", [Column("id", INTEGER)], primary_key=["missing"])
+        with self.assertRaises(ValueError):
+            Table("account", [Column("id", INTEGER)], unique_keys=[[]])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,178 @@
+"""
+pysqlexpr: Expressive SQL for Python
+
+:see: https://github.com/hunyadi/pysqlexpr
+"""
+
+import unittest
+
+from pysqlexpr.boolean import ReturnsBool
+from pysqlexpr.query import Column, FromExpr, Join, LeftJoin, Query, Sample
+from pysqlexpr.table import INTEGER, VARIANT, NumberType, StringType
+from pysqlexpr.table import Column as TableColumn
+from pysqlexpr.table import Table
+from pysqlexpr.variant import hoist_variant_paths
+
+E = ReturnsBool
+
+ORDERS = Table(
+    "orders",
+    [
+        TableColumn("id", INTEGER),
+        TableColumn("payload", VARIANT),
+        TableColumn("payload_status", INTEGER),
+    ],
+)
+
+
+class TestVariant(unittest.TestCase):
+    def test_hoist(self) -> None:
+        query = Query(
+            Join(
+                FromExpr("orders", name="o", sample=Sample(10)),
+                FromExpr("customer", name="c"),
+                E('c.id = o.payload:"customer":"id"::NUMBER'),
+            ),
+            [
+                Column("o.id"),
+                Column('o.payload:"customer":"id"::NUMBER', name="customer_id"),
+                Column('o.payload:"customer":"name"'),
+                Column("o.payload:customer.name", name="name"),
+            ],
+            where=E("o.payload:status::string = 'open'")
+            & E("o.payload:\"status\"::STRING <> 'o.payload:status::STRING'")
+            & E('o.payload:"customer":"id"::NUMBER > 5'),
+            order_by=['o.payload:"status"::STRING'],
+        )
+        result = hoist_variant_paths(query, ORDERS)
+        self.assertEqual(
+            [(p.column, p.path, p.cast, p.name, p.count) for p in result.paths],
+            [
+                ("payload", ("customer", "id"), "NUMBER", "payload_customer_id", 3),
+                ("payload", ("status",), "STRING", "payload_status_2", 3),
+            ],
+        )
+        self.assertEqual(
+            result.query,
+            Query(
+                Join(
+                    FromExpr(
+                        Query(
+                            FromExpr("orders", sample=Sample(10)),
+                            [
+                                Column("*"),
+                                Column(
+                                    'payload:"customer":"id"::NUMBER',
+                                    name="payload_customer_id",
+                                ),
+                                Column(
+                                    'payload:"status"::STRING', name="payload_status_2"
+                                ),
+                            ],
+                        ),
+                        name="o",
+                    ),
+                    FromExpr("customer", name="c"),
+                    E("c.id = o.payload_customer_id"),
+                ),
+                [
+                    Column("o.id"),
+                    Column("o.payload_customer_id", name="customer_id"),
+                    Column('o.payload:"customer":"name"'),
+                    Column("o.payload:customer.name", name="name"),
+                ],
+                where=E("o.payload_status_2 = 'open'")
+                & E("o.payload_status_2 <> 'o.payload:status::STRING'")
+                & E("o.payload_customer_id > 5"),
+                order_by=["o.payload_status_2"],
+            ),
+        )
+
+        self.assertEqual(
+            result.materialize_stmts(ORDERS),
+            [
+                "ALTER TABLE orders ADD COLUMN payload_customer_id NUMBER(38, 0);",
+                "ALTER TABLE orders ADD COLUMN payload_status_2 STRING(16777216);",
+            ],
+        )
+        self.assertEqual(
+            result.materialize_stmts(ORDERS, backfill=True),
+            [
+                "ALTER TABLE orders ADD COLUMN payload_customer_id NUMBER(38, 0);",
+                "ALTER TABLE orders ADD COLUMN payload_status_2 STRING(16777216);",
+                'UPDATE orders SET payload_customer_id = payload:"customer":"id"::NUMBER, '
+                'payload_status_2 = payload:"status"::STRING;',
+            ],
+        )
+        self.assertEqual(result.paths[0].data_type, NumberType())
+        self.assertEqual(result.paths[1].data_type, StringType())
+
+    def test_group_by(self) -> None:
+        query = Query(
+            FromExpr("orders", name="o"),
+            [
+                Column("o.payload:region::STRING"),
+                Column("o.payload:kind::STRING", name="kind"),
+                Column("COUNT(*)", name="n"),
+            ],
+            where=E("o.payload:region::STRING <> 'none'")
+            & E("o.payload:kind::STRING <> 'none'"),
+            group_by=["o.payload:region::STRING", "o.payload:kind::STRING"],
+        )
+        result = hoist_variant_paths(query, ORDERS)
+        self.assertEqual([p.name for p in result.paths], ["payload_kind"])
+        self.assertEqual(
+            list(result.query.columns.columns[:2]),
+            [
+                Column("o.payload:region::STRING"),
+                Column("o.payload_kind", name="kind"),
+            ],
+        )
+        self.assertEqual(
+            result.query.group_by, ("o.payload:region::STRING", "o.payload_kind")
+        )
+        self.assertEqual(
+            result.query.where,
+            E("o.payload:region::STRING <> 'none'") & E("o.payload_kind <> 'none'"),
+        )
+
+    def test_unchanged(self) -> None:
+        once = Query(
+            FromExpr("orders"),
+            [Column("id")],
+            where=E('payload:"a"::NUMBER = 1') & E('payload:"a" = 1'),
+        )
+        self.assertIs(hoist_variant_paths(once, ORDERS).query, once)
+        self.assertEqual(
+            [p.path for p in hoist_variant_paths(once, ORDERS, min_count=1).paths],
+            [("a",)],
+        )
+
+        twice = E('payload:"a"::NUMBER = 1') & E('payload:"a"::NUMBER < 3')
+        for query in [
+            Query(FromExpr("orders"), [Column("*")], where=twice),
+            Query(
+                LeftJoin(
+                    FromExpr("orders", name="a"),
+                    FromExpr("orders", name="b"),
+                    E("a.id = b.id"),
+                ),
+                [Column("a.id")],
+                where=twice,
+            ),
+            Query(FromExpr("customer"), [Column("id")], where=twice),
+            Query(
+                FromExpr("orders"),
+                [Column('payload:"a"', name="a")],
+                where=E('payload:"a" = 1') & E('payload:"a" < 3'),
+            ),
+        ]:
+            with self.subTest(query=query.packed()):
+                result = hoist_variant_paths(query, ORDERS)
+                self.assertIs(result.query, query)
+                self.assertEqual(result.paths, [])
+                self.assertEqual(result.materialize_stmts(ORDERS, backfill=True), [])
+
+
+if __name__ == "__main__":
+    unittest.main()